@@ -0,0 +1,121 @@
+"""Cache of computed node positions keyed by the structural hash of a workflow graph."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from ..cache_utils import LRUCache
+from ..config import get_environment_config
+from ..logger import get_logger
+
+logger = get_logger("xtremetools.base.layout_cache")
+
+# Bump when the layout algorithm changes so stale positions are never reapplied.
+LAYOUT_VERSION = 2
+
+
+@dataclass(slots=True)
+class CachedLayout:
+    positions: dict[int, list[float]]
+    order: list[int]
+
+
+def structural_layout_key(
+    nodes_map: dict[int, dict[str, Any]],
+    links: list,
+    options: dict[str, Any] | None = None,
+) -> str:
+    """Hash node ids/types/sizes and link topology; positions and widget values are ignored.
+
+    Two workflows that differ only in ``pos``, ``widgets_values``, titles or
+    other cosmetic fields share a key, so their layout can be reused as-is.
+    """
+
+    digest = hashlib.sha256(f"v{LAYOUT_VERSION}".encode("utf-8"))
+    for node_id in sorted(nodes_map, key=str):
+        node = nodes_map[node_id]
+        digest.update(f"|n{node_id}:{node.get('type', '')}:{node.get('size')}".encode("utf-8"))
+    topology = sorted(
+        (str(link[1]), str(link[2]), str(link[3]), str(link[4]))
+        for link in links or []
+        if isinstance(link, list) and len(link) >= 5
+    )
+    for source_id, output_idx, target_id, input_idx in topology:
+        digest.update(f"|l{source_id}.{output_idx}>{target_id}.{input_idx}".encode("utf-8"))
+    if options:
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LayoutCache:
+    """In-memory LRU of layouts with an optional JSON-file tier under ``disk_dir``.
+
+    The disk tier shards files by the first two hex digits of the key; it is
+    read on memory misses and written on every store.
+    """
+
+    def __init__(self, max_entries: int = 512, disk_dir: Path | None = None) -> None:
+        self.memory: LRUCache[str, CachedLayout] = LRUCache(max_entries)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_hits = 0
+
+    def _disk_path(self, key: str) -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> CachedLayout | None:
+        layout = self.memory.get(key)
+        if layout is not None or self.disk_dir is None:
+            return layout
+        path = self._disk_path(key)
+        if not path.exists():
+            return None
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            layout = CachedLayout(
+                positions={int(node_id): list(pos) for node_id, pos in raw["positions"].items()},
+                order=[int(node_id) for node_id in raw["order"]],
+            )
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+            logger.warning("Ignoring unreadable layout cache entry %s: %s", path, exc)
+            return None
+        self.disk_hits += 1
+        self.memory.put(key, layout)
+        return layout
+
+    def put(self, key: str, layout: CachedLayout) -> None:
+        self.memory.put(key, layout)
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(
+                json.dumps({"positions": {str(k): v for k, v in layout.positions.items()}, "order": layout.order}),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, path)
+        except OSError as exc:  # pragma: no cover - read-only cache dir
+            logger.warning("Could not persist layout cache entry %s: %s", key[:12], exc)
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.memory.stats(), "disk_hits": self.disk_hits, "disk": str(self.disk_dir) if self.disk_dir else None}
+
+
+@lru_cache(maxsize=1)
+def get_layout_cache() -> LayoutCache:
+    """Return the process-wide layout cache configured from the environment."""
+
+    config = get_environment_config()
+    disk_dir = config.cache_dir / "layouts" if config.layout_cache_disk else None
+    return LayoutCache(config.layout_cache_max_entries, disk_dir=disk_dir)
+
+
+__all__ = ["CachedLayout", "LayoutCache", "structural_layout_key", "get_layout_cache", "LAYOUT_VERSION"]
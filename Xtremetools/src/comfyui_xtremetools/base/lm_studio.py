@@ -6,8 +6,9 @@ import time
 import urllib.error
 import urllib.request
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable
 
+from ..deadline import Deadline, DeadlineExceeded
 from .info import InfoFormatter
 from .node_base import XtremetoolsBaseNode
 
@@ -40,6 +41,7 @@ class LMStudioModelSettings:
 
     model: str | None = None
     fallback_to_default: bool = True
+    cascade_models: tuple[str, ...] = ()
 
 
 @dataclass(slots=True)
@@ -68,18 +70,18 @@ class LMStudioBaseNode(XtremetoolsBaseNode):
             messages.append({"role": "user", "content": user_input.strip()})
         return messages
 
-    def invoke_chat_completion(
+    def _build_chat_request(
         self,
         *,
         messages: list[dict[str, str]],
-        server_url: str | None = None,
-        model: str | None = None,
-        temperature: float = 0.7,
-        max_tokens: int = 256,
-        timeout: int | float | None = None,
-        response_format: dict[str, Any] | None = None,
-    ) -> LMStudioResult:
-        payload = {
+        server_url: str | None,
+        model: str | None,
+        temperature: float,
+        max_tokens: int,
+        response_format: dict[str, Any] | None,
+        stream: bool = False,
+    ) -> tuple[urllib.request.Request, str]:
+        payload: dict[str, Any] = {
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
@@ -87,6 +89,8 @@ class LMStudioBaseNode(XtremetoolsBaseNode):
         }
         if model:
             payload["model"] = model
+        if stream:
+            payload["stream"] = True
 
         base_url = (server_url or self.DEFAULT_SERVER_URL).rstrip("/")
         endpoint = f"{base_url}/v1/chat/completions"
@@ -96,34 +100,75 @@ class LMStudioBaseNode(XtremetoolsBaseNode):
             headers={"Content-Type": "application/json"},
             method="POST",
         )
+        return request, endpoint
+
+    def _request_timeout(self, timeout: int | float | None, deadline: Deadline | None) -> float:
+        timeout = timeout or self.DEFAULT_TIMEOUT
+        if deadline is None:
+            return timeout
+        return deadline.clamp_timeout(timeout, stage="LM Studio request")
+
+    @staticmethod
+    def _timeout_error(endpoint: str, timeout: float, deadline: Deadline | None) -> Exception:
+        if deadline is not None and deadline.expired:
+            return DeadlineExceeded(f"Deadline of {deadline.budget:.1f} s exceeded waiting for {endpoint}")
+        return LMStudioAPIError(f"LM Studio at {endpoint} timed out after {timeout:.1f} s")
+
+    @staticmethod
+    def _http_error(exc: urllib.error.HTTPError) -> LMStudioAPIError:  # pragma: no cover - HTTP error responses
+        error_body = ""
+        try:
+            error_body = exc.read().decode("utf-8", errors="ignore")
+        except Exception:  # pragma: no cover - best-effort only
+            error_body = ""
+
+        detail: str | None = None
+        if error_body:
+            try:
+                parsed = json.loads(error_body)
+                if isinstance(parsed, dict):
+                    detail = parsed.get("error") or json.dumps(parsed)
+                else:
+                    detail = str(parsed)
+            except json.JSONDecodeError:
+                detail = error_body.strip()
+
+        return LMStudioAPIError(f"HTTP {exc.code} from LM Studio: {detail or exc.reason}")
+
+    def invoke_chat_completion(
+        self,
+        *,
+        messages: list[dict[str, str]],
+        server_url: str | None = None,
+        model: str | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 256,
+        timeout: int | float | None = None,
+        response_format: dict[str, Any] | None = None,
+        deadline: Deadline | None = None,
+    ) -> LMStudioResult:
+        """Run a chat completion; ``deadline`` caps the socket timeout to the remaining budget."""
+
+        timeout = self._request_timeout(timeout, deadline)
+        request, endpoint = self._build_chat_request(
+            messages=messages,
+            server_url=server_url,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format,
+        )
 
         start = time.perf_counter()
         try:
-            with urllib.request.urlopen(request, timeout=timeout or self.DEFAULT_TIMEOUT) as response:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
                 body = response.read()
         except urllib.error.HTTPError as exc:  # pragma: no cover - HTTP error responses
-            error_body = ""
-            try:
-                error_body = exc.read().decode("utf-8", errors="ignore")
-            except Exception:  # pragma: no cover - best-effort only
-                error_body = ""
-
-            detail: str | None = None
-            if error_body:
-                try:
-                    parsed = json.loads(error_body)
-                    if isinstance(parsed, dict):
-                        detail = parsed.get("error") or json.dumps(parsed)
-                    else:
-                        detail = str(parsed)
-                except json.JSONDecodeError:
-                    detail = error_body.strip()
-
-            raise LMStudioAPIError(
-                f"HTTP {exc.code} from LM Studio: {detail or exc.reason}"
-            ) from exc
+            raise self._http_error(exc) from exc
         except urllib.error.URLError as exc:  # pragma: no cover - network issues
             raise LMStudioAPIError(f"Failed to reach LM Studio at {endpoint}: {exc}") from exc
+        except TimeoutError as exc:  # pragma: no cover - slow server
+            raise self._timeout_error(endpoint, timeout, deadline) from exc
 
         latency_ms = (time.perf_counter() - start) * 1000
 
@@ -153,6 +198,92 @@ class LMStudioBaseNode(XtremetoolsBaseNode):
             latency_ms=latency_ms,
         )
 
+    def stream_chat_completion(
+        self,
+        *,
+        messages: list[dict[str, str]],
+        server_url: str | None = None,
+        model: str | None = None,
+        temperature: float = 0.7,
+        max_tokens: int = 256,
+        timeout: int | float | None = None,
+        response_format: dict[str, Any] | None = None,
+        should_stop: Callable[[str], bool] | None = None,
+        deadline: Deadline | None = None,
+    ) -> LMStudioResult:
+        """Stream a chat completion (server-sent events) and stop on demand.
+
+        ``should_stop`` receives every content delta; returning ``True`` closes
+        the connection immediately, which makes LM Studio stop generating. The
+        result then carries ``finish_reason="client_stop"``. When ``deadline``
+        passes mid-stream the connection is closed and
+        :class:`DeadlineExceeded` is raised.
+        """
+
+        timeout = self._request_timeout(timeout, deadline)
+        request, endpoint = self._build_chat_request(
+            messages=messages,
+            server_url=server_url,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format,
+            stream=True,
+        )
+
+        parts: list[str] = []
+        finish_reason: str | None = None
+        model_name: str | None = None
+        usage: dict[str, Any] = {}
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                for raw_line in response:
+                    if deadline is not None:
+                        deadline.check("the stream finished")
+                    line = raw_line.decode("utf-8", errors="ignore").strip() if isinstance(raw_line, bytes) else str(raw_line).strip()
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        event = json.loads(data)
+                    except json.JSONDecodeError:
+                        continue
+                    if "error" in event:
+                        raise LMStudioAPIError(str(event["error"]))
+                    model_name = event.get("model") or model_name
+                    usage = event.get("usage") or usage
+                    choices = event.get("choices") or []
+                    if not choices:
+                        continue
+                    delta = (choices[0].get("delta") or {}).get("content") or ""
+                    finish_reason = choices[0].get("finish_reason") or finish_reason
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    if should_stop is not None and should_stop(delta):
+                        finish_reason = "client_stop"
+                        break
+        except urllib.error.HTTPError as exc:  # pragma: no cover - HTTP error responses
+            raise self._http_error(exc) from exc
+        except urllib.error.URLError as exc:  # pragma: no cover - network issues
+            raise LMStudioAPIError(f"Failed to reach LM Studio at {endpoint}: {exc}") from exc
+        except DeadlineExceeded:
+            raise
+        except TimeoutError as exc:  # pragma: no cover - slow server
+            raise self._timeout_error(endpoint, timeout, deadline) from exc
+
+        return LMStudioResult(
+            text="".join(parts).strip(),
+            model=model_name,
+            finish_reason=finish_reason,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            latency_ms=(time.perf_counter() - start) * 1000,
+        )
+
     def build_completion_info(self, result: LMStudioResult) -> str:
         formatter = InfoFormatter(title="LM Studio")
         formatter.add(f"Model: {result.model or 'default'}")
@@ -0,0 +1,66 @@
+"""Uniform-grid spatial index for overlap checks on the ComfyUI canvas."""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Hashable, Iterator
+
+Rect = tuple[float, float, float, float]  # x, y, width, height
+
+
+def rects_overlap(a: Rect, b: Rect, margin: float = 0.0) -> bool:
+    """True when ``a`` and ``b`` (grown by ``margin``) intersect with positive area."""
+
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw + margin and bx < ax + aw + margin and ay < by + bh + margin and by < ay + ah + margin
+
+
+class SpatialGrid:
+    """Buckets rectangles into square cells so overlap queries stay local.
+
+    With a cell size close to the typical node size every rectangle touches a
+    handful of cells, so inserting ``N`` rectangles and querying each one is
+    roughly O(N) instead of the O(N^2) all-pairs check.
+    """
+
+    def __init__(self, cell_size: float = 400.0) -> None:
+        self.cell_size = max(1.0, float(cell_size))
+        self._cells: dict[tuple[int, int], list[Hashable]] = defaultdict(list)
+        self._rects: dict[Hashable, Rect] = {}
+
+    def _cells_for(self, rect: Rect) -> Iterator[tuple[int, int]]:
+        x, y, width, height = rect
+        size = self.cell_size
+        for cx in range(int(x // size), int((x + max(width, 0.0)) // size) + 1):
+            for cy in range(int(y // size), int((y + max(height, 0.0)) // size) + 1):
+                yield cx, cy
+
+    def insert(self, key: Hashable, rect: Rect) -> None:
+        self._rects[key] = rect
+        for cell in self._cells_for(rect):
+            self._cells[cell].append(key)
+
+    def rect(self, key: Hashable) -> Rect:
+        return self._rects[key]
+
+    def query(self, rect: Rect, margin: float = 0.0) -> list[Hashable]:
+        """Return keys whose rectangles overlap ``rect`` (grown by ``margin``)."""
+
+        x, y, width, height = rect
+        search = (x - margin, y - margin, width + 2 * margin, height + 2 * margin)
+        seen: set[Hashable] = set()
+        hits: list[Hashable] = []
+        for cell in self._cells_for(search):
+            for key in self._cells.get(cell, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if rects_overlap(rect, self._rects[key], margin):
+                    hits.append(key)
+        return hits
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+
+__all__ = ["Rect", "SpatialGrid", "rects_overlap"]
@@ -1,10 +1,20 @@
 """Post-processing for generated ComfyUI workflows: DAG layout, link synthesis, and templates."""
 from __future__ import annotations
 
+import heapq
 import json
-from typing import Any
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Iterable
 
+from ..logger import get_logger
 from ..node_discovery import get_type_registry
+from ..workflow_document import WorkflowDocument
+from .force_layout import force_directed_positions, numpy_available
+from .layout_cache import CachedLayout, get_layout_cache, structural_layout_key
+from .spatial_index import SpatialGrid
+
+logger = get_logger("xtremetools.base.workflow_postprocessor")
 
 
 class WorkflowDAGLayout:
@@ -25,6 +35,21 @@ class WorkflowDAGLayout:
         "XtremetoolsLMStudioText": {"outputs": ["STRING"], "consumers": ["ShowText|pysssss"]},
     }
 
+    OUTPUT_NODE_TYPES = frozenset({"ShowText|pysssss", "Note|pysssss"})
+    LAYOUT_ORIGIN = (100, 100)
+    DEFAULT_NODE_SIZE = (320.0, 120.0)
+    NODE_TITLE_HEIGHT = 30.0
+    GROUP_TITLE_HEIGHT = 40.0
+    COLUMN_GAP = 80.0
+    ROW_GAP = 40.0
+    NODE_MARGIN = 10.0
+    LAYOUT_ENGINES = ("layered", "force")
+    FORCE_ITERATIONS = 150
+    FORCE_TIME_BUDGET = 2.0
+    GROUP_PADDING = 10.0
+    # Cluster per node bucket: (title, color) of the automatic group.
+    GROUP_CLUSTERS = (("Config", "#3f789e"), ("Processing", "#8A8"), ("Output", "#b58b2a"))
+
     @staticmethod
     def build_link_map(workflow: dict[str, Any]) -> dict[tuple[int, int], int]:
         """Build a map of (source_node_id, output_index) -> link_id."""
@@ -40,136 +65,598 @@ class WorkflowDAGLayout:
         """Build a map of node_id -> node."""
         return {node["id"]: node for node in workflow.get("nodes", []) if isinstance(node, dict)}
 
+    @staticmethod
+    def node_positions(workflow: dict[str, Any]) -> dict[int, list[float]]:
+        """Snapshot node id -> pos, e.g. as ``previous_positions`` for an incremental layout."""
+        return {
+            node["id"]: list(node["pos"])
+            for node in workflow.get("nodes", [])
+            if isinstance(node, dict) and isinstance(node.get("pos"), list)
+        }
+
+    @classmethod
+    def node_bucket(cls, node: dict[str, Any]) -> int:
+        """0 for settings/config nodes, 2 for display/output nodes, 1 for everything else."""
+        ntype = node.get("type", "")
+        if "Settings" in ntype:
+            return 0
+        if ntype in cls.OUTPUT_NODE_TYPES:
+            return 2
+        return 1
+
+    @staticmethod
+    def build_adjacency(
+        nodes_map: dict[int, dict[str, Any]],
+        links: list,
+    ) -> tuple[dict[int, list[int]], dict[int, list[int]]]:
+        """Return (successors, predecessors) per node id from well-formed links between known nodes."""
+        successors: dict[int, list[int]] = {node_id: [] for node_id in nodes_map}
+        predecessors: dict[int, list[int]] = {node_id: [] for node_id in nodes_map}
+        for link in links or []:
+            if not (isinstance(link, list) and len(link) >= 4):
+                continue
+            source_id, target_id = link[1], link[3]
+            if source_id in successors and target_id in successors:
+                successors[source_id].append(target_id)
+                predecessors[target_id].append(source_id)
+        return successors, predecessors
+
+    @staticmethod
+    def topological_sort(nodes_map: dict[int, dict], links: list) -> tuple[list[int], list[int]]:
+        """Kahn's algorithm over the actual links; returns (order, nodes_on_cycles).
+
+        Ready nodes are taken from a heap keyed by (bucket, id), so unlinked
+        graphs keep the familiar configs -> processors -> outputs order. Nodes
+        that never become ready sit on (or behind) a cycle; they are appended
+        in the same key order so every node still gets a position.
+        """
+        successors, predecessors = WorkflowDAGLayout.build_adjacency(nodes_map, links)
+        key = {node_id: (WorkflowDAGLayout.node_bucket(node), node_id) for node_id, node in nodes_map.items()}
+        indegree = {node_id: len(preds) for node_id, preds in predecessors.items()}
+        ready = [key[node_id] for node_id, degree in indegree.items() if degree == 0]
+        heapq.heapify(ready)
+
+        order: list[int] = []
+        while ready:
+            _, node_id = heapq.heappop(ready)
+            order.append(node_id)
+            for target_id in successors[node_id]:
+                indegree[target_id] -= 1
+                if indegree[target_id] == 0:
+                    heapq.heappush(ready, key[target_id])
+
+        cyclic = sorted((node_id for node_id, degree in indegree.items() if degree > 0), key=key.__getitem__)
+        if cyclic:
+            logger.warning("Workflow contains a cycle through %s node(s): %s", len(cyclic), cyclic[:10])
+        return order + cyclic, cyclic
+
     @staticmethod
     def topological_order(nodes_map: dict[int, dict], links: list) -> list[int]:
-        """Return node IDs in rough topological order (configs first, outputs last)."""
-        config_nodes = []
-        processor_nodes = []
-        output_nodes = []
+        """Return node IDs in topological order (configs first, outputs last among ties)."""
+        order, _ = WorkflowDAGLayout.topological_sort(nodes_map, links)
+        return order
 
-        for node_id, node in nodes_map.items():
-            ntype = node.get("type", "")
-            if "Settings" in ntype or ntype in ["XtremetoolsLMStudioServerSettings", "XtremetoolsLMStudioModelSettings"]:
-                config_nodes.append(node_id)
-            elif ntype in ["ShowText|pysssss", "Note|pysssss"]:
-                output_nodes.append(node_id)
+    @staticmethod
+    def assign_layers(
+        nodes_map: dict[int, dict],
+        order: list[int],
+        predecessors: dict[int, list[int]],
+    ) -> dict[int, int]:
+        """Longest-path layering: a node sits one column right of its deepest predecessor.
+
+        The node bucket acts as a floor (configs 0, processors 1, outputs 2) so
+        unlinked nodes still separate into three columns. Edges that point
+        backwards in ``order`` (cycles) are ignored.
+        """
+        rank = {node_id: index for index, node_id in enumerate(order)}
+        layers: dict[int, int] = {}
+        for node_id in order:
+            layer = WorkflowDAGLayout.node_bucket(nodes_map[node_id])
+            for pred in predecessors.get(node_id, ()):
+                if rank[pred] < rank[node_id]:
+                    layer = max(layer, layers[pred] + 1)
+            layers[node_id] = layer
+        return layers
+
+    @staticmethod
+    def order_layers(
+        layers: dict[int, int],
+        order: list[int],
+        successors: dict[int, list[int]],
+        predecessors: dict[int, list[int]],
+        sweeps: int = 4,
+    ) -> list[list[int]]:
+        """Group nodes by layer and reduce crossings with barycentric sweeps.
+
+        Each sweep reorders a layer by the mean row of its neighbours in the
+        adjacent direction (down: predecessors, up: successors); nodes without
+        neighbours keep their current row. Cost is O(sweeps * (V + E) + V log V).
+        """
+        columns: list[list[int]] = [[] for _ in range(max(layers.values(), default=-1) + 1)]
+        for node_id in order:
+            columns[layers[node_id]].append(node_id)
+        row = {node_id: index for column in columns for index, node_id in enumerate(column)}
+
+        def reorder(column: list[int], neighbours: dict[int, list[int]]) -> None:
+            def barycenter(node_id: int) -> float:
+                linked = neighbours.get(node_id) or ()
+                if not linked:
+                    return float(row[node_id])
+                return sum(row[other] for other in linked) / len(linked)
+
+            column.sort(key=lambda node_id: (barycenter(node_id), row[node_id]))
+            for index, node_id in enumerate(column):
+                row[node_id] = index
+
+        for sweep in range(sweeps):
+            if sweep % 2 == 0:
+                for column in columns[1:]:
+                    reorder(column, predecessors)
             else:
-                processor_nodes.append(node_id)
+                for column in reversed(columns[:-1]):
+                    reorder(column, successors)
+        return columns
+
+    @classmethod
+    def node_size(cls, node: dict[str, Any]) -> tuple[float, float]:
+        """Return the node's ``size`` as (width, height), falling back to a typical node."""
+        size = node.get("size")
+        if isinstance(size, (list, tuple)) and len(size) >= 2:
+            try:
+                return max(float(size[0]), 1.0), max(float(size[1]), 1.0)
+            except (TypeError, ValueError):
+                pass
+        return cls.DEFAULT_NODE_SIZE
 
-        return sorted(config_nodes) + sorted(processor_nodes) + sorted(output_nodes)
+    @staticmethod
+    def assign_positions(nodes_map: dict[int, dict], order: list[int], links: list | None = None) -> None:
+        """Assign x, y positions with a layered (Sugiyama-style) layout.
+
+        Columns come from :meth:`assign_layers`, rows from :meth:`order_layers`.
+        Each column is as wide as its widest node and rows stack by actual node
+        height (plus the title bar), so differently sized nodes never overlap.
+        """
+        successors, predecessors = WorkflowDAGLayout.build_adjacency(nodes_map, links or [])
+        layers = WorkflowDAGLayout.assign_layers(nodes_map, order, predecessors)
+        columns = WorkflowDAGLayout.order_layers(layers, order, successors, predecessors)
+
+        origin_x, origin_y = WorkflowDAGLayout.LAYOUT_ORIGIN
+        title = WorkflowDAGLayout.NODE_TITLE_HEIGHT
+        x = float(origin_x)
+        # Empty columns (e.g. no config nodes) are collapsed instead of leaving a gap.
+        for column in (column for column in columns if column):
+            sizes = [WorkflowDAGLayout.node_size(nodes_map[node_id]) for node_id in column]
+            y = float(origin_y) + title
+            for node_id, (_, height) in zip(column, sizes):
+                nodes_map[node_id]["pos"] = [x, y]
+                y += height + WorkflowDAGLayout.ROW_GAP + title
+            x += max(width for width, _ in sizes) + WorkflowDAGLayout.COLUMN_GAP
 
     @staticmethod
-    def assign_positions(nodes_map: dict[int, dict], order: list[int]) -> None:
-        """Assign x, y positions to nodes based on topological order."""
-        config_cols = {nid: idx for idx, nid in enumerate([nid for nid in order if "Settings" in nodes_map[nid].get("type", "")])}
-        processor_cols = {
-            nid: idx
-            for idx, nid in enumerate([nid for nid in order if "Settings" not in nodes_map[nid].get("type", "") and nodes_map[nid].get("type", "") not in ["ShowText|pysssss", "Note|pysssss"]])
-        }
-        output_cols = {
-            nid: idx
-            for idx, nid in enumerate([nid for nid in order if nodes_map[nid].get("type", "") in ["ShowText|pysssss", "Note|pysssss"]])
-        }
+    def resolve_overlaps(
+        nodes_map: dict[int, dict],
+        order: list[int],
+        groups: list[dict[str, Any]] | None = None,
+        fixed: Iterable[int] = (),
+    ) -> int:
+        """Push overlapping nodes down until they are clear; return how many moved.
+
+        Nodes are placed one by one in ``order`` into a :class:`SpatialGrid`;
+        a node that collides with an already placed node (title bar included)
+        or with a group's title strip moves below the lowest obstacle it hits.
+        ``fixed`` nodes are obstacles from the start and never move.
+        Each query only inspects nearby grid cells, so the pass is near-linear.
+        """
+        title = WorkflowDAGLayout.NODE_TITLE_HEIGHT
+        margin = WorkflowDAGLayout.NODE_MARGIN
+        grid = SpatialGrid(cell_size=2 * max(WorkflowDAGLayout.DEFAULT_NODE_SIZE))
+        for index, group in enumerate(groups or []):
+            bounding = group.get("bounding") if isinstance(group, dict) else None
+            if isinstance(bounding, list) and len(bounding) >= 4:
+                grid.insert(("group", index), (bounding[0], bounding[1], bounding[2], WorkflowDAGLayout.GROUP_TITLE_HEIGHT))
+        for node_id in fixed:
+            pos = nodes_map[node_id].get("pos")
+            if isinstance(pos, list) and len(pos) >= 2:
+                width, height = WorkflowDAGLayout.node_size(nodes_map[node_id])
+                grid.insert(("node", node_id), (float(pos[0]), float(pos[1]) - title, width, height + title))
+
+        moved = 0
+        for node_id in order:
+            node = nodes_map[node_id]
+            pos = node.get("pos")
+            if not (isinstance(pos, list) and len(pos) >= 2):
+                continue
+            width, height = WorkflowDAGLayout.node_size(node)
+            rect = (float(pos[0]), float(pos[1]) - title, width, height + title)
+            hits = grid.query(rect, margin)
+            if hits:
+                while hits:
+                    bottom = max(top + h for _, top, _, h in map(grid.rect, hits))
+                    rect = (rect[0], bottom + margin, width, height + title)
+                    hits = grid.query(rect, margin)
+                node["pos"] = [rect[0], rect[1] + title]
+                moved += 1
+            grid.insert(("node", node_id), rect)
+        if moved:
+            logger.debug("Moved %s overlapping node(s)", moved)
+        return moved
+
+    @staticmethod
+    def layout(
+        nodes_map: dict[int, dict],
+        links: list,
+        use_cache: bool = True,
+        groups: list[dict[str, Any]] | None = None,
+        engine: str = "layered",
+    ) -> list[int]:
+        """Position every node, clear overlaps and return the topological order.
+
+        With ``use_cache`` the layout is looked up by the structural hash of
+        node types, sizes + link topology first; positions and widget values do
+        not affect the key, so re-running on an edited-but-same-shape workflow
+        reapplies the stored positions without recomputing them.
+
+        ``engine="force"`` refines the layered positions with the NumPy
+        force-directed pass from :mod:`.force_layout` (falling back to the
+        layered layout when NumPy is not installed).
+        """
+        if engine not in WorkflowDAGLayout.LAYOUT_ENGINES:
+            raise ValueError(f"Unknown layout engine {engine!r}; expected one of {', '.join(WorkflowDAGLayout.LAYOUT_ENGINES)}")
+        cache = get_layout_cache() if use_cache else None
+        options: dict[str, Any] = {}
+        if groups:
+            options["groups"] = [group.get("bounding") for group in groups if isinstance(group, dict)]
+        if engine != "layered":
+            options["engine"] = engine
+        key = structural_layout_key(nodes_map, links, options or None) if cache is not None else ""
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None and set(cached.positions) == set(nodes_map):
+            for node_id, pos in cached.positions.items():
+                nodes_map[node_id]["pos"] = list(pos)
+            return list(cached.order)
+
+        order = WorkflowDAGLayout.topological_order(nodes_map, links)
+        WorkflowDAGLayout.assign_positions(nodes_map, order, links)
+        if engine == "force":
+            WorkflowDAGLayout.apply_force_layout(nodes_map, links)
+        WorkflowDAGLayout.resolve_overlaps(nodes_map, order, groups)
+        if cache is not None:
+            cache.put(key, CachedLayout(positions={node_id: list(node["pos"]) for node_id, node in nodes_map.items()}, order=order))
+        return order
 
+    @staticmethod
+    def relayout_incremental(
+        nodes_map: dict[int, dict],
+        links: list,
+        previous_positions: dict[int, list[float]],
+        dirty_nodes: Iterable[int] = (),
+        groups: list[dict[str, Any]] | None = None,
+    ) -> list[int]:
+        """Re-place only changed nodes and keep every other node where it was.
+
+        Nodes in ``dirty_nodes`` or missing from ``previous_positions`` are
+        dirty; all others get their previous position back. Dirty nodes are
+        placed in topological order one column right of their rightmost placed
+        predecessor (or left of their leftmost successor) at the mean height of
+        their placed neighbours, then pushed clear of the untouched nodes.
+        Placement work scales with the dirty set and its links; the rest is
+        one linear scan to restore positions and index obstacles.
+
+        Returns:
+            The ids of the nodes that were re-placed, in placement order.
+        """
+        dirty = {node_id for node_id in dirty_nodes if node_id in nodes_map}
         for node_id, node in nodes_map.items():
-            if node_id in config_cols:
-                x = 100 + config_cols[node_id] * 250
-                y = 100
-            elif node_id in processor_cols:
-                x = 100 + processor_cols[node_id] * 250
-                y = 250
+            previous = previous_positions.get(node_id)
+            if previous is None:
+                dirty.add(node_id)
+            elif node_id not in dirty:
+                node["pos"] = list(previous)
+        if not dirty:
+            return []
+
+        predecessors: dict[int, list[int]] = {node_id: [] for node_id in dirty}
+        successors: dict[int, list[int]] = {node_id: [] for node_id in dirty}
+        dirty_links = []
+        for link in links or []:
+            if not (isinstance(link, list) and len(link) >= 4):
+                continue
+            source_id, target_id = link[1], link[3]
+            if source_id not in nodes_map or target_id not in nodes_map:
+                continue
+            if target_id in dirty:
+                predecessors[target_id].append(source_id)
+            if source_id in dirty:
+                successors[source_id].append(target_id)
+                if target_id in dirty:
+                    dirty_links.append(link)
+
+        order = WorkflowDAGLayout.topological_order({node_id: nodes_map[node_id] for node_id in dirty}, dirty_links)
+        origin_x, origin_y = WorkflowDAGLayout.LAYOUT_ORIGIN
+        placed = set(nodes_map) - dirty
+        for node_id in order:
+            node = nodes_map[node_id]
+            width, _ = WorkflowDAGLayout.node_size(node)
+            left = [pred for pred in predecessors[node_id] if pred in placed]
+            right = [succ for succ in successors[node_id] if succ in placed]
+            previous = previous_positions.get(node_id) or node.get("pos")
+            if not (isinstance(previous, list) and len(previous) >= 2):
+                previous = [origin_x, origin_y + WorkflowDAGLayout.NODE_TITLE_HEIGHT]
+            if left:
+                x = max(nodes_map[pred]["pos"][0] + WorkflowDAGLayout.node_size(nodes_map[pred])[0] for pred in left)
+                x += WorkflowDAGLayout.COLUMN_GAP
+            elif right:
+                x = min(nodes_map[succ]["pos"][0] for succ in right) - width - WorkflowDAGLayout.COLUMN_GAP
             else:
-                x = 100 + output_cols.get(node_id, 0) * 250
-                y = 400
+                x = float(previous[0])
+            neighbours = left + right
+            y = sum(nodes_map[other]["pos"][1] for other in neighbours) / len(neighbours) if neighbours else float(previous[1])
+            node["pos"] = [float(x), float(y)]
+            placed.add(node_id)
+
+        WorkflowDAGLayout.resolve_overlaps(nodes_map, order, groups, fixed=set(nodes_map) - dirty)
+        logger.debug("Incremental layout re-placed %s of %s node(s)", len(order), len(nodes_map))
+        return order
 
-            node["pos"] = [x, y]
+    @staticmethod
+    def apply_force_layout(nodes_map: dict[int, dict], links: list) -> bool:
+        """Refine current positions with the force-directed engine; False if NumPy is missing."""
+        if not numpy_available():
+            logger.warning("Force layout requested but NumPy is not installed; keeping the layered layout")
+            return False
+        edges = [
+            (link[1], link[3])
+            for link in links or []
+            if isinstance(link, list) and len(link) >= 5
+        ]
+        width, _ = WorkflowDAGLayout.DEFAULT_NODE_SIZE
+        positions = force_directed_positions(
+            {node_id: node["pos"] for node_id, node in nodes_map.items()},
+            edges,
+            spacing=width + WorkflowDAGLayout.COLUMN_GAP,
+            iterations=WorkflowDAGLayout.FORCE_ITERATIONS,
+            time_budget=WorkflowDAGLayout.FORCE_TIME_BUDGET,
+        )
+        for node_id, pos in positions.items():
+            nodes_map[node_id]["pos"] = pos
+        return True
+
+    @staticmethod
+    def build_provider_index(
+        nodes_map: dict[int, dict[str, Any]],
+        order: list[int],
+    ) -> dict[str, list[tuple[int, int, int]]]:
+        """Index outputs by socket type: type -> [(rank, node_id, output_idx)] sorted by rank.
+
+        ``rank`` is the node's position in ``order``; untyped outputs are
+        indexed as STRING, matching how link synthesis has always treated them.
+        """
+        providers: dict[str, list[tuple[int, int, int]]] = defaultdict(list)
+        for rank, node_id in enumerate(order):
+            for output_idx, output_spec in enumerate(nodes_map[node_id].get("outputs", []) or []):
+                providers[output_spec.get("type") or "STRING"].append((rank, node_id, output_idx))
+        return providers
 
     @staticmethod
     def synthesize_links(workflow: dict[str, Any]) -> None:
-        """Auto-create links between nodes based on type patterns and available inputs/outputs."""
+        """Auto-create links between nodes based on type patterns and available inputs/outputs.
+
+        Every unlinked input is wired to the first compatible provider in node
+        order, as before, but only providers that come earlier in topological
+        order qualify, so synthesis never closes a cycle. Providers are looked
+        up through a type -> providers index with running "first provider"
+        minima and a binary search, which keeps synthesis at
+        O((V + E) log V) instead of comparing every socket pair.
+        """
         nodes_map = WorkflowDAGLayout.build_node_map(workflow)
         next_link_id = max((link[0] for link in workflow.get("links", []) if isinstance(link, list)), default=0) + 1
         new_links = list(workflow.get("links", []))
         registry = get_type_registry()
 
-        for node_id, node in nodes_map.items():
-            node_type = node.get("type", "")
-            inputs = node.get("inputs", [])
+        order = WorkflowDAGLayout.topological_order(nodes_map, new_links)
+        rank_of = {node_id: rank for rank, node_id in enumerate(order)}
+        position_of = {node_id: position for position, node_id in enumerate(nodes_map)}
+        providers = WorkflowDAGLayout.build_provider_index(nodes_map, order)
+        # earliest[type][i]: first provider in node order among providers[type][: i + 1],
+        # as (node position, output index, node id).
+        earliest: dict[str, list[tuple[int, int, int]]] = {}
+        for output_type, candidates in providers.items():
+            running: list[tuple[int, int, int]] = []
+            for _, source_id, output_idx in candidates:
+                entry = (position_of[source_id], output_idx, source_id)
+                running.append(entry if not running or entry < running[-1] else running[-1])
+            earliest[output_type] = running
+        compatible: dict[str, list[str]] = {}
 
-            # Match inputs to outputs from other nodes
-            for input_idx, input_spec in enumerate(inputs):
+        for node_id, node in nodes_map.items():
+            rank = rank_of[node_id]
+            for input_idx, input_spec in enumerate(node.get("inputs", []) or []):
                 if input_spec.get("link") is not None:
                     continue  # already has a link
 
-                input_type = input_spec.get("type")
-                input_name = input_spec.get("name", "")
-
-                # Find a source node that can provide this
-                source_found = False
-                for other_id, other_node in nodes_map.items():
-                    if other_id == node_id:
-                        continue
-
-                    other_type = other_node.get("type", "")
-                    outputs = other_node.get("outputs", [])
-
-                    for output_idx, output_spec in enumerate(outputs):
-                        output_type = output_spec.get("type")
-
-                        # Match based on registry compatibility
-                        if registry.is_link_allowed(output_type or "STRING", input_type or "STRING"):
-                            # Create link
-                            link_id = next_link_id
-                            new_links.append([link_id, other_id, output_idx, node_id, input_idx, output_type or "STRING"])
-                            input_spec["link"] = link_id
-                            output_spec.setdefault("links", []).append(link_id)
-                            next_link_id += 1
-                            source_found = True
-                            break
-
-                    if source_found:
-                        break
+                input_type = input_spec.get("type") or "STRING"
+                if input_type not in compatible:
+                    compatible[input_type] = [
+                        output_type
+                        for output_type in registry.compatible_output_types(input_type)
+                        if output_type in providers
+                    ]
+
+                best: tuple[int, int, int] | None = None
+                for output_type in compatible[input_type]:
+                    upstream = bisect_left(providers[output_type], (rank,))
+                    if upstream and (best is None or earliest[output_type][upstream - 1] < best):
+                        best = earliest[output_type][upstream - 1]
+                if best is None:
+                    continue
+
+                _, output_idx, source_id = best
+                output_spec = nodes_map[source_id]["outputs"][output_idx]
+                link_id = next_link_id
+                new_links.append([link_id, source_id, output_idx, node_id, input_idx, output_spec.get("type") or "STRING"])
+                input_spec["link"] = link_id
+                if output_spec.get("links") is None:  # absent, or null for an unconnected output
+                    output_spec["links"] = []
+                output_spec["links"].append(link_id)
+                next_link_id += 1
 
         workflow["links"] = new_links
         workflow["last_link_id"] = next_link_id - 1
 
+    @staticmethod
+    def assign_groups_and_order(workflow: dict[str, Any], nodes_map: dict[int, dict], order: list[int]) -> None:
+        """Set each node's ``order`` from ``order`` and replace ``groups`` with tight cluster boxes.
+
+        One pass over the laid-out nodes: ``order`` becomes the execution
+        order (so the host does not need to re-sort on load) and every node
+        grows the bounding box of its bucket's cluster (config, processing,
+        output). Empty clusters get no group.
+        """
+        title = WorkflowDAGLayout.NODE_TITLE_HEIGHT
+        boxes: dict[int, list[float]] = {}
+        for rank, node_id in enumerate(order):
+            node = nodes_map[node_id]
+            node["order"] = rank
+            pos = node.get("pos")
+            if not (isinstance(pos, list) and len(pos) >= 2):
+                continue
+            width, height = WorkflowDAGLayout.node_size(node)
+            left, top, right, bottom = pos[0], pos[1] - title, pos[0] + width, pos[1] + height
+            box = boxes.get(WorkflowDAGLayout.node_bucket(node))
+            if box is None:
+                boxes[WorkflowDAGLayout.node_bucket(node)] = [left, top, right, bottom]
+            else:
+                box[0], box[1] = min(box[0], left), min(box[1], top)
+                box[2], box[3] = max(box[2], right), max(box[3], bottom)
+
+        pad = WorkflowDAGLayout.GROUP_PADDING
+        header = WorkflowDAGLayout.GROUP_TITLE_HEIGHT
+        groups = []
+        for bucket, (left, top, right, bottom) in sorted(boxes.items()):
+            group_title, color = WorkflowDAGLayout.GROUP_CLUSTERS[bucket]
+            groups.append(
+                {
+                    "title": group_title,
+                    "bounding": [left - pad, top - pad - header, right - left + 2 * pad, bottom - top + 2 * pad + header],
+                    "color": color,
+                    "font_size": 24,
+                }
+            )
+        workflow["groups"] = groups
+
     @staticmethod
     def apply_layout(workflow: dict[str, Any]) -> None:
-        """Apply DAG layout and link synthesis to workflow."""
+        """Apply DAG layout and link synthesis, then assign groups and execution order."""
         nodes_map = WorkflowDAGLayout.build_node_map(workflow)
-        links = workflow.get("links", [])
-        order = WorkflowDAGLayout.topological_order(nodes_map, links)
-        WorkflowDAGLayout.assign_positions(nodes_map, order)
+        WorkflowDAGLayout.layout(nodes_map, workflow.get("links", []))
         WorkflowDAGLayout.synthesize_links(workflow)
+        order = WorkflowDAGLayout.topological_order(nodes_map, workflow.get("links", []))
+        WorkflowDAGLayout.assign_groups_and_order(workflow, nodes_map, order)
         workflow["last_node_id"] = max((node["id"] for node in nodes_map.values()), default=0)
 
 
-def post_process_workflow(workflow_json: str, apply_layout: bool = True, synthesize_links: bool = True) -> str:
-    """Post-process generated workflow JSON.
+def post_process_document(
+    document: WorkflowDocument,
+    apply_layout: bool = True,
+    synthesize_links: bool = True,
+    use_layout_cache: bool = True,
+    layout_engine: str = "layered",
+    previous_positions: dict[int, list[float]] | None = None,
+    dirty_nodes: Iterable[int] = (),
+    auto_groups: bool = True,
+) -> WorkflowDocument:
+    """Post-process a parsed workflow in place and return it.
 
     Args:
-        workflow_json: Raw workflow JSON string
+        document: Parsed workflow document
         apply_layout: Whether to apply DAG layout (positioning)
         synthesize_links: Whether to auto-create missing links
+        use_layout_cache: Whether to reuse positions for structurally identical graphs
+        layout_engine: "layered" (default) or "force" for the NumPy force-directed refinement
+        previous_positions: node id -> pos from an earlier layout; when given, only
+            ``dirty_nodes``, new nodes and endpoints of synthesized links are re-placed
+        auto_groups: After layout, replace ``groups`` with config/processing/output
+            cluster boxes and set each node's execution ``order``
 
     Returns:
-        Processed workflow JSON string
+        The same document, with links and positions updated
     """
-    try:
-        workflow = json.loads(workflow_json)
-    except json.JSONDecodeError:
-        return workflow_json
+    workflow = document.data
+    dirty = set(dirty_nodes)
 
     if synthesize_links:
+        known_links = len(document.links)
         WorkflowDAGLayout.synthesize_links(workflow)
+        document.invalidate()
+        for link in document.links[known_links:]:
+            dirty.update((link[1], link[3]))
 
     if apply_layout:
-        nodes_map = WorkflowDAGLayout.build_node_map(workflow)
-        if nodes_map:
-            order = WorkflowDAGLayout.topological_order(nodes_map, workflow.get("links", []))
-            WorkflowDAGLayout.assign_positions(nodes_map, order)
+        nodes_map = document.nodes_by_id
+        # Existing groups are obstacles only when they survive post-processing.
+        groups = None if auto_groups else workflow.get("groups")
+        order: list[int] = []
+        if nodes_map and previous_positions is not None:
+            WorkflowDAGLayout.relayout_incremental(nodes_map, document.links, previous_positions, dirty, groups=groups)
+            if auto_groups:
+                order = WorkflowDAGLayout.topological_order(nodes_map, document.links)
+        elif nodes_map:
+            order = WorkflowDAGLayout.layout(
+                nodes_map,
+                document.links,
+                use_cache=use_layout_cache,
+                groups=groups,
+                engine=layout_engine,
+            )
+        if nodes_map and auto_groups:
+            WorkflowDAGLayout.assign_groups_and_order(workflow, nodes_map, order)
+
+    workflow.setdefault("last_node_id", max((n.get("id", 0) for n in document.nodes), default=0))
+    workflow.setdefault("last_link_id", max((link[0] for link in document.links if isinstance(link, list)), default=0))
+
+    return document
+
+
+def post_process_workflow(
+    workflow_json: str,
+    apply_layout: bool = True,
+    synthesize_links: bool = True,
+    use_layout_cache: bool = True,
+    layout_engine: str = "layered",
+    previous_positions: dict[int, list[float]] | None = None,
+    dirty_nodes: Iterable[int] = (),
+    auto_groups: bool = True,
+) -> str:
+    """Post-process generated workflow JSON.
 
-    workflow.setdefault("last_node_id", max((n.get("id", 0) for n in workflow.get("nodes", [])), default=0))
-    workflow.setdefault("last_link_id", max((link[0] for link in workflow.get("links", []) if isinstance(link, list)), default=0))
+    String wrapper around :func:`post_process_document` for callers outside
+    the generation pipeline.
+
+    Args:
+        workflow_json: Raw workflow JSON string
+        apply_layout: Whether to apply DAG layout (positioning)
+        synthesize_links: Whether to auto-create missing links
+        use_layout_cache: Whether to reuse positions for structurally identical graphs
+        layout_engine: "layered" (default) or "force" for the NumPy force-directed refinement
+        previous_positions: node id -> pos from an earlier layout (incremental mode)
+        dirty_nodes: ids of changed nodes to re-place in incremental mode
+        auto_groups: Whether to rebuild cluster groups and node ``order`` after layout
+
+    Returns:
+        Processed workflow JSON string
+    """
+    try:
+        document = WorkflowDocument.from_json(workflow_json)
+    except (json.JSONDecodeError, ValueError):
+        return workflow_json
 
-    return json.dumps(workflow, ensure_ascii=False)
+    return post_process_document(
+        document,
+        apply_layout=apply_layout,
+        synthesize_links=synthesize_links,
+        use_layout_cache=use_layout_cache,
+        layout_engine=layout_engine,
+        previous_positions=previous_positions,
+        dirty_nodes=dirty_nodes,
+        auto_groups=auto_groups,
+    ).to_json()
@@ -0,0 +1,269 @@
+"""Batch workflow generation with a worker pool and a resumable checkpoint journal."""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from .base.lm_studio import LMStudioModelSettings, LMStudioServerSettings
+from .logger import get_logger
+from .workflow_validator import validate_workflow_json
+
+# Copilot: keep batch helpers importable without ComfyUI; the CLI lives in scripts/.
+
+logger = get_logger("xtremetools.batch")
+
+_REQUEST_FIELDS = ("description", "user_description")
+_FAILURE_STATUSES = ("Status: ERROR", "Status: TIMEOUT")
+
+
+@dataclass(slots=True)
+class BatchItem:
+    """One generation request read from the input JSONL."""
+
+    item_id: str
+    request: str
+    model: str | None = None
+    options: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class BatchOutcome:
+    """Journal record for a finished (or failed) batch item."""
+
+    item_id: str
+    status: str
+    output_path: str | None = None
+    elapsed_ms: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class BatchSummary:
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    invalid: int = 0
+    failed: int = 0
+    elapsed_s: float = 0.0
+
+    def render(self) -> str:
+        rate = (self.total - self.skipped) / self.elapsed_s if self.elapsed_s else 0.0
+        return (
+            f"Batch finished: {self.succeeded} ok, {self.invalid} invalid, {self.failed} failed, "
+            f"{self.skipped} skipped (checkpoint) of {self.total} in {self.elapsed_s:.1f}s ({rate:.2f} items/s)"
+        )
+
+
+def _structured_request(row: dict[str, Any]) -> str:
+    from .nodes.workflow_generator import XtremetoolsWorkflowRequest
+
+    # Missing fields fall back to the node's own widget defaults.
+    inputs = XtremetoolsWorkflowRequest.INPUT_TYPES()
+    defaults = {name: spec[1].get("default", "") for section in inputs.values() for name, spec in section.items()}
+    description = next((row[key] for key in _REQUEST_FIELDS if row.get(key)), "")
+    request, _ = XtremetoolsWorkflowRequest().build_request(
+        user_description=str(description),
+        workflow_type=str(row.get("workflow_type", defaults["workflow_type"])),
+        required_nodes=str(row.get("required_nodes", defaults["required_nodes"])),
+        output_format=str(row.get("output_format", defaults["output_format"])),
+        complexity=str(row.get("complexity", defaults["complexity"])),
+    )
+    return request
+
+
+def _generation_failure(info: str) -> str | None:
+    """Return the generator's error text when its info reports ERROR/TIMEOUT, else ``None``."""
+
+    lines = info.splitlines()
+    for index, line in enumerate(lines):
+        if line.strip().startswith(_FAILURE_STATUSES):
+            detail = [text.strip() for text in lines[index + 1 :] if text.strip()]
+            return "; ".join([line.strip(), *detail])
+    return None
+
+
+def load_batch_requests(path: Path) -> Iterator[BatchItem]:
+    """Yield batch items from JSONL.
+
+    Each line holds either a ready ``request`` string or the fields of
+    ``XtremetoolsWorkflowRequest`` (``description``, ``workflow_type``,
+    ``complexity``, ``required_nodes``, ``output_format``). ``id`` defaults
+    to the line number, ``model`` overrides the batch model, and ``options``
+    is passed through to ``generate_workflow``.
+    """
+
+    with Path(path).open("r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({exc})") from exc
+            if isinstance(row, str):
+                row = {"request": row}
+            if not isinstance(row, dict):
+                raise ValueError(f"{path}:{line_number}: expected an object or string")
+            request = row.get("request") or _structured_request(row)
+            yield BatchItem(
+                item_id=str(row.get("id", f"{line_number:05d}")),
+                request=request,
+                model=row.get("model"),
+                options=dict(row.get("options") or {}),
+            )
+
+
+class CheckpointJournal:
+    """Append-only JSONL journal of finished items inside the output directory.
+
+    Every outcome is flushed and fsynced as soon as the item finishes, so an
+    interrupted run loses at most the items still in flight. A truncated last
+    line (process killed mid-write) is ignored on load.
+    """
+
+    FILE_NAME = "checkpoint.jsonl"
+
+    def __init__(self, output_dir: Path) -> None:
+        self.path = Path(output_dir) / self.FILE_NAME
+        self._lock = threading.Lock()
+
+    def completed(self) -> dict[str, dict[str, Any]]:
+        """Return the latest journal record per item id whose status is ``ok``."""
+
+        records: dict[str, dict[str, Any]] = {}
+        if not self.path.exists():
+            return records
+        with self.path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping truncated checkpoint line in %s", self.path)
+                    continue
+                if isinstance(record, dict) and "item_id" in record:
+                    records[str(record["item_id"])] = record
+        return {item_id: record for item_id, record in records.items() if record.get("status") == "ok"}
+
+    def append(self, outcome: BatchOutcome) -> None:
+        line = json.dumps(asdict(outcome), ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp_path = path.with_suffix(f"{path.suffix}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _safe_name(item_id: str) -> str:
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in item_id) or "item"
+
+
+def run_batch(
+    items: Iterable[BatchItem],
+    output_dir: Path,
+    *,
+    workers: int = 4,
+    server_url: str | None = None,
+    model: str | None = None,
+    timeout: float | None = None,
+    generator_options: dict[str, Any] | None = None,
+    resume: bool = True,
+    on_outcome: Callable[[BatchOutcome], None] | None = None,
+) -> BatchSummary:
+    """Generate every item with ``XtremetoolsWorkflowGenerator`` on a thread pool.
+
+    Validated workflows are written to ``<output_dir>/<id>.json`` as soon as
+    they finish; invalid ones go to ``<id>.invalid.json`` for inspection. With
+    ``resume`` the checkpoint journal is consulted first and items already
+    recorded as ``ok`` are skipped.
+    """
+
+    from .nodes.workflow_generator import XtremetoolsWorkflowGenerator
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    journal = CheckpointJournal(output_dir)
+    done = journal.completed() if resume else {}
+    generator = XtremetoolsWorkflowGenerator()
+    server_settings = LMStudioServerSettings(server_url=server_url, timeout=timeout)
+    summary = BatchSummary()
+    start = time.perf_counter()
+
+    def work(item: BatchItem) -> BatchOutcome:
+        item_start = time.perf_counter()
+        options = {**(generator_options or {}), **item.options}
+        try:
+            workflow_json, info = generator.generate_workflow(
+                item.request,
+                server_settings=server_settings,
+                model_settings=LMStudioModelSettings(model=item.model or model),
+                **options,
+            )
+        except Exception as exc:  # noqa: BLE001 - one bad item must not stop the batch
+            logger.error("Batch item %s failed: %s", item.item_id, exc)
+            return BatchOutcome(item.item_id, "error", elapsed_ms=(time.perf_counter() - item_start) * 1000, errors=[str(exc)])
+        failure = _generation_failure(info)
+        if failure is not None:
+            # The generator returns "{}" on failure; validating that would only hide the real error.
+            logger.error("Batch item %s failed: %s", item.item_id, failure)
+            return BatchOutcome(item.item_id, "error", elapsed_ms=(time.perf_counter() - item_start) * 1000, errors=[failure])
+
+        validation = validate_workflow_json(workflow_json, auto_fix=True)
+        status = "ok" if validation.is_valid else "invalid"
+        suffix = ".json" if validation.is_valid else ".invalid.json"
+        output_path = output_dir / f"{_safe_name(item.item_id)}{suffix}"
+        _write_atomic(output_path, validation.workflow_json if validation.is_valid else workflow_json)
+        return BatchOutcome(
+            item.item_id,
+            status,
+            output_path=str(output_path),
+            elapsed_ms=(time.perf_counter() - item_start) * 1000,
+            errors=validation.errors,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="xtremetools-batch") as executor:
+        futures = []
+        for item in items:
+            summary.total += 1
+            if item.item_id in done:
+                summary.skipped += 1
+                continue
+            futures.append(executor.submit(work, item))
+
+        for future in as_completed(futures):
+            outcome = future.result()
+            journal.append(outcome)
+            if outcome.status == "ok":
+                summary.succeeded += 1
+            elif outcome.status == "invalid":
+                summary.invalid += 1
+            else:
+                summary.failed += 1
+            if on_outcome is not None:
+                on_outcome(outcome)
+
+    summary.elapsed_s = time.perf_counter() - start
+    logger.info(summary.render())
+    return summary
+
+
+__all__ = [
+    "BatchItem",
+    "BatchOutcome",
+    "BatchSummary",
+    "CheckpointJournal",
+    "load_batch_requests",
+    "run_batch",
+]
@@ -39,6 +39,12 @@ class EnvironmentConfig:
     lm_studio_model: str | None = None
     supported_models_path: Path = _REPO_ROOT / "Xtremetools" / "config" / "supported_models.json"
     workflow_schema_path: Path = _REPO_ROOT / "Xtremetools" / "workflow_schema.json"
+    cache_dir: Path = _REPO_ROOT / ".xtremetools_cache"
+    export_dir: Path = _REPO_ROOT / "exports"
+    workflow_cache_max_entries: int = 256
+    layout_cache_max_entries: int = 512
+    layout_cache_disk: bool = False
+    validation_cache_max_entries: int = 256
 
     @property
     def as_dict(self) -> dict[str, Any]:
@@ -48,6 +54,12 @@ class EnvironmentConfig:
             "lm_studio_model": self.lm_studio_model,
             "supported_models_path": str(self.supported_models_path),
             "workflow_schema_path": str(self.workflow_schema_path),
+            "cache_dir": str(self.cache_dir),
+            "export_dir": str(self.export_dir),
+            "workflow_cache_max_entries": self.workflow_cache_max_entries,
+            "layout_cache_max_entries": self.layout_cache_max_entries,
+            "layout_cache_disk": self.layout_cache_disk,
+            "validation_cache_max_entries": self.validation_cache_max_entries,
         }
 
 
@@ -59,9 +71,26 @@ def get_environment_config(env_path: Path | None = None) -> EnvironmentConfig:
 
     supported_override = os.getenv("XTREMETOOLS_SUPPORTED_MODELS")
     schema_override = os.getenv("XTREMETOOLS_WORKFLOW_SCHEMA")
+    cache_override = os.getenv("XTREMETOOLS_CACHE_DIR")
+    export_override = os.getenv("XTREMETOOLS_EXPORT_DIR")
 
     supported_models_path = Path(supported_override) if supported_override else _REPO_ROOT / "Xtremetools" / "config" / "supported_models.json"
     workflow_schema_path = Path(schema_override) if schema_override else _REPO_ROOT / "Xtremetools" / "workflow_schema.json"
+    cache_dir = Path(cache_override) if cache_override else _REPO_ROOT / ".xtremetools_cache"
+    export_dir = Path(export_override) if export_override else _REPO_ROOT / "exports"
+    try:
+        cache_max_entries = int(os.getenv("XTREMETOOLS_CACHE_MAX_ENTRIES", "256"))
+    except ValueError:
+        cache_max_entries = 256
+    try:
+        layout_cache_max_entries = int(os.getenv("XTREMETOOLS_LAYOUT_CACHE_MAX_ENTRIES", "512"))
+    except ValueError:
+        layout_cache_max_entries = 512
+    try:
+        validation_cache_max_entries = int(os.getenv("XTREMETOOLS_VALIDATION_CACHE_MAX_ENTRIES", "256"))
+    except ValueError:
+        validation_cache_max_entries = 256
+    layout_cache_disk = os.getenv("XTREMETOOLS_LAYOUT_CACHE_DISK", "").strip().lower() in {"1", "true", "yes", "on"}
 
     return EnvironmentConfig(
         comfyui_server_url=os.getenv("COMFYUI_SERVER_URL", "http://localhost:8188"),
@@ -69,6 +98,12 @@ def get_environment_config(env_path: Path | None = None) -> EnvironmentConfig:
         lm_studio_model=os.getenv("LM_STUDIO_MODEL"),
         supported_models_path=supported_models_path,
         workflow_schema_path=workflow_schema_path,
+        cache_dir=cache_dir,
+        export_dir=export_dir,
+        workflow_cache_max_entries=max(cache_max_entries, 1),
+        layout_cache_max_entries=max(layout_cache_max_entries, 1),
+        layout_cache_disk=layout_cache_disk,
+        validation_cache_max_entries=max(validation_cache_max_entries, 0),
     )
 
 
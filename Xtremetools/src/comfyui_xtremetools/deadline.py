@@ -0,0 +1,79 @@
+"""End-to-end time budgets shared by generation retries and pipeline stages."""
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+# Copilot: deadlines are monotonic; never compare them against wall-clock timestamps.
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a step is started (or would wait) after the deadline passed."""
+
+
+class Deadline:
+    """A fixed point in time that every step of one node execution shares.
+
+    ``Deadline(None)`` (or ``Deadline.unbounded()``) never expires, so callers
+    can thread a deadline unconditionally. HTTP calls pass their per-request
+    timeout through :meth:`clamp_timeout` so no single call outlives the budget.
+    """
+
+    __slots__ = ("budget", "expires_at", "_clock")
+
+    def __init__(self, seconds: float | None, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.budget = seconds if seconds and seconds > 0 else None
+        self.expires_at = clock() + self.budget if self.budget is not None else None
+
+    @classmethod
+    def unbounded(cls) -> Deadline:
+        return cls(None)
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires_at is not None
+
+    def remaining(self) -> float | None:
+        """Seconds left (never negative), or ``None`` for an unbounded deadline."""
+
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock())
+
+    def elapsed(self) -> float:
+        if self.expires_at is None or self.budget is None:
+            return 0.0
+        return self.budget - (self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0.0
+
+    def check(self, stage: str) -> None:
+        """Raise :class:`DeadlineExceeded` if no budget is left for ``stage``."""
+
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline of {self.budget:.1f} s exceeded before {stage}")
+
+    def clamp_timeout(self, timeout: float | None, stage: str = "request") -> float | None:
+        """Return ``timeout`` capped to the remaining budget.
+
+        Raises :class:`DeadlineExceeded` when the budget is already spent, so a
+        request is never sent with a zero or negative timeout.
+        """
+
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        self.check(stage)
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def __repr__(self) -> str:
+        if self.expires_at is None:
+            return "Deadline(unbounded)"
+        return f"Deadline(budget={self.budget:.1f}s, remaining={self.remaining():.1f}s)"
+
+
+__all__ = ["Deadline", "DeadlineExceeded"]
@@ -2,6 +2,9 @@
 from __future__ import annotations
 
 import json
+import os
+import re
+import threading
 from functools import lru_cache
 from pathlib import Path
 from typing import Any
@@ -11,12 +14,21 @@ from pydantic import BaseModel
 from .config import get_environment_config
 from .logger import get_logger
 from .node_discovery import get_type_registry
+from .workflow_document import WorkflowDocument
 
 # Copilot: ensure new functions keep type hints and docstrings.
 
 logger = get_logger("xtremetools.generator")
 
 _STRUCTURED_MODE_ACTIVE: dict[str, bool] = {"active": False}
+_REPAIR_LINK_PATTERN = re.compile(r"\blink(?: id)? (-?\d+)", re.IGNORECASE)
+_REPAIR_NODE_PATTERN = re.compile(r"\bnode (-?\d+)", re.IGNORECASE)
+_CASCADE_STATS: dict[str, dict[str, float]] = {}
+_CASCADE_STATE: dict[str, bool] = {"loaded": False}
+_CASCADE_LOCK = threading.Lock()
+_CASCADE_STATS_FILE = "cascade_stats.json"
+_JSON_SCHEMA_CAPABILITY: dict[str, bool] = {}
+_SCHEMA_METADATA_KEYS = {"$schema", "$id", "title", "description"}
 
 
 class GenerationTelemetry(BaseModel):
@@ -30,7 +42,7 @@ class GenerationTelemetry(BaseModel):
     warnings: list[str] = []
 
 
-def _read_supported_models_file(path: Path) -> set[str]:
+def _read_supported_models_file(path: Path, key: str = "structured_json_capable") -> set[str]:
     if not path.exists():
         logger.warning("supported_models.json missing at %s", path)
         return set()
@@ -39,7 +51,7 @@ def _read_supported_models_file(path: Path) -> set[str]:
     except json.JSONDecodeError as exc:  # pragma: no cover - invalid user file
         logger.error("Invalid supported_models.json: %s", exc)
         return set()
-    models = payload.get("structured_json_capable", [])
+    models = payload.get(key, [])
     return {str(model).strip() for model in models if model}
 
 
@@ -49,6 +61,12 @@ def _supported_models() -> set[str]:
     return _read_supported_models_file(config.supported_models_path)
 
 
+@lru_cache(maxsize=1)
+def _json_schema_models() -> set[str]:
+    config = get_environment_config()
+    return _read_supported_models_file(config.supported_models_path, key="json_schema_capable")
+
+
 def model_supports_structured_json(model_name: str | None) -> bool:
     if not model_name:
         return False
@@ -67,6 +85,85 @@ def get_structured_mode_flag() -> bool:
     return _STRUCTURED_MODE_ACTIVE["active"]
 
 
+def json_schema_capability(model_name: str | None) -> bool | None:
+    """Return whether ``model_name`` accepts ``json_schema`` response formats.
+
+    ``True``/``False`` come from ``supported_models.json`` (``json_schema_capable``)
+    or from an earlier request against the live server; ``None`` means unknown.
+    """
+
+    if not model_name:
+        return None
+    if model_name in _JSON_SCHEMA_CAPABILITY:
+        return _JSON_SCHEMA_CAPABILITY[model_name]
+    if model_name in _json_schema_models():
+        return True
+    return None
+
+
+def mark_json_schema_capability(model_name: str | None, supported: bool) -> None:
+    """Cache the outcome of a ``json_schema`` request for ``model_name``."""
+
+    if not model_name:
+        return
+    if _JSON_SCHEMA_CAPABILITY.get(model_name) != supported:
+        logger.info("Model %s %s json_schema response formats", model_name, "accepts" if supported else "rejects")
+    _JSON_SCHEMA_CAPABILITY[model_name] = supported
+
+
+def _strip_schema_metadata(node: Any, *, property_map: bool = False) -> Any:
+    if isinstance(node, dict):
+        if property_map:
+            # Keys of a "properties" mapping are field names, never annotations.
+            return {key: _strip_schema_metadata(value) for key, value in node.items()}
+        return {
+            key: _strip_schema_metadata(value, property_map=key == "properties")
+            for key, value in node.items()
+            if key not in _SCHEMA_METADATA_KEYS
+        }
+    if isinstance(node, list):
+        return [_strip_schema_metadata(item) for item in node]
+    return node
+
+
+@lru_cache(maxsize=1)
+def _generation_schema_text() -> str:
+    config = get_environment_config()
+    try:
+        schema = json.loads(Path(config.workflow_schema_path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError) as exc:
+        logger.warning("Workflow schema unavailable for json_schema mode: %s", exc)
+        schema = {"type": "object", "required": ["nodes", "links"]}
+
+    slim = _strip_schema_metadata(schema)
+    links = slim.get("properties", {}).get("links", {})
+    link_items = links.get("items") if isinstance(links, dict) else None
+    if isinstance(link_items, dict) and isinstance(link_items.get("items"), list):
+        # Tuple-style "items" arrays are not understood by most grammar backends;
+        # keep the fixed length and allow the integer/string mix per position.
+        link_items["items"] = {"type": ["integer", "string"]}
+    return json.dumps(slim, separators=(",", ":"))
+
+
+def build_workflow_generation_schema() -> dict[str, Any]:
+    """Return a slimmed copy of ``workflow_schema.json`` for constrained decoding."""
+
+    return json.loads(_generation_schema_text())
+
+
+def build_json_schema_response_format(schema: dict[str, Any] | None = None, name: str = "comfyui_workflow") -> dict[str, Any]:
+    """Build an OpenAI-style ``json_schema`` response_format payload."""
+
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": schema if schema is not None else build_workflow_generation_schema(),
+        },
+    }
+
+
 def extract_first_json_block(text: str) -> tuple[str, str]:
     """Return the first plausible JSON block + extraction strategy."""
 
@@ -93,19 +190,65 @@ def extract_first_json_block(text: str) -> tuple[str, str]:
     return "{}", "fallback"
 
 
-def clamp_links_to_registry(workflow_json: str) -> str:
-    """Clean up links so they only connect compatible socket types."""
+def extract_json_patch(text: str) -> list[dict[str, Any]] | None:
+    """Return the JSON Patch operations contained in a repair reply, if any."""
+
+    clean = text.strip()
+    if "```" in clean:
+        fenced, method = extract_first_json_block(clean)
+        if method == "fence":
+            clean = fenced
+    first = clean.find("[")
+    last = clean.rfind("]")
+    candidates = [clean]
+    if first != -1 and last > first:
+        candidates.append(clean[first:last + 1])
+
+    for candidate in candidates:
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(parsed, dict):
+            parsed = parsed.get("patch")
+        if isinstance(parsed, list) and all(isinstance(op, dict) for op in parsed):
+            return parsed
+    return None
 
-    registry = get_type_registry()
-    try:
-        workflow = json.loads(workflow_json)
-    except json.JSONDecodeError:
-        return workflow_json
 
-    nodes = {node["id"]: node for node in workflow.get("nodes", []) if isinstance(node, dict) and isinstance(node.get("id"), int)}
+def build_repair_fragment(workflow: dict[str, Any], errors: list[str]) -> dict[str, Any]:
+    """Map JSON Pointers to the workflow elements named in validator errors.
+
+    The repair prompt only carries these fragments, not the whole workflow, so
+    the model can answer with a short JSON Patch against the original paths.
+    """
+
+    link_ids = {int(match) for error in errors for match in _REPAIR_LINK_PATTERN.findall(error)}
+    node_ids = {int(match) for error in errors for match in _REPAIR_NODE_PATTERN.findall(error)}
+
+    fragment: dict[str, Any] = {}
+    for index, link in enumerate(workflow.get("links", []) or []):
+        if isinstance(link, list) and link and link[0] in link_ids:
+            fragment[f"/links/{index}"] = link
+            node_ids.update(value for value in (link[1:2] + link[3:4]) if isinstance(value, int))
+    for index, node in enumerate(workflow.get("nodes", []) or []):
+        if isinstance(node, dict) and node.get("id") in node_ids:
+            fragment[f"/nodes/{index}"] = {key: node.get(key) for key in ("id", "type", "inputs", "outputs") if key in node}
+
+    fragment["/last_node_id"] = workflow.get("last_node_id")
+    fragment["/last_link_id"] = workflow.get("last_link_id")
+    return fragment
+
+
+def clamp_workflow_links(workflow: dict[str, Any] | WorkflowDocument) -> int:
+    """Drop links between incompatible sockets in place; return how many were pruned."""
+
+    document = WorkflowDocument.coerce(workflow)
+    registry = get_type_registry()
+    nodes = document.nodes_by_id
     links = []
     bad_links = 0
-    for link in workflow.get("links", []):
+    for link in document.links:
         if not (isinstance(link, list) and len(link) >= 6):
             continue
         link_id, source_id, source_out_idx, target_id, target_input_idx, declared_type = link
@@ -128,15 +271,135 @@ def clamp_links_to_registry(workflow_json: str) -> str:
 
     if bad_links:
         logger.warning("Pruned %s incompatible links", bad_links)
-    workflow["links"] = links
-    workflow["last_link_id"] = max((link[0] for link in links), default=0)
-    return json.dumps(workflow, ensure_ascii=False)
+        # Drop socket references to pruned links so inputs/outputs still agree with ``links``.
+        kept = {link[0] for link in links}
+        for node in nodes.values():
+            for socket in node.get("inputs", []) or []:
+                if socket.get("link") is not None and socket["link"] not in kept:
+                    socket["link"] = None
+            for socket in node.get("outputs", []) or []:
+                if socket.get("links"):
+                    socket["links"] = [link_id for link_id in socket["links"] if link_id in kept]
+    document.data["links"] = links
+    document.data["last_link_id"] = max((link[0] for link in links), default=0)
+    document.invalidate()
+    return bad_links
+
+
+def clamp_links_to_registry(workflow_json: str) -> str:
+    """Clean up links so they only connect compatible socket types."""
+
+    try:
+        document = WorkflowDocument.from_json(workflow_json)
+    except (json.JSONDecodeError, ValueError):
+        return workflow_json
+
+    clamp_workflow_links(document)
+    return document.to_json()
+
+
+def resolve_model_cascade(model_settings: Any, default_model: str | None = None) -> list[str | None]:
+    """Return the ordered model tiers to try, cheapest first.
+
+    ``cascade_models`` on :class:`LMStudioModelSettings` lists the tiers; the
+    preferred ``model`` is appended as the final escalation step when it is
+    not already part of the cascade.
+    """
+
+    tiers: list[str | None] = [name for name in getattr(model_settings, "cascade_models", ()) or () if name]
+    preferred = getattr(model_settings, "model", None) or default_model
+    if not tiers or (preferred and preferred not in tiers):
+        tiers.append(preferred)
+    return tiers
+
+
+def _cascade_stats_path() -> Path:
+    return get_environment_config().cache_dir / _CASCADE_STATS_FILE
+
+
+def _load_cascade_stats() -> None:
+    """Read persisted tier stats once per process. Caller holds ``_CASCADE_LOCK``."""
+
+    if _CASCADE_STATE["loaded"]:
+        return
+    _CASCADE_STATE["loaded"] = True
+    path = _cascade_stats_path()
+    if not path.exists():
+        return
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        for name, stats in raw.get("models", {}).items():
+            _CASCADE_STATS[str(name)] = {
+                "attempts": int(stats["attempts"]),
+                "successes": int(stats["successes"]),
+                "total_latency_ms": float(stats["total_latency_ms"]),
+            }
+    except (OSError, json.JSONDecodeError, AttributeError, KeyError, TypeError, ValueError) as exc:
+        logger.warning("Ignoring unreadable cascade stats at %s: %s", path, exc)
+
+
+def _persist_cascade_stats() -> None:
+    """Atomically rewrite the stats file. Caller holds ``_CASCADE_LOCK``."""
+
+    path = _cascade_stats_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps({"version": 1, "models": _CASCADE_STATS}), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        logger.warning("Could not persist cascade stats to %s: %s", path, exc)
+
+
+def record_cascade_outcome(model_name: str | None, success: bool, latency_ms: float) -> None:
+    """Accumulate per-tier success + latency so the cascade order can be tuned.
+
+    Totals are kept in ``XTREMETOOLS_CACHE_DIR/cascade_stats.json`` next to the
+    workflow cache, so the history survives restarts. Processes sharing the
+    directory overwrite each other's file (last writer wins).
+    """
+
+    key = model_name or "default"
+    with _CASCADE_LOCK:
+        _load_cascade_stats()
+        stats = _CASCADE_STATS.setdefault(key, {"attempts": 0, "successes": 0, "total_latency_ms": 0.0})
+        stats["attempts"] += 1
+        stats["successes"] += int(success)
+        stats["total_latency_ms"] += latency_ms
+        _persist_cascade_stats()
+
+
+def get_cascade_stats() -> dict[str, dict[str, float]]:
+    """Return per-model attempts, success rate and mean latency, including earlier runs."""
+
+    with _CASCADE_LOCK:
+        _load_cascade_stats()
+        snapshot = {name: dict(stats) for name, stats in _CASCADE_STATS.items()}
+    return {
+        name: {
+            "attempts": stats["attempts"],
+            "successes": stats["successes"],
+            "success_rate": stats["successes"] / stats["attempts"] if stats["attempts"] else 0.0,
+            "avg_latency_ms": stats["total_latency_ms"] / stats["attempts"] if stats["attempts"] else 0.0,
+        }
+        for name, stats in snapshot.items()
+    }
 
 
 __all__ = [
     "GenerationTelemetry",
     "model_supports_structured_json",
     "get_structured_mode_flag",
+    "json_schema_capability",
+    "mark_json_schema_capability",
+    "build_workflow_generation_schema",
+    "build_json_schema_response_format",
     "extract_first_json_block",
+    "extract_json_patch",
+    "build_repair_fragment",
+    "clamp_workflow_links",
     "clamp_links_to_registry",
+    "resolve_model_cascade",
+    "record_cascade_outcome",
+    "get_cascade_stats",
 ]
@@ -0,0 +1,141 @@
+"""Minimal RFC 6902 JSON Patch support for targeted workflow repairs."""
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+from .logger import get_logger
+
+# Copilot: keep patch helpers dependency-free and fully annotated.
+
+logger = get_logger("xtremetools.json_patch")
+
+
+class JSONPatchError(ValueError):
+    """Raised when a patch operation cannot be applied to the document."""
+
+
+def _parse_pointer(pointer: str) -> list[str]:
+    """Split an RFC 6901 JSON Pointer into unescaped reference tokens."""
+
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JSONPatchError(f"Invalid JSON Pointer {pointer!r}: must start with '/'")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _list_index(container: list[Any], token: str, *, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JSONPatchError(f"Invalid array index {token!r}")
+    index = int(token)
+    upper = len(container) if allow_end else len(container) - 1
+    if index > upper:
+        raise JSONPatchError(f"Array index {index} out of range")
+    return index
+
+
+def _resolve_parent(document: Any, pointer: str) -> tuple[Any, str]:
+    tokens = _parse_pointer(pointer)
+    if not tokens:
+        raise JSONPatchError("Operations on the document root are not supported")
+    parent = document
+    for token in tokens[:-1]:
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise JSONPatchError(f"Path {pointer!r} does not exist")
+            parent = parent[token]
+        elif isinstance(parent, list):
+            parent = parent[_list_index(parent, token, allow_end=False)]
+        else:
+            raise JSONPatchError(f"Path {pointer!r} traverses a scalar value")
+    return parent, tokens[-1]
+
+
+def _get(document: Any, pointer: str) -> Any:
+    if pointer == "":
+        return document
+    parent, token = _resolve_parent(document, pointer)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JSONPatchError(f"Path {pointer!r} does not exist")
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_list_index(parent, token, allow_end=False)]
+    raise JSONPatchError(f"Path {pointer!r} traverses a scalar value")
+
+
+def _add(document: Any, pointer: str, value: Any) -> None:
+    parent, token = _resolve_parent(document, pointer)
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, token, allow_end=True), value)
+    else:
+        raise JSONPatchError(f"Cannot add below scalar at {pointer!r}")
+
+
+def _remove(document: Any, pointer: str) -> Any:
+    parent, token = _resolve_parent(document, pointer)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JSONPatchError(f"Path {pointer!r} does not exist")
+        return parent.pop(token)
+    if isinstance(parent, list):
+        return parent.pop(_list_index(parent, token, allow_end=False))
+    raise JSONPatchError(f"Cannot remove below scalar at {pointer!r}")
+
+
+def apply_json_patch(document: Any, operations: list[dict[str, Any]], in_place: bool = False) -> Any:
+    """Apply JSON Patch operations and return the patched document.
+
+    Supports ``add``, ``remove``, ``replace``, ``move``, ``copy`` and ``test``.
+    The input is deep-copied unless ``in_place`` is set, so a failing patch
+    never leaves a half-applied document behind.
+    """
+
+    if not isinstance(operations, list):
+        raise JSONPatchError("JSON Patch must be a list of operations")
+
+    target = document if in_place else copy.deepcopy(document)
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise JSONPatchError(f"Operation {index} is missing 'op' or 'path'")
+        op = operation["op"]
+        path = operation["path"]
+        # Patches come from model output: reject wrongly typed fields here, not with a TypeError later.
+        if not isinstance(op, str):
+            raise JSONPatchError(f"Operation {index} 'op' must be a string")
+        if not isinstance(path, str):
+            raise JSONPatchError(f"Operation {index} ({op}) 'path' must be a string")
+        if op in {"add", "replace", "test"} and "value" not in operation:
+            raise JSONPatchError(f"Operation {index} ({op}) is missing 'value'")
+
+        if op == "add":
+            _add(target, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(target, path)
+        elif op == "replace":
+            _remove(target, path)
+            _add(target, path, copy.deepcopy(operation["value"]))
+        elif op in {"move", "copy"}:
+            source = operation.get("from")
+            if source is None:
+                raise JSONPatchError(f"Operation {index} ({op}) is missing 'from'")
+            if not isinstance(source, str):
+                raise JSONPatchError(f"Operation {index} ({op}) 'from' must be a string")
+            value = _remove(target, source) if op == "move" else copy.deepcopy(_get(target, source))
+            _add(target, path, value)
+        elif op == "test":
+            if _get(target, path) != operation["value"]:
+                raise JSONPatchError(f"Test failed at {path!r}")
+        else:
+            raise JSONPatchError(f"Unsupported operation {op!r}")
+
+    logger.debug("Applied %s JSON Patch operations", len(operations))
+    return target
+
+
+__all__ = ["JSONPatchError", "apply_json_patch"]
@@ -0,0 +1,325 @@
+"""Incremental JSON scanning for streamed LM Studio completions and large workflow files."""
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import IO, Any, Iterable, Iterator, Literal
+
+from .logger import get_logger
+
+# Copilot: keep the scanner allocation-free per character; it runs on every token.
+
+logger = get_logger("xtremetools.json_stream")
+
+ScanStatus = Literal["pending", "complete", "error"]
+
+_CLOSERS = {"}": "{", "]": "["}
+
+# Jump straight to the characters that matter instead of stepping through every byte.
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[,}\]\s]")
+_NON_SPACE = re.compile(r"\S")
+_DECODER = json.JSONDecoder()
+
+
+class IncrementalJSONScanner:
+    """Track the structure of a JSON object as it streams in, chunk by chunk.
+
+    The scanner only follows strings, escapes and bracket nesting; it does not
+    build values. That is enough to tell, token by token, when the top-level
+    object has closed (``complete``: stop the request, trailing prose is never
+    generated) or when the output can no longer become a workflow object
+    (``error``: abort so the retry starts immediately).
+
+    Leading whitespace and a single markdown fence (```json) are tolerated;
+    up to ``max_preamble`` other characters are skipped before the opening
+    brace, anything beyond that is reported as prose before JSON.
+    """
+
+    def __init__(self, max_preamble: int = 0) -> None:
+        self.max_preamble = max_preamble
+        self.status: ScanStatus = "pending"
+        self.error: str | None = None
+        self._chunks: list[str] = []
+        self._offset = 0
+        self._start: int | None = None
+        self._end: int | None = None
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._preamble = 0
+        self._fence_ticks = 0
+        self._in_fence_header = False
+        self._fence_used = False
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._chunks)
+
+    @property
+    def json_text(self) -> str | None:
+        """The complete top-level object once ``status == 'complete'``."""
+        if self._start is None or self._end is None:
+            return None
+        return self.text[self._start:self._end]
+
+    def _fail(self, reason: str) -> ScanStatus:
+        self.status = "error"
+        self.error = reason
+        logger.debug("Streaming JSON scan aborted: %s", reason)
+        return self.status
+
+    def feed(self, chunk: str) -> ScanStatus:
+        """Consume the next streamed chunk and return the scan status."""
+
+        if self.status != "pending" or not chunk:
+            return self.status
+
+        base = self._offset
+        self._chunks.append(chunk)
+        self._offset += len(chunk)
+
+        for index, char in enumerate(chunk):
+            if self._start is None:
+                if self._in_fence_header:
+                    if char == "\n":
+                        self._in_fence_header = False
+                    continue
+                if char == "`" and not self._fence_used:
+                    self._fence_ticks += 1
+                    if self._fence_ticks == 3:
+                        self._fence_used = True
+                        self._in_fence_header = True
+                    continue
+                if char.isspace():
+                    continue
+                if char == "{":
+                    self._start = base + index
+                    self._stack.append("{")
+                    continue
+                self._preamble += 1
+                if self._preamble > self.max_preamble:
+                    return self._fail(f"prose before JSON (unexpected {char!r})")
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                elif char == "\n":
+                    return self._fail("unterminated string")
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._stack.append(char)
+            elif char in _CLOSERS:
+                if not self._stack or self._stack[-1] != _CLOSERS[char]:
+                    return self._fail(f"unbalanced {char!r} at offset {base + index}")
+                self._stack.pop()
+                if not self._stack:
+                    self._end = base + index + 1
+                    self.status = "complete"
+                    return self.status
+
+        return self.status
+
+
+class StreamParseError(ValueError):
+    """Malformed JSON found while reading a stream; ``offset`` counts characters from the start."""
+
+    def __init__(self, message: str, offset: int) -> None:
+        super().__init__(f"{message} at offset {offset}")
+        self.offset = offset
+
+
+class JSONMemberReader:
+    """Pull the top-level members of a JSON object from a file, one value at a time.
+
+    Members named in ``stream_keys`` whose value is an array are not built as
+    a whole: an empty list placeholder is yielded first, then one event per
+    element. Only the text of the value being decoded (plus one read chunk)
+    is held in memory, so a 50 MB workflow is read with a working set the
+    size of its largest node. ``source`` may be opened in binary or text mode.
+    """
+
+    def __init__(self, source: IO[Any], stream_keys: Iterable[str] = (), chunk_size: int = 1 << 16) -> None:
+        self.stream_keys = frozenset(stream_keys)
+        self.chunk_size = max(1, chunk_size)
+        self.bytes_read = 0
+        self._source = source
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._base = 0  # offset of _buffer[0] in the whole stream
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; False once the source is exhausted."""
+
+        if self._eof:
+            return False
+        chunk = self._source.read(self.chunk_size)
+        if isinstance(chunk, bytes):
+            self.bytes_read += len(chunk)
+            text = self._decoder.decode(chunk, final=not chunk)
+        else:
+            self.bytes_read += len(chunk)
+            text = chunk
+        if not chunk:
+            self._eof = True
+        self._buffer += text
+        return bool(text) or not self._eof
+
+    def _compact(self) -> None:
+        if self._pos >= self.chunk_size:
+            self._base += self._pos
+            self._buffer = self._buffer[self._pos :]
+            self._pos = 0
+
+    def _error(self, message: str, position: int | None = None) -> StreamParseError:
+        return StreamParseError(message, self._base + (self._pos if position is None else position))
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of input) without consuming it."""
+
+        while True:
+            match = _NON_SPACE.search(self._buffer, self._pos)
+            if match is not None:
+                self._pos = match.start()
+                return match.group()
+            self._pos = len(self._buffer)
+            self._compact()
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise self._error(f"expected {char!r}, found {found or 'end of input'!r}")
+        self._pos += 1
+
+    def _scan_string(self, pos: int) -> int:
+        """Return the index just past the closing quote of the string whose body starts at ``pos``."""
+
+        while True:
+            match = _STRING_SPECIAL.search(self._buffer, pos)
+            if match is None or (match.group() == "\\" and match.end() >= len(self._buffer)):
+                pos = len(self._buffer) if match is None else match.start()
+                if not self._fill():
+                    raise self._error("unterminated string")
+                continue
+            if match.group() == '"':
+                return match.end()
+            pos = match.end() + 1
+
+    def _scan_container(self, pos: int) -> int:
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self._buffer, pos)
+            if match is None:
+                pos = len(self._buffer)
+                if not self._fill():
+                    raise self._error("unterminated array or object")
+                continue
+            char = match.group()
+            if char == '"':
+                pos = self._scan_string(match.end())
+                continue
+            depth += 1 if char in "{[" else -1
+            pos = match.end()
+            if depth == 0:
+                return pos
+
+    def _scan_scalar(self, pos: int) -> int:
+        while True:
+            match = _SCALAR_END.search(self._buffer, pos)
+            if match is not None:
+                return match.start()
+            pos = len(self._buffer)
+            if not self._fill():
+                return pos
+
+    def _read_value(self) -> Any:
+        char = self._peek()
+        if not char:
+            raise self._error("unexpected end of input")
+        start = self._pos
+        # Fast path: the whole value is usually already buffered, so let the C decoder find its end.
+        try:
+            value, end = _DECODER.raw_decode(self._buffer, start)
+        except json.JSONDecodeError:
+            pass
+        else:
+            # Strings and containers end on their closer; a scalar only counts once a delimiter follows it.
+            if char in '{["' or _SCALAR_END.match(self._buffer, end):
+                self._pos = end
+                return value
+        if char in "{[":
+            end = self._scan_container(start)
+        elif char == '"':
+            end = self._scan_string(start + 1)
+        else:
+            end = self._scan_scalar(start)
+        self._pos = end
+        try:
+            return json.loads(self._buffer[start:end])
+        except json.JSONDecodeError as exc:
+            raise self._error(exc.msg, start + exc.pos) from None
+
+    def _next_separator(self, closer: str) -> bool:
+        """Consume ``,`` (True: another value follows) or ``closer`` (False)."""
+
+        char = self._peek()
+        if char not in (",", closer):
+            raise self._error(f"expected ',' or {closer!r}, found {char or 'end of input'!r}")
+        self._pos += 1
+        return char == ","
+
+    def events(self) -> Iterator[tuple[str, int | None, Any]]:
+        """Yield ``(key, None, value)`` per member and ``(key, index, item)`` per streamed array element.
+
+        Raises:
+            StreamParseError: the input is not a well-formed JSON object.
+        """
+
+        if self._peek() != "{":
+            raise self._error("workflow must be a JSON object")
+        self._pos += 1
+        more = self._peek() != "}"
+        if not more:
+            self._pos += 1
+        while more:
+            if self._peek() != '"':
+                raise self._error("expected a property name")
+            key = self._read_value()
+            self._expect(":")
+            if key in self.stream_keys and self._peek() == "[":
+                self._pos += 1
+                yield key, None, []
+                index = 0
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield key, index, self._read_value()
+                        index += 1
+                        self._compact()
+                        if not self._next_separator("]"):
+                            break
+            else:
+                yield key, None, self._read_value()
+            self._compact()
+            more = self._next_separator("}")
+        if self._peek():
+            raise self._error("extra data after the workflow object")
+
+
+__all__ = ["IncrementalJSONScanner", "JSONMemberReader", "ScanStatus", "StreamParseError"]
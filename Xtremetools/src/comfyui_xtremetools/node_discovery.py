@@ -79,6 +79,23 @@ def get_type_registry() -> TypeRegistry:
     return _STATE.registry
 
 
+def current_type_registry() -> TypeRegistry:
+    """Return the registry as currently loaded, never fetching ``/object_info``.
+
+    For hot paths such as validation: an empty registry (ComfyUI offline or
+    not fetched yet) is returned as-is instead of blocking on a refresh.
+    """
+
+    return _STATE.registry
+
+
+def install_type_registry(registry: TypeRegistry, fetched_at: float | None = None) -> None:
+    """Use a registry built elsewhere (e.g. by a parent process) instead of fetching one."""
+
+    _STATE.registry = registry
+    _STATE.last_fetch_ts = fetched_at or time.time()
+
+
 def get_last_fetch_timestamp() -> float | None:
     return _STATE.last_fetch_ts
 
@@ -100,6 +117,8 @@ __all__ = [
     "fetch_object_info",
     "refresh_type_registry",
     "get_type_registry",
+    "current_type_registry",
+    "install_type_registry",
     "get_last_fetch_timestamp",
     "refresh_types_command",
 ]
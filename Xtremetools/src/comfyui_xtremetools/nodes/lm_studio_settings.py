@@ -1,6 +1,7 @@
 """Composable nodes that emit LM Studio configuration objects."""
 from __future__ import annotations
 
+import json
 from typing import Any
 
 from comfyui_xtremetools.base.lm_studio import (
@@ -9,6 +10,7 @@ from comfyui_xtremetools.base.lm_studio import (
     LMStudioModelSettings,
     LMStudioServerSettings,
 )
+from comfyui_xtremetools.generator import build_json_schema_response_format
 
 
 class _LMStudioSettingsBase(LMStudioBaseNode):
@@ -57,20 +59,41 @@ class XtremetoolsLMStudioModelSettings(_LMStudioSettingsBase):
                 "model": ("STRING", {"default": ""}),
                 "fallback_to_default": ("BOOLEAN", {"default": True}),
             },
-            "optional": {},
+            "optional": {
+                "cascade_models": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "multiline": True,
+                        "placeholder": "Optional: models to try cheapest-first (comma or newline separated)",
+                    },
+                ),
+            },
         }
 
     def build_model_settings(
         self,
         model: str,
         fallback_to_default: bool = True,
+        cascade_models: str = "",
     ) -> tuple[LMStudioModelSettings, str]:
         normalized = model.strip()
-        settings = LMStudioModelSettings(model=normalized or None, fallback_to_default=fallback_to_default)
+        cascade: list[str] = []
+        for raw in cascade_models.replace("\n", ",").split(","):
+            name = raw.strip()
+            if name and name not in cascade:
+                cascade.append(name)
+        settings = LMStudioModelSettings(
+            model=normalized or None,
+            fallback_to_default=fallback_to_default,
+            cascade_models=tuple(cascade),
+        )
 
         info = self.build_info("Model Settings", emoji="MDL")
         info.add(f"Preferred model: {normalized or 'default'}")
         info.add(f"Fallback allowed: {fallback_to_default}")
+        if cascade:
+            info.add(f"Cascade: {' -> '.join(cascade)}")
         return self.ensure_tuple(settings, info.render())
 
 
@@ -89,10 +112,19 @@ class XtremetoolsLMStudioGenerationSettings(_LMStudioSettingsBase):
                 "max_tokens": ("INT", {"default": 256, "min": 16, "max": 8192}),
                 "response_format": (
                     "STRING",
-                    {"default": "text", "choices": ["text", "json_object"]},
+                    {"default": "text", "choices": ["text", "json_object", "json_schema"]},
+                ),
+            },
+            "optional": {
+                "json_schema": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "multiline": True,
+                        "placeholder": "Optional: JSON schema for json_schema mode (empty = ComfyUI workflow schema)",
+                    },
                 ),
             },
-            "optional": {},
         }
 
     def build_generation_settings(
@@ -100,9 +132,20 @@ class XtremetoolsLMStudioGenerationSettings(_LMStudioSettingsBase):
         temperature: float,
         max_tokens: int,
         response_format: str = "text",
+        json_schema: str = "",
     ) -> tuple[LMStudioGenerationSettings, str]:
         format_payload: dict[str, Any]
-        if response_format == "json_object":
+        schema_note = ""
+        if response_format == "json_schema":
+            custom_schema = None
+            if json_schema.strip():
+                try:
+                    custom_schema = json.loads(json_schema)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"json_schema is not valid JSON: {exc}") from exc
+            format_payload = build_json_schema_response_format(custom_schema)
+            schema_note = "custom schema" if custom_schema is not None else "workflow schema"
+        elif response_format == "json_object":
             format_payload = {"type": "json_object"}
         else:
             format_payload = {"type": "text"}
@@ -117,6 +160,8 @@ class XtremetoolsLMStudioGenerationSettings(_LMStudioSettingsBase):
         info.add(f"Temperature: {temperature}")
         info.add(f"Max tokens: {max_tokens}")
         info.add(f"Format: {format_payload['type']}")
+        if schema_note:
+            info.add(f"Schema: {schema_note}")
         return self.ensure_tuple(settings, info.render())
 
 
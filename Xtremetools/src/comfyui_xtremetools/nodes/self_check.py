@@ -5,9 +5,10 @@ import time
 from typing import Any
 
 from ..alias import NODE_CLASS_MAPPINGS
-from ..generator import get_structured_mode_flag
+from ..base.layout_cache import get_layout_cache
+from ..generator import get_cascade_stats, get_structured_mode_flag
 from ..node_discovery import get_last_fetch_timestamp
-from ..workflow_validator import get_last_validation_passed
+from ..workflow_validator import get_last_validation_passed, get_validation_cache
 from ..base.node_base import XtremetoolsUtilityNode
 from ..base.info import InfoFormatter
 
@@ -40,6 +41,29 @@ class XtremetoolsSelfCheck(XtremetoolsUtilityNode):
         else:
             info.add(f"Last export validation passed: {'yes' if last_validation_passed else 'no'}")
 
+        layout_stats = get_layout_cache().stats()
+        info.add(
+            f"Layout cache: {layout_stats['entries']}/{layout_stats['max_entries']} entries, "
+            f"hit rate {layout_stats['hit_rate']:.0%}{' (disk tier on)' if layout_stats['disk'] else ''}"
+        )
+
+        validation_stats = get_validation_cache().stats()
+        info.add(
+            f"Validation cache: {validation_stats['entries']}/{validation_stats['max_entries']} entries, "
+            f"hit rate {validation_stats['hit_rate']:.0%}"
+        )
+
+        cascade_stats = get_cascade_stats()
+        if cascade_stats:
+            info.add_section(
+                "Model cascade tiers:",
+                [
+                    f"{model}: {stats['successes']}/{stats['attempts']} ok "
+                    f"({stats['success_rate']:.0%}), avg {stats['avg_latency_ms']:.0f} ms"
+                    for model, stats in sorted(cascade_stats.items())
+                ],
+            )
+
         return self.ensure_tuple(info.render())
 
 
@@ -1,18 +1,41 @@
 """Meta-workflow generation nodes for creating ComfyUI workflows dynamically."""
 
 import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 from ..base.info import InfoFormatter
-from ..base.lm_studio import LMStudioBaseNode
+from ..base.lm_studio import LMStudioAPIError, LMStudioBaseNode, LMStudioResult
 from ..base.node_base import XtremetoolsUtilityNode
-from ..base.workflow_postprocessor import post_process_workflow
+from ..base.workflow_postprocessor import WorkflowDAGLayout, post_process_document
 from ..config import get_environment_config
-from ..generator import clamp_links_to_registry, extract_first_json_block, model_supports_structured_json
+from ..deadline import Deadline, DeadlineExceeded
+from ..generator import (
+    build_json_schema_response_format,
+    build_repair_fragment,
+    clamp_workflow_links,
+    extract_first_json_block,
+    extract_json_patch,
+    json_schema_capability,
+    mark_json_schema_capability,
+    model_supports_structured_json,
+    record_cascade_outcome,
+    resolve_model_cascade,
+)
+from ..json_patch import JSONPatchError, apply_json_patch
+from ..json_stream import IncrementalJSONScanner
 from ..logger import get_logger
 from ..node_discovery import refresh_type_registry
-from ..workflow_validator import validate_workflow_json
+from ..workflow_cache import build_request_cache_key, get_workflow_cache
+from ..schema_compiler import load_compiled_schema
+from ..workflow_document import WorkflowDocument
+from ..workflow_export import format_byte_size, resolve_export_path, write_workflow_file
+from ..workflow_store import get_workflow_store
+from ..workflow_validator import WorkflowValidationResult, validate_workflow_document, validate_workflow_json
 
 LOGGER = get_logger("xtremetools.nodes.workflow_generator")
 _CONFIG = get_environment_config()
@@ -22,6 +45,51 @@ except FileNotFoundError:
     _SCHEMA_TEXT = "{}"
 
 
+@dataclass(slots=True)
+class _CandidateSpec:
+    """One concurrent generation request inside a candidate race."""
+
+    index: int
+    server_url: str
+    temperature: float
+
+
+@dataclass(slots=True)
+class _CandidateOutcome:
+    """Result of a single candidate request, parsed and (optionally) validated."""
+
+    spec: _CandidateSpec
+    result: LMStudioResult | None = None
+    candidate: str = "{}"
+    extraction_method: str = "none"
+    payload: dict[str, Any] | None = None
+    validation: WorkflowValidationResult | None = None
+    error: Exception | None = None
+    elapsed_ms: float = 0.0
+    stream_status: str | None = None
+
+    @property
+    def is_valid(self) -> bool:
+        return self.validation is not None and self.validation.is_valid
+
+
+@dataclass(slots=True)
+class _TierResult:
+    """Pipeline outcome for one model of the cascade."""
+
+    model: str | None
+    processed: str = "{}"
+    validation: WorkflowValidationResult | None = None
+    pruned_links: int = 0
+    error: str | None = None
+    latency_ms: float = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        """Valid after the local validator and nothing pruned by the registry clamp."""
+        return self.error is None and self.validation is not None and self.validation.is_valid and not self.pruned_links
+
+
 class XtremetoolsWorkflowRequest(XtremetoolsUtilityNode):
     """
     Captures user requirements for workflow generation and structures them into
@@ -200,11 +268,64 @@ class XtremetoolsWorkflowGenerator(LMStudioBaseNode):
                     {"default": True},
                 ),
             },
+            "optional": {
+                "parallel_candidates": (
+                    "INT",
+                    {"default": 1, "min": 1, "max": 4, "step": 1},
+                ),
+                "candidate_temperature_spread": (
+                    "FLOAT",
+                    {"default": 0.0, "min": 0.0, "max": 1.0, "step": 0.05},
+                ),
+                "candidate_server_urls": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "multiline": True,
+                        "placeholder": "Optional: extra LM Studio URLs for candidates (comma or newline separated)",
+                    },
+                ),
+                "repair_iterations": (
+                    "INT",
+                    {"default": 0, "min": 0, "max": 5, "step": 1},
+                ),
+                "stream_early_stop": (
+                    "BOOLEAN",
+                    {"default": False},
+                ),
+                "use_cache": (
+                    "BOOLEAN",
+                    {"default": False},
+                ),
+                "cache_ttl_hours": (
+                    "FLOAT",
+                    {"default": 24.0, "min": 0.0, "max": 8760.0, "step": 1.0},
+                ),
+                "force_regenerate": (
+                    "BOOLEAN",
+                    {"default": False},
+                ),
+                "generation_settings": ("LM_STUDIO_GENERATION", {"forceInput": True}),
+                "deadline_seconds": (
+                    "FLOAT",
+                    {"default": 0.0, "min": 0.0, "max": 3600.0, "step": 5.0},
+                ),
+                "layout_engine": (list(WorkflowDAGLayout.LAYOUT_ENGINES), {"default": "layered"}),
+            },
         }
 
     RETURN_TYPES = ("STRING", "STRING")
     RETURN_NAMES = ("workflow_json", "info")
     FUNCTION = "generate_workflow"
+    MAX_PARALLEL_CANDIDATES = 4
+    REPAIR_MAX_TOKENS = 1024
+    STRUCTURED_FORMATS = frozenset({"json_object", "json_schema"})
+
+    REPAIR_SYSTEM_PROMPT = """You repair ComfyUI workflow JSON.
+You receive validator errors and the offending fragments, keyed by JSON Pointer into the workflow.
+Respond ONLY with a JSON Patch (RFC 6902) array that fixes every error, e.g.
+[{"op": "replace", "path": "/links/0/3", "value": 2}]
+Use the given paths. Do not resend the workflow, do not add prose or markdown fences."""
 
     # Extensive system prompt teaching the AI about Xtremetools nodes
     SYSTEM_PROMPT = """You are a ComfyUI workflow architect specializing in Xtremetools nodes.
@@ -364,105 +485,574 @@ Output MUST be raw JSON only (no fences, no prose)."""
         debug: bool = False,
         auto_layout: bool = True,
         synthesize_links: bool = True,
+        parallel_candidates: int = 1,
+        candidate_temperature_spread: float = 0.0,
+        candidate_server_urls: str = "",
+        repair_iterations: int = 0,
+        use_cache: bool = False,
+        cache_ttl_hours: float = 24.0,
+        force_regenerate: bool = False,
+        stream_early_stop: bool = False,
+        generation_settings: Any = None,
+        deadline_seconds: float = 0.0,
+        layout_engine: str = "layered",
     ) -> tuple[str, str]:
-        """Generate ComfyUI workflow JSON from a structured request."""
+        """Generate ComfyUI workflow JSON from a structured request.
+
+        With ``parallel_candidates > 1`` every attempt races several requests
+        (spread across temperatures and/or endpoints); the first candidate that
+        passes validation wins and the remaining requests are cancelled.
+        ``repair_iterations`` sends validator errors back as short follow-up
+        turns asking for a JSON Patch instead of regenerating from scratch.
+        When ``model_settings.cascade_models`` is set, models are tried
+        cheapest-first and the next tier only runs if validation or the
+        registry clamp rejects the previous tier's workflow.
+        ``use_cache`` serves previously validated workflows for the same
+        normalized request without calling LM Studio (``cache_ttl_hours`` of 0
+        never expires; ``force_regenerate`` skips the lookup but refreshes the
+        entry).
+        ``stream_early_stop`` streams the completion through an incremental
+        JSON scanner: the request stops as soon as the top-level object closes
+        and aborts on the first structural error so the retry starts sooner.
+        A ``generation_settings`` input with ``response_format=json_schema``
+        asks LM Studio for schema-constrained decoding; models listed under
+        ``json_schema_capable`` use it automatically. A server that rejects the
+        schema is remembered per model and the request falls back to
+        ``json_object``/text parsing.
+        ``deadline_seconds`` (0 = none) bounds the whole call: retries, tiers,
+        repair rounds and HTTP timeouts only get the remaining budget, and once
+        it passes the best workflow produced so far is returned (or a timeout
+        error if there is none). The same fallback applies when the last
+        cascade tier errors after an earlier tier produced a workflow.
+        ``layout_engine="force"`` refines the layered layout with the optional
+        NumPy force-directed pass for large, exploratory graphs.
+        """
 
         info = InfoFormatter("Workflow Generator")
-        refresh_type_registry()
+        deadline = Deadline(deadline_seconds)
+        if deadline.bounded:
+            info.add(f"Deadline: {deadline.budget:.1f} s")
+        if auto_layout and layout_engine != "layered":
+            info.add(f"Layout engine: {layout_engine}")
+        registry = refresh_type_registry()
 
         server_url = server_settings.server_url or _CONFIG.lm_studio_server_url
-        model_name = model_settings.model or _CONFIG.lm_studio_model
+        tiers = resolve_model_cascade(model_settings, _CONFIG.lm_studio_model)
+        requested_format = getattr(generation_settings, "response_format", None) or {}
+        schema_format = requested_format if requested_format.get("type") == "json_schema" else None
+        if len(tiers) > 1:
+            info.add(f"Model cascade: {' -> '.join(name or 'default' for name in tiers)}")
+
+        cache = get_workflow_cache() if use_cache else None
+        cache_key = ""
+        if cache is not None:
+            cache_key = build_request_cache_key(
+                workflow_request,
+                model=" -> ".join(name or "default" for name in tiers),
+                registry_hash=registry.fingerprint(),
+                options={"auto_layout": auto_layout, "synthesize_links": synthesize_links, "layout_engine": layout_engine},
+            )
+            cached = None if force_regenerate else cache.get(cache_key, ttl_seconds=cache_ttl_hours * 3600)
+            if cached is not None:
+                info.add("Cache: hit")
+                info.add("Validation: pass (cached)")
+                return self.ensure_tuple(cached, info.render())
+            info.add("Cache: bypassed (force regenerate)" if force_regenerate else "Cache: miss")
+
+        specs = self._build_candidate_specs(
+            parallel_candidates,
+            server_url=server_url,
+            temperature=temperature,
+            temperature_spread=candidate_temperature_spread,
+            extra_server_urls=candidate_server_urls,
+        )
+        if len(specs) > 1:
+            info.add(f"Parallel candidates: {len(specs)}")
+
+        tier: _TierResult | None = None
+        best: _TierResult | None = None
+        for tier_number, model_name in enumerate(tiers, start=1):
+            if len(tiers) > 1:
+                info.add(f"Tier {tier_number}/{len(tiers)}: {model_name or 'default'}")
+            tier = self._generate_with_model(
+                info,
+                workflow_request=workflow_request,
+                model_name=model_name,
+                server_url=server_url,
+                timeout=server_settings.timeout,
+                specs=specs,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                retry_attempts=retry_attempts,
+                use_json_response_format=use_json_response_format,
+                auto_layout=auto_layout,
+                synthesize_links=synthesize_links,
+                layout_engine=layout_engine,
+                repair_iterations=repair_iterations,
+                stream=stream_early_stop,
+                schema_format=schema_format,
+                deadline=deadline,
+            )
+            if len(tiers) > 1:
+                record_cascade_outcome(model_name, tier.succeeded, tier.latency_ms)
+                info.add(
+                    f"Tier {tier_number} result: {'pass' if tier.succeeded else 'escalate' if tier_number < len(tiers) else 'fail'} "
+                    f"in {tier.latency_ms:.1f} ms"
+                )
+            if tier.error is None:
+                best = tier
+            if tier.succeeded:
+                break
+            if deadline.expired:
+                info.add(f"Deadline: exceeded after tier {tier_number}/{len(tiers)}")
+                break
+
+        assert tier is not None  # resolve_model_cascade always yields at least one tier
+        if tier.error is not None and best is not None:
+            reason = "Deadline" if deadline.expired else "Cascade"
+            info.add(f"{reason}: returning best result so far ({best.model or 'default'})")
+            tier = best
+        if tier.error is not None:
+            info.add("Status: TIMEOUT" if deadline.expired else "Status: ERROR")
+            info.add(tier.error)
+            return self.ensure_tuple("{}", info.render())
+
+        processed = tier.processed
+        if cache is not None and tier.validation is not None and tier.validation.is_valid:
+            processed = cache.put(cache_key, processed)
+            info.add("Cache: stored")
+        if debug:
+            preview = processed[:300].replace("\n", " ")
+            info.add(f"Debug Preview: {preview}...")
+
+        return self.ensure_tuple(processed, info.render())
+
+    def _generate_with_model(
+        self,
+        info: InfoFormatter,
+        *,
+        workflow_request: str,
+        model_name: str | None,
+        server_url: str,
+        timeout: float | None,
+        specs: list[_CandidateSpec],
+        max_tokens: int,
+        temperature: float,
+        retry_attempts: int,
+        use_json_response_format: bool,
+        auto_layout: bool,
+        synthesize_links: bool,
+        repair_iterations: int,
+        layout_engine: str = "layered",
+        stream: bool = False,
+        schema_format: dict[str, Any] | None = None,
+        deadline: Deadline | None = None,
+    ) -> _TierResult:
+        """Run generation, repair, post-processing and validation for one model."""
+
+        deadline = deadline or Deadline.unbounded()
+        tier = _TierResult(model=model_name)
+        tier_start = time.perf_counter()
 
         structured_supported = use_json_response_format and model_supports_structured_json(model_name)
         response_format = {"type": "json_object"} if structured_supported else {"type": "text"}
-        info.add(f"Structured JSON mode: {'enabled' if structured_supported else 'fallback parsing'}")
-
-        base_system_prompt = self.SYSTEM_PROMPT
-        if structured_supported:
-            base_system_prompt += f"\nJSON SCHEMA (STRICT):\n{_SCHEMA_TEXT}\n"
+        schema_capable = json_schema_capability(model_name)
+        if use_json_response_format and schema_capable is not False and (schema_format is not None or schema_capable):
+            response_format = schema_format or build_json_schema_response_format()
+            structured_supported = True
+            info.add("Structured JSON mode: enabled (json_schema)")
         else:
-            base_system_prompt += "\nIf structured mode fails, emit the best possible workflow JSON block so the parser can recover."
+            info.add(f"Structured JSON mode: {'enabled' if structured_supported else 'fallback parsing'}")
 
-        workflow_json = "{}"
         extraction_method = "none"
         last_error: Exception | None = None
         parsed_payload: dict[str, Any] | None = None
         result = None
+        winner: _CandidateOutcome | None = None
 
         for attempt in range(1, retry_attempts + 1):
-            system_prompt = base_system_prompt if attempt == 1 else base_system_prompt + f"\nRETRY {attempt}: STRICT JSON ONLY."
+            if deadline.expired:
+                last_error = DeadlineExceeded(f"Deadline of {deadline.budget:.1f} s exceeded before attempt {attempt}")
+                break
+            system_prompt = self._system_prompt(response_format, attempt)
             messages = self.build_messages(prompt=workflow_request, system_prompt=system_prompt)
-            try:
-                result = self.invoke_chat_completion(
-                    messages=messages,
+            winner, outcomes = self._race_candidates(
+                specs,
+                messages=messages,
+                model=model_name,
+                timeout=timeout,
+                max_tokens=max_tokens,
+                response_format=response_format,
+                structured=structured_supported,
+                stream=stream,
+                deadline=deadline,
+            )
+            if response_format.get("type") == "json_schema":
+                if self._schema_rejected(outcomes):
+                    # Not counted as a retry: the request never reached the model.
+                    mark_json_schema_capability(model_name, False)
+                    structured_supported = use_json_response_format and model_supports_structured_json(model_name)
+                    response_format = {"type": "json_object"} if structured_supported else {"type": "text"}
+                    info.add(f"json_schema rejected by LM Studio → falling back to {response_format['type']}")
+                    messages = self.build_messages(prompt=workflow_request, system_prompt=self._system_prompt(response_format, attempt))
+                    winner, outcomes = self._race_candidates(
+                        specs,
+                        messages=messages,
+                        model=model_name,
+                        timeout=timeout,
+                        max_tokens=max_tokens,
+                        response_format=response_format,
+                        structured=structured_supported,
+                        stream=stream,
+                        deadline=deadline,
+                    )
+                elif any(outcome.result is not None for outcome in outcomes):
+                    mark_json_schema_capability(model_name, True)
+            for outcome in outcomes:
+                if outcome.stream_status is not None:
+                    info.add(f"Streaming (candidate {outcome.spec.index + 1}): {outcome.stream_status}")
+                if outcome.result is not None:
+                    result = outcome.result
+                if outcome.error is not None:
+                    last_error = outcome.error
+
+            if winner is None:
+                if any(outcome.result is not None for outcome in outcomes):
+                    LOGGER.warning("JSON decode failed (attempt %s): %s", attempt, last_error)
+                    if structured_supported:
+                        structured_supported = False
+                        response_format = {"type": "text"}
+                        info.add("Structured mode failed → falling back to parser path")
+                continue
+
+            result = winner.result
+            parsed_payload = winner.payload
+            extraction_method = winner.extraction_method
+            last_error = None
+            if len(specs) > 1:
+                info.add(
+                    f"Winning candidate: {winner.spec.index + 1}/{len(specs)} "
+                    f"(temperature {winner.spec.temperature:.2f}, {winner.spec.server_url}) "
+                    f"in {winner.elapsed_ms:.1f} ms"
+                    + ("" if winner.is_valid else " [no candidate validated; first parsed kept]")
+                )
+            break
+
+        if parsed_payload is None and isinstance(last_error, DeadlineExceeded):
+            tier.error = f"Timed out: {last_error}"
+        elif result is None:
+            tier.error = "No generation result captured" + (f": {last_error}" if last_error is not None else "")
+        elif parsed_payload is None:
+            tier.error = f"Failed to parse workflow after {retry_attempts} attempts: {last_error}"
+        if tier.error is not None:
+            tier.latency_ms = (time.perf_counter() - tier_start) * 1000
+            return tier
+
+        if repair_iterations > 0 and not deadline.expired:
+            validation = winner.validation if winner is not None and winner.validation is not None else validate_workflow_document(WorkflowDocument(parsed_payload), auto_fix=True)
+            if not validation.is_valid:
+                parsed_payload, rounds, repaired = self._repair_workflow(
+                    parsed_payload,
+                    validation.errors,
+                    iterations=repair_iterations,
                     server_url=server_url,
                     model=model_name,
-                    timeout=server_settings.timeout,
+                    timeout=timeout,
                     temperature=temperature,
-                    max_tokens=max_tokens,
-                    response_format=response_format,
+                    deadline=deadline,
                 )
-            except Exception as exc:  # pragma: no cover - network issues raised upstream
-                last_error = exc
-                LOGGER.error("LM Studio call failed: %s", exc)
-                continue
-
-            workflow_text = result.text.strip()
-            if structured_supported and response_format.get("type") == "json_object":
-                candidate = workflow_text
-                extraction_method = "structured"
+                info.add(f"Repair iterations: {rounds} ({'repaired' if repaired else 'unresolved'})")
             else:
-                candidate, extraction_method = extract_first_json_block(workflow_text)
+                info.add("Repair iterations: 0")
+
+        # Parsed once by the candidate; every stage below edits this document in place.
+        document = WorkflowDocument(parsed_payload)
+        info.add(f"Nodes: {len(document.nodes)}")
+        info.add(f"Links: {len(document.links)}")
+
+        if deadline.expired:
+            # Clamp + validation are local and cheap; they still run so the result is trustworthy.
+            info.add("Deadline: exceeded, skipped repair and post-processing")
+        elif synthesize_links or auto_layout:
+            post_process_document(
+                document,
+                apply_layout=auto_layout,
+                synthesize_links=synthesize_links,
+                layout_engine=layout_engine,
+            )
+        tier.pruned_links = clamp_workflow_links(document)
+        if tier.pruned_links:
+            info.add(f"Pruned links: {tier.pruned_links}")
+
+        validation = validate_workflow_document(document, auto_fix=True)
+        tier.validation = validation
+        tier.processed = document.to_json()
+        info.add(f"Validation: {'pass' if validation.is_valid else 'fail'}")
+        if validation.errors:
+            info.add(f"Errors: {len(validation.errors)}")
+        if validation.warnings:
+            info.add(f"Warnings: {len(validation.warnings)}")
+
+        info.add(f"Extraction: {extraction_method}")
+        info.add(f"Response format: {response_format.get('type')}")
+        tier.latency_ms = (time.perf_counter() - tier_start) * 1000
+        return tier
+
+    def _system_prompt(self, response_format: dict[str, Any], attempt: int) -> str:
+        """Return the system prompt for ``response_format`` and retry ``attempt``."""
+
+        format_type = response_format.get("type")
+        prompt = self.SYSTEM_PROMPT
+        if format_type == "json_schema":
+            # Decoding is already constrained by the schema; don't pay for it in prompt tokens.
+            prompt += "\nOutput is constrained to the ComfyUI workflow JSON schema."
+        elif format_type == "json_object":
+            prompt += f"\nJSON SCHEMA (STRICT):\n{_SCHEMA_TEXT}\n"
+        else:
+            prompt += "\nIf structured mode fails, emit the best possible workflow JSON block so the parser can recover."
+        if attempt > 1:
+            prompt += f"\nRETRY {attempt}: STRICT JSON ONLY."
+        return prompt
+
+    @staticmethod
+    def _schema_rejected(outcomes: list[_CandidateOutcome]) -> bool:
+        """True when every candidate failed with an HTTP 4xx before any text came back."""
+
+        if not outcomes or any(outcome.result is not None for outcome in outcomes):
+            return False
+        return all(
+            isinstance(outcome.error, LMStudioAPIError) and str(outcome.error).startswith(("HTTP 400", "HTTP 422"))
+            for outcome in outcomes
+        )
 
+    def _repair_workflow(
+        self,
+        payload: dict[str, Any],
+        errors: list[str],
+        *,
+        iterations: int,
+        server_url: str,
+        model: str | None,
+        timeout: float | None,
+        temperature: float,
+        deadline: Deadline | None = None,
+    ) -> tuple[dict[str, Any], int, bool]:
+        """Ask for JSON Patches that fix ``errors``, re-validating locally each round.
+
+        Returns the (possibly unchanged) workflow payload, the number of repair
+        calls made and whether the final workflow validates.
+        """
+
+        current = payload
+        rounds = 0
+        for _ in range(iterations):
+            if deadline is not None and deadline.expired:
+                break
+            rounds += 1
+            fragment = build_repair_fragment(current, errors)
+            node_ids = sorted(node.get("id") for node in current.get("nodes", []) if isinstance(node, dict))
+            prompt = "\n".join(
+                [
+                    "VALIDATION ERRORS:",
+                    *(f"- {error}" for error in errors),
+                    "",
+                    f"EXISTING NODE IDS: {node_ids}",
+                    "OFFENDING FRAGMENTS (JSON Pointer -> value):",
+                    json.dumps(fragment, ensure_ascii=False),
+                ]
+            )
             try:
-                parsed_payload = json.loads(candidate)
-                workflow_json = candidate
-                last_error = None
+                result = self.invoke_chat_completion(
+                    messages=self.build_messages(prompt=prompt, system_prompt=self.REPAIR_SYSTEM_PROMPT),
+                    server_url=server_url,
+                    model=model,
+                    timeout=timeout,
+                    temperature=temperature,
+                    max_tokens=self.REPAIR_MAX_TOKENS,
+                    response_format={"type": "text"},
+                    deadline=deadline,
+                )
+            except Exception as exc:  # pragma: no cover - network issues raised upstream
+                LOGGER.error("LM Studio repair call failed: %s", exc)
                 break
-            except json.JSONDecodeError as exc:
-                last_error = exc
-                LOGGER.warning("JSON decode failed (attempt %s): %s", attempt, exc)
-                if structured_supported:
-                    structured_supported = False
-                    response_format = {"type": "text"}
-                    info.add("Structured mode failed → falling back to parser path")
+
+            operations = extract_json_patch(result.text)
+            if operations is None:
+                LOGGER.warning("Repair round %s returned no JSON Patch", rounds)
+                continue
+            try:
+                patched = apply_json_patch(current, operations)
+            except JSONPatchError as exc:
+                LOGGER.warning("Repair round %s patch rejected: %s", rounds, exc)
                 continue
 
-        if result is None:
-            info.add("Status: ERROR")
-            info.add("No generation result captured")
-            return self.ensure_tuple("{}", info.render())
+            current = patched
+            validation = validate_workflow_document(WorkflowDocument(current), auto_fix=True)
+            if validation.is_valid:
+                return current, rounds, True
+            errors = validation.errors
 
-        if parsed_payload is None:
-            info.add("Status: ERROR")
-            info.add(f"Failed to parse workflow after {retry_attempts} attempts: {last_error}")
-            return self.ensure_tuple("{}", info.render())
+        return current, rounds, False
 
-        node_count = len(parsed_payload.get("nodes", []))
-        link_count = len(parsed_payload.get("links", []))
-        info.add(f"Nodes: {node_count}")
-        info.add(f"Links: {link_count}")
+    def _build_candidate_specs(
+        self,
+        count: int,
+        *,
+        server_url: str,
+        temperature: float,
+        temperature_spread: float = 0.0,
+        extra_server_urls: str = "",
+    ) -> list[_CandidateSpec]:
+        """Fan one attempt out into ``count`` requests over temperatures/endpoints."""
+
+        count = max(1, min(int(count or 1), self.MAX_PARALLEL_CANDIDATES))
+        urls = [server_url]
+        for raw in extra_server_urls.replace("\n", ",").split(","):
+            url = raw.strip()
+            if url and url not in urls:
+                urls.append(url)
+
+        return [
+            _CandidateSpec(
+                index=index,
+                server_url=urls[index % len(urls)],
+                temperature=min(2.0, temperature + index * temperature_spread),
+            )
+            for index in range(count)
+        ]
 
-        processed = workflow_json
-        if synthesize_links or auto_layout:
-            processed = post_process_workflow(processed, apply_layout=auto_layout, synthesize_links=synthesize_links)
-        processed = clamp_links_to_registry(processed)
+    def _run_candidate(
+        self,
+        spec: _CandidateSpec,
+        *,
+        messages: list[dict[str, str]],
+        model: str | None,
+        timeout: float | None,
+        max_tokens: int,
+        response_format: dict[str, Any],
+        structured: bool,
+        validate: bool,
+        stream: bool = False,
+        cancel_event: threading.Event | None = None,
+        deadline: Deadline | None = None,
+    ) -> _CandidateOutcome:
+        """Invoke LM Studio once, then extract, parse and optionally validate.
+
+        In streaming mode the completion is fed through an
+        :class:`IncrementalJSONScanner`; the connection is closed as soon as
+        the top-level object is complete, on the first structural error, or
+        when ``cancel_event`` signals that another candidate already won.
+        """
 
-        validation = validate_workflow_json(processed, auto_fix=True)
-        processed = validation.workflow_json
-        info.add(f"Validation: {'pass' if validation.is_valid else 'fail'}")
-        if validation.errors:
-            info.add(f"Errors: {len(validation.errors)}")
-        if validation.warnings:
-            info.add(f"Warnings: {len(validation.warnings)}")
+        outcome = _CandidateOutcome(spec=spec)
+        scanner = IncrementalJSONScanner() if stream else None
+        request = {
+            "messages": messages,
+            "server_url": spec.server_url,
+            "model": model,
+            "timeout": timeout,
+            "temperature": spec.temperature,
+            "max_tokens": max_tokens,
+            "response_format": response_format,
+            "deadline": deadline,
+        }
+        start = time.perf_counter()
+        try:
+            if scanner is not None:
+                outcome.result = self.stream_chat_completion(
+                    should_stop=lambda delta: scanner.feed(delta) != "pending" or bool(cancel_event and cancel_event.is_set()),
+                    **request,
+                )
+            else:
+                outcome.result = self.invoke_chat_completion(**request)
+        except Exception as exc:  # pragma: no cover - network issues raised upstream
+            outcome.error = exc
+            outcome.elapsed_ms = (time.perf_counter() - start) * 1000
+            LOGGER.error("LM Studio call failed: %s", exc)
+            return outcome
+
+        if scanner is not None:
+            if scanner.status == "error":
+                outcome.stream_status = f"aborted early ({scanner.error})"
+                outcome.error = ValueError(f"Streaming JSON aborted: {scanner.error}")
+                outcome.elapsed_ms = (time.perf_counter() - start) * 1000
+                return outcome
+            if cancel_event is not None and cancel_event.is_set() and scanner.status == "pending":
+                outcome.stream_status = "cancelled"
+                outcome.error = RuntimeError("Candidate cancelled after another candidate won")
+                outcome.elapsed_ms = (time.perf_counter() - start) * 1000
+                return outcome
+            if scanner.status == "complete":
+                outcome.stream_status = "stopped at end of JSON object"
+                outcome.result.text = scanner.json_text or outcome.result.text
+
+        workflow_text = outcome.result.text.strip()
+        if structured and response_format.get("type") in self.STRUCTURED_FORMATS:
+            outcome.candidate, outcome.extraction_method = workflow_text, "structured"
+        else:
+            outcome.candidate, outcome.extraction_method = extract_first_json_block(workflow_text)
 
-        info.add(f"Extraction: {extraction_method}")
-        info.add(f"Response format: {response_format.get('type')}")
-        if debug:
-            preview = processed[:300].replace("\n", " ")
-            info.add(f"Debug Preview: {preview}...")
+        try:
+            document = WorkflowDocument.from_json(outcome.candidate)
+        except (json.JSONDecodeError, ValueError) as exc:
+            outcome.error = exc
+        else:
+            outcome.payload = document.data
+            if validate:
+                outcome.validation = validate_workflow_document(document, auto_fix=True)
+        outcome.elapsed_ms = (time.perf_counter() - start) * 1000
+        return outcome
 
-        return self.ensure_tuple(processed, info.render())
+    def _race_candidates(
+        self,
+        specs: list[_CandidateSpec],
+        **request: Any,
+    ) -> tuple[_CandidateOutcome | None, list[_CandidateOutcome]]:
+        """Run candidates concurrently and return the first one that validates.
+
+        Outcomes are validated as they arrive. When one passes, requests that
+        have not started yet are cancelled; in-flight streaming requests close
+        their connection at the next token, non-streaming ones are abandoned
+        (their results are ignored). If none validate, the first candidate that at
+        least parsed is returned so the caller can still post-process it.
+        """
+
+        if len(specs) == 1:
+            outcome = self._run_candidate(specs[0], validate=False, **request)
+            return (outcome if outcome.payload is not None else None), [outcome]
+
+        outcomes: list[_CandidateOutcome] = []
+        deadline: Deadline | None = request.get("deadline")
+        cancel_event = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=len(specs), thread_name_prefix="xtremetools-candidate")
+        try:
+            pending = {
+                executor.submit(self._run_candidate, spec, validate=True, cancel_event=cancel_event, **request)
+                for spec in specs
+            }
+            while pending:
+                done, pending = wait(
+                    pending,
+                    timeout=deadline.remaining() if deadline is not None else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    # Deadline passed with every candidate still in flight; abandon them.
+                    cancel_event.set()
+                    break
+                for future in done:
+                    outcome = future.result()
+                    outcomes.append(outcome)
+                    if outcome.is_valid:
+                        cancel_event.set()
+                        for other in pending:
+                            other.cancel()
+                        return outcome, outcomes
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        parsed = [outcome for outcome in outcomes if outcome.payload is not None]
+        return (parsed[0] if parsed else None), outcomes
 
 
 class XtremetoolsWorkflowValidator(XtremetoolsUtilityNode):
@@ -491,7 +1081,10 @@ class XtremetoolsWorkflowExporter(XtremetoolsUtilityNode):
     Formats workflow JSON for file export with pretty-printing and metadata.
     
     Adds metadata like generation timestamp and Xtremetools version, and formats
-    the JSON with proper indentation for human readability.
+    the JSON with proper indentation for human readability. With ``output_path``
+    set, the JSON is streamed into that file instead of being returned; with
+    ``content_addressed`` the canonical JSON goes into the workflow store and
+    re-exporting an identical workflow writes nothing.
     """
 
     CATEGORY = "🤖 Xtremetools/🔧 Meta-Workflow"
@@ -518,6 +1111,20 @@ class XtremetoolsWorkflowExporter(XtremetoolsUtilityNode):
                     {"default": False},
                 ),
             },
+            "optional": {
+                "output_path": (
+                    "STRING",
+                    {"default": "", "placeholder": "workflow.json (relative to XTREMETOOLS_EXPORT_DIR)"},
+                ),
+                "gzip_output": (
+                    "BOOLEAN",
+                    {"default": False},
+                ),
+                "content_addressed": (
+                    "BOOLEAN",
+                    {"default": False},
+                ),
+            },
         }
 
     RETURN_TYPES = ("STRING", "STRING")
@@ -531,6 +1138,9 @@ class XtremetoolsWorkflowExporter(XtremetoolsUtilityNode):
         add_metadata: bool = True,
         add_metadata_note: bool = True,
         compact: bool = False,
+        output_path: str = "",
+        gzip_output: bool = False,
+        content_addressed: bool = False,
     ) -> tuple[str, str]:
         """
         Format workflow JSON for export.
@@ -539,93 +1149,117 @@ class XtremetoolsWorkflowExporter(XtremetoolsUtilityNode):
             workflow_json: Raw workflow JSON string
             indent: Number of spaces for indentation (0 = compact)
             add_metadata: Whether to add generation metadata
+            output_path: Write the JSON to this file (atomically) and return its path instead
+            gzip_output: Gzip the file written to ``output_path``
+            content_addressed: Store canonical JSON in the workflow store and return the blob path;
+                ``indent``, ``output_path`` and ``gzip_output`` do not apply
             
         Returns:
-            Tuple of (formatted_json, info_string)
+            Tuple of (formatted_json or written file path, info_string)
         """
         info = InfoFormatter("Workflow Exporter")
 
+        # The only validation: content-hash cached, so JSON already checked by the Validator node is not re-validated.
         validation = validate_workflow_json(workflow_json, auto_fix=True)
+        if validation.report == "INVALID: parse error":
+            info.add("Status: ERROR")
+            info.add(f"Error: {validation.errors[0][:100]}")
+            return self.ensure_tuple(workflow_json, info.render())
         if not validation.is_valid:
             info.add("Status: ERROR")
             info.add("Export blocked: validation failed")
             return self.ensure_tuple(validation.report, info.render())
+        document = validation.document or WorkflowDocument.from_json(validation.workflow_json)
+
+        workflow = document.data
+
+        # Add metadata if requested
+        if add_metadata:
+            if "extra" not in workflow:
+                workflow["extra"] = {}
+            workflow["extra"]["generated_by"] = "Xtremetools Workflow Generator"
+            workflow["extra"]["generator_version"] = "1.0"
+            workflow.setdefault("version", 0.4)
+
+        # Add metadata Note node for human context
+        if add_metadata and add_metadata_note:
+            note_id = (workflow.get("last_node_id") or 0) + 1
+            note_node = {
+                "id": note_id,
+                "type": "Note",
+                "pos": [100, (workflow.get("last_node_id") or 0) * 10 + 50],
+                "size": [300, 100],
+                "flags": {},
+                "order": 0,
+                "mode": 0,
+                "properties": {"Node name for S&R": "Note"},
+                "widgets_values": [
+                    "Generated by Xtremetools exporter with metadata."
+                ],
+                "inputs": [],
+                "outputs": [],
+            }
+            # The note is unlinked and above every existing id, so checking it alone
+            # stands in for re-validating the whole workflow.
+            note_issues = load_compiled_schema(_CONFIG.workflow_schema_path).validate_item("nodes", len(document.nodes), note_node)
+            if note_issues:
+                info.add("Status: ERROR")
+                info.add("Export blocked after metadata injection")
+                return self.ensure_tuple("\n".join(note_issues), info.render())
+            workflow.setdefault("nodes", []).append(note_node)
+            workflow["last_node_id"] = note_id
+            document.invalidate()
+            info.add("Metadata Note: added")
 
-        try:
-            # Parse JSON
-            workflow = json.loads(validation.workflow_json)
-
-            # Add metadata if requested
-            if add_metadata:
-                if "extra" not in workflow:
-                    workflow["extra"] = {}
-                workflow["extra"]["generated_by"] = "Xtremetools Workflow Generator"
-                workflow["extra"]["generator_version"] = "1.0"
-                workflow.setdefault("version", 0.4)
-
-            # Add metadata Note node for human context
-            if add_metadata and add_metadata_note:
-                note_id = (workflow.get("last_node_id") or 0) + 1
-                note_node = {
-                    "id": note_id,
-                    "type": "Note",
-                    "pos": [100, (workflow.get("last_node_id") or 0) * 10 + 50],
-                    "size": [300, 100],
-                    "flags": {},
-                    "order": 0,
-                    "mode": 0,
-                    "properties": {"Node name for S&R": "Note"},
-                    "widgets_values": [
-                        "Generated by Xtremetools exporter with metadata."
-                    ],
-                }
-                workflow.setdefault("nodes", []).append(note_node)
-                workflow["last_node_id"] = note_id
-                info.add("Metadata Note: added")
-
-            # Format with specified indentation
-            if compact:
-                indent = 0
-            if indent == 0:
-                formatted = json.dumps(workflow, ensure_ascii=False)
-                info.add("Format: Compact (no indentation)")
-            else:
-                formatted = json.dumps(workflow, indent=indent, ensure_ascii=False)
-                info.add(f"Format: Indented ({indent} spaces)")
-
-            # Calculate size
-            size_bytes = len(formatted.encode("utf-8"))
-            if size_bytes < 1024:
-                size_str = f"{size_bytes} bytes"
-            elif size_bytes < 1024 * 1024:
-                size_str = f"{size_bytes / 1024:.1f} KB"
-            else:
-                size_str = f"{size_bytes / (1024 * 1024):.1f} MB"
-
-            info.add("Status: OK Formatted")
-            info.add(f"Size: {size_str}")
+        if content_addressed:
+            try:
+                stored = get_workflow_store().put(document)
+            except (OSError, ValueError) as exc:
+                info.add("Status: ERROR")
+                info.add(f"Error: could not store workflow: {exc}")
+                return self.ensure_tuple("", info.render())
+            info.add("Format: Canonical (sorted keys)")
+            info.add(f"Status: OK {'Stored' if stored.created else 'Deduplicated'}")
+            info.add(f"Digest: {stored.digest[:16]}")
+            info.add(f"File: {stored.path}")
+            info.add(f"Size: {format_byte_size(stored.size_bytes)}")
             info.add(f"Metadata Added: {'Yes' if add_metadata else 'No'}")
-            info.add("Ready for Export: Copy from ShowText node")
+            return self.ensure_tuple(str(stored.path), info.render())
 
-            # Final validation after metadata injection to ensure schema compliance
-            final_validation = validate_workflow_json(formatted, auto_fix=True)
-            if not final_validation.is_valid:
+        if compact:
+            indent = 0
+        if indent == 0:
+            info.add("Format: Compact (no indentation)")
+        else:
+            info.add(f"Format: Indented ({indent} spaces)")
+
+        if output_path.strip():
+            target = resolve_export_path(output_path.strip(), compress=gzip_output)
+            try:
+                stats = write_workflow_file(workflow, target, indent=indent, compress=gzip_output)
+            except OSError as exc:
                 info.add("Status: ERROR")
-                info.add("Export blocked after metadata injection")
-                return self.ensure_tuple(final_validation.report, info.render())
-            final_payload = json.loads(final_validation.workflow_json)
-            if indent == 0:
-                final_output = json.dumps(final_payload, ensure_ascii=False)
-            else:
-                final_output = json.dumps(final_payload, indent=indent if not compact else None, ensure_ascii=False)
+                info.add(f"Error: could not write {target}: {exc}")
+                return self.ensure_tuple("", info.render())
+            info.add("Status: OK Written")
+            info.add(f"File: {stats.path}")
+            size_line = f"Size: {format_byte_size(stats.json_bytes)}"
+            if stats.compressed:
+                size_line += f" (gzip {format_byte_size(stats.disk_bytes)})"
+            info.add(size_line)
+            info.add(f"Write time: {stats.elapsed_ms:.1f} ms")
+            info.add(f"Metadata Added: {'Yes' if add_metadata else 'No'}")
+            return self.ensure_tuple(str(stats.path), info.render())
 
-            return self.ensure_tuple(final_output, info.render())
+        # Format with specified indentation; this is the only serialisation.
+        formatted = document.to_json(indent=indent)
 
-        except json.JSONDecodeError as e:
-            error_msg = f"JSON parse error: {str(e)}"
-            info.add("Status: ERROR")
-            info.add(f"Error: {str(e)[:100]}")
-            return self.ensure_tuple(workflow_json, info.render())
+        info.add("Status: OK Formatted")
+        info.add(f"Size: {format_byte_size(len(formatted.encode('utf-8')))}")
+        info.add(f"Metadata Added: {'Yes' if add_metadata else 'No'}")
+        info.add("Ready for Export: Copy from ShowText node")
+
+        return self.ensure_tuple(formatted, info.render())
 
 
 # Node registration
@@ -0,0 +1,239 @@
+"""Compile the workflow JSON Schema into plain Python closures."""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from .logger import get_logger
+
+logger = get_logger("xtremetools.schema_compiler")
+
+# Copilot: supports the draft-07 subset workflow_schema.json uses; extend _compile for new keywords.
+
+Check = Callable[[Any, str, list[str]], None]
+
+_TYPE_CHECKS: dict[str, Callable[[Any], bool]] = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+
+class _SchemaErrorLimit(Exception):
+    """Raised internally once ``max_errors`` messages were collected."""
+
+
+@dataclass(slots=True)
+class CompiledSchema:
+    """A compiled validator plus the fingerprint of the schema it came from."""
+
+    check: Check
+    required: tuple[str, ...]
+    fingerprint: str
+    # Element checks of top-level array properties, for validating streamed items one by one.
+    item_checks: dict[str, Check] = field(default_factory=dict)
+
+    def validate(self, payload: Any, max_errors: int = 50) -> list[str]:
+        """Return per-path error messages such as ``/nodes/3/pos: expected at most 2 items, got 3``."""
+
+        errors = _BoundedErrors(max_errors)
+        try:
+            self.check(payload, "", errors)
+        except _SchemaErrorLimit:
+            return [*errors, f"/: stopped after {max_errors} schema errors"]
+        return list(errors)
+
+    def validate_item(self, name: str, index: int, item: Any, max_errors: int = 50) -> list[str]:
+        """Check one element of the top-level array ``name``; paths read ``/name/index/...``."""
+
+        check = self.item_checks.get(name)
+        if check is None:
+            return []
+        errors = _BoundedErrors(max_errors)
+        try:
+            check(item, f"/{name}/{index}", errors)
+        except _SchemaErrorLimit:
+            return [*errors, f"/{name}/{index}: stopped after {max_errors} schema errors"]
+        return list(errors)
+
+
+class _BoundedErrors(list):
+    __slots__ = ("limit",)
+
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        self.limit = limit
+
+    def append(self, message: str) -> None:  # type: ignore[override]
+        if len(self) >= self.limit:
+            raise _SchemaErrorLimit
+        super().append(message)
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    return {dict: "object", list: "array", str: "string", int: "integer", float: "number"}.get(type(value), type(value).__name__)
+
+
+def _compile(schema: Any) -> Check:
+    """Turn one schema node into a closure; unknown keywords are ignored like draft-07 does."""
+
+    if not isinstance(schema, dict) or not schema:
+        return lambda value, path, errors: None
+
+    checks: list[Check] = []
+
+    types = schema.get("type")
+    if types is not None:
+        names = (types,) if isinstance(types, str) else tuple(types)
+        predicates = tuple(_TYPE_CHECKS[name] for name in names if name in _TYPE_CHECKS)
+        expected = " or ".join(names)
+
+        def check_type(value: Any, path: str, errors: list[str]) -> None:
+            if not any(predicate(value) for predicate in predicates):
+                errors.append(f"{path or '/'}: expected {expected}, got {_type_name(value)}")
+
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value: Any, path: str, errors: list[str]) -> None:
+            if value not in allowed:
+                errors.append(f"{path or '/'}: {value!r} is not one of {allowed}")
+
+        checks.append(check_enum)
+
+    if "minimum" in schema:
+        minimum = schema["minimum"]
+
+        def check_minimum(value: Any, path: str, errors: list[str]) -> None:
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value < minimum:
+                errors.append(f"{path or '/'}: {value} is less than the minimum of {minimum}")
+
+        checks.append(check_minimum)
+
+    required = tuple(schema.get("required", ()))
+    properties = {name: _compile(sub) for name, sub in schema.get("properties", {}).items()}
+    additional = schema.get("additionalProperties", True)
+    additional_check = _compile(additional) if isinstance(additional, dict) else None
+    if required or properties or additional is not True:
+
+        def check_object(value: Any, path: str, errors: list[str]) -> None:
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(f"{path or '/'}: missing required property '{name}'")
+            for name, item in value.items():
+                check = properties.get(name)
+                if check is not None:
+                    check(item, f"{path}/{name}", errors)
+                elif additional is False:
+                    errors.append(f"{path or '/'}: unexpected property '{name}'")
+                elif additional_check is not None:
+                    additional_check(item, f"{path}/{name}", errors)
+
+        checks.append(check_object)
+
+    items = schema.get("items")
+    min_items = schema.get("minItems")
+    max_items = schema.get("maxItems")
+    if items is not None or min_items is not None or max_items is not None:
+        tuple_checks = [_compile(sub) for sub in items] if isinstance(items, list) else None
+        item_check = _compile(items) if isinstance(items, dict) and items else None
+
+        def check_array(value: Any, path: str, errors: list[str]) -> None:
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(f"{path or '/'}: expected at least {min_items} items, got {len(value)}")
+            if max_items is not None and len(value) > max_items:
+                errors.append(f"{path or '/'}: expected at most {max_items} items, got {len(value)}")
+            if tuple_checks is not None:
+                for index, (check, item) in enumerate(zip(tuple_checks, value)):
+                    check(item, f"{path}/{index}", errors)
+            elif item_check is not None:
+                for index, item in enumerate(value):
+                    item_check(item, f"{path}/{index}", errors)
+
+        checks.append(check_array)
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value: Any, path: str, errors: list[str]) -> None:
+        for check in checks:
+            check(value, path, errors)
+
+    return check_all
+
+
+def compile_schema(schema: dict[str, Any]) -> CompiledSchema:
+    """Compile ``schema`` once; the result validates any number of payloads."""
+
+    text = json.dumps(schema, sort_keys=True)
+    properties = schema.get("properties", {}) if isinstance(schema, dict) else {}
+    return CompiledSchema(
+        check=_compile(schema),
+        required=tuple(schema.get("required", ())) if isinstance(schema, dict) else (),
+        fingerprint=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        item_checks={
+            name: _compile(sub["items"])
+            for name, sub in properties.items()
+            if isinstance(sub, dict) and isinstance(sub.get("items"), dict)
+        },
+    )
+
+
+_COMPILED: dict[str, tuple[tuple[int, int], CompiledSchema]] = {}
+_COMPILED_LOCK = threading.Lock()
+
+
+def load_compiled_schema(path: Path) -> CompiledSchema:
+    """Return the compiled schema at ``path``, recompiling when the file changes.
+
+    A missing or corrupted schema compiles to an accept-everything validator
+    so validation degrades to the Pydantic checks instead of failing.
+    """
+
+    path = Path(path)
+    try:
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stamp = (0, 0)
+    key = str(path)
+    with _COMPILED_LOCK:
+        cached = _COMPILED.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+    if stamp == (0, 0):
+        logger.warning("Workflow schema not found at %s", path)
+        schema: dict[str, Any] = {}
+    else:
+        try:
+            schema = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.error("Workflow schema file corrupted: %s", exc)
+            schema = {}
+    compiled = compile_schema(schema if isinstance(schema, dict) else {})
+    with _COMPILED_LOCK:
+        _COMPILED[key] = (stamp, compiled)
+    logger.debug("Compiled workflow schema %s (%s)", path, compiled.fingerprint[:12])
+    return compiled
+
+
+__all__ = ["CompiledSchema", "compile_schema", "load_compiled_schema"]
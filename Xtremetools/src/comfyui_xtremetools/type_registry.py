@@ -1,6 +1,7 @@
 """Typed registry of ComfyUI node socket information."""
 from __future__ import annotations
 
+import hashlib
 from collections import defaultdict
 from typing import Any, Iterable
 
@@ -47,6 +48,15 @@ class TypeRegistry(BaseModel):
         allowed_targets = self.compatibility_overrides.get(output_type, set())
         return input_type in allowed_targets
 
+    def compatible_output_types(self, input_type: str | None) -> set[str]:
+        """Return every output type that :meth:`is_link_allowed` accepts for ``input_type``."""
+
+        if not input_type:
+            return set()
+        allowed = {input_type}
+        allowed.update(output_type for output_type, targets in self.compatibility_overrides.items() if input_type in targets)
+        return allowed
+
     def build_from_object_info(self, payload: dict[str, Any]) -> None:
         self.nodes.clear()
         category_map = payload.get("categories", {})
@@ -72,6 +82,22 @@ class TypeRegistry(BaseModel):
                         self.compatibility_overrides.setdefault("STRING", set()).add("STRING")
                         self.compatibility_overrides.setdefault(provider, set()).add("STRING")
 
+    def fingerprint(self) -> str:
+        """Return a stable hash of the registered signatures + compatibility rules."""
+
+        digest = hashlib.sha256()
+        for node_type in sorted(self.nodes):
+            signature = self.nodes[node_type]
+            digest.update(node_type.encode("utf-8"))
+            for direction, sockets in (("in", signature.inputs), ("out", signature.outputs)):
+                for socket in sockets:
+                    digest.update(f"|{direction}:{socket.name}:{socket.type}".encode("utf-8"))
+            digest.update(b"\n")
+        for output_type in sorted(self.compatibility_overrides):
+            targets = ",".join(sorted(self.compatibility_overrides[output_type]))
+            digest.update(f"{output_type}->{targets}\n".encode("utf-8"))
+        return digest.hexdigest()
+
     def describe(self) -> dict[str, Any]:
         return {
             "nodes": len(self.nodes),
@@ -0,0 +1,225 @@
+"""Persistent cache of validated workflows keyed by normalized generation requests."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from .config import get_environment_config
+from .logger import get_logger
+from .workflow_store import WorkflowStore
+
+# Copilot: keep cache helpers typed and free of LM Studio dependencies.
+
+logger = get_logger("xtremetools.workflow_cache")
+
+_WHITESPACE = re.compile(r"\s+")
+_TYPE_LINE = re.compile(r"^\s*TYPE:\s*(\S+)", re.MULTILINE | re.IGNORECASE)
+_COMPLEXITY_LINE = re.compile(r"^\s*COMPLEXITY:\s*(\S+)", re.MULTILINE | re.IGNORECASE)
+
+
+def normalize_request(text: str) -> str:
+    """Collapse whitespace and case so cosmetic edits still hit the cache."""
+
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def build_request_cache_key(
+    workflow_request: str,
+    *,
+    model: str | None,
+    registry_hash: str,
+    options: dict[str, Any] | None = None,
+) -> str:
+    """Hash the normalized request with everything that changes the generated output.
+
+    ``workflow_type`` and ``complexity`` are read from the structured request
+    emitted by ``XtremetoolsWorkflowRequest``; ``options`` carries generator
+    switches (layout, link synthesis, ...) that alter the post-processed JSON.
+    """
+
+    type_match = _TYPE_LINE.search(workflow_request)
+    complexity_match = _COMPLEXITY_LINE.search(workflow_request)
+    material = {
+        "request": normalize_request(workflow_request),
+        "workflow_type": type_match.group(1).lower() if type_match else None,
+        "complexity": complexity_match.group(1).lower() if complexity_match else None,
+        "model": model,
+        "registry": registry_hash,
+        "options": options or {},
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    digest: str  # canonical digest of the workflow in the WorkflowStore
+    created: float
+    last_used: float
+
+
+class WorkflowCache:
+    """JSON-file backed LRU cache with TTL expiry for validated workflows.
+
+    Entries are kept in recency order and the least recently used ones are
+    evicted once ``max_entries`` is exceeded. The file is rewritten atomically
+    (temp file + rename) after every mutation so concurrent ComfyUI workers
+    never observe a half-written cache.
+
+    The cache file only maps request keys to canonical digests; the workflows
+    themselves live once each in the cache's own :class:`WorkflowStore`, so
+    requests that produce the same workflow share one blob and rewriting the
+    index stays cheap however large the workflows are. A blob is deleted as
+    soon as no entry references it (eviction, expiry, invalidation), which
+    keeps disk use bounded by ``max_entries`` workflows.
+    """
+
+    FILE_NAME = "workflow_cache.json"
+    BLOB_DIR = "workflow_blobs"
+
+    def __init__(self, cache_dir: Path, max_entries: int = 256, store: WorkflowStore | None = None) -> None:
+        self.path = Path(cache_dir) / self.FILE_NAME
+        self.store = store or WorkflowStore(Path(cache_dir) / self.BLOB_DIR)
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CacheEntry] | None = None
+
+    def _load(self) -> OrderedDict[str, CacheEntry]:
+        if self._entries is not None:
+            return self._entries
+
+        entries: list[tuple[str, CacheEntry]] = []
+        if self.path.exists():
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+                for key, item in raw.get("entries", {}).items():
+                    # Version 1 files inlined the workflow text; move it into the store.
+                    digest = item["digest"] if "digest" in item else self.store.put(item["workflow_json"]).digest
+                    entries.append((key, CacheEntry(digest, float(item["created"]), float(item["last_used"]))))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+                logger.warning("Ignoring unreadable workflow cache at %s: %s", self.path, exc)
+                entries = []
+        entries.sort(key=lambda pair: pair[1].last_used)
+        self._entries = OrderedDict(entries)
+        return self._entries
+
+    def _persist(self) -> None:
+        entries = self._load()
+        payload = {
+            "version": 2,
+            "entries": {
+                key: {"digest": entry.digest, "created": entry.created, "last_used": entry.last_used}
+                for key, entry in entries.items()
+            },
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def _drop(self, key: str) -> CacheEntry | None:
+        """Remove ``key`` and delete its blob unless another entry shares it. Caller holds the lock."""
+
+        entries = self._load()
+        entry = entries.pop(key, None)
+        if entry is not None and all(other.digest != entry.digest for other in entries.values()):
+            self.store.delete(entry.digest)
+        return entry
+
+    def get(self, key: str, ttl_seconds: float | None = None) -> str | None:
+        """Return the cached workflow JSON, or ``None`` when missing/expired."""
+
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            now = time.time()
+            if entry is not None and ttl_seconds and now - entry.created > ttl_seconds:
+                self._drop(key)
+                self._persist()
+                entry = None
+            workflow_json = self.store.get_text(entry.digest) if entry is not None else None
+            if entry is not None and workflow_json is None:
+                logger.warning("Workflow cache entry %s points at missing blob %s", key[:12], entry.digest[:12])
+                self._drop(key)
+                self._persist()
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            # Recency is tracked in memory and flushed with the next write.
+            entry.last_used = now
+            entries.move_to_end(key)
+            self.hits += 1
+            return workflow_json
+
+    def put(self, key: str, workflow_json: str) -> str:
+        """Store a validated workflow, evicting least-recently-used entries.
+
+        Returns the canonical JSON that was stored, which is also what
+        :meth:`get` returns for ``key`` from now on.
+        """
+
+        with self._lock:
+            # Stored under the lock so a concurrent eviction cannot delete a blob we are about to reference.
+            stored = self.store.put(workflow_json)
+            entries = self._load()
+            now = time.time()
+            previous = entries.get(key)
+            entries[key] = CacheEntry(digest=stored.digest, created=now, last_used=now)
+            entries.move_to_end(key)
+            if previous is not None and all(entry.digest != previous.digest for entry in entries.values()):
+                self.store.delete(previous.digest)
+            while len(entries) > self.max_entries:
+                evicted = next(iter(entries))
+                self._drop(evicted)
+                logger.debug("Evicted workflow cache entry %s", evicted[:12])
+            self._persist()
+        return stored.text
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if self._drop(key) is not None:
+                self._persist()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "blobs": len(self.store),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_workflow_cache() -> WorkflowCache:
+    """Return the process-wide cache configured from the environment."""
+
+    config = get_environment_config()
+    return WorkflowCache(config.cache_dir, max_entries=config.workflow_cache_max_entries)
+
+
+__all__ = [
+    "CacheEntry",
+    "WorkflowCache",
+    "normalize_request",
+    "build_request_cache_key",
+    "get_workflow_cache",
+]
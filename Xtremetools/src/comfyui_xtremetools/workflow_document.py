@@ -0,0 +1,101 @@
+"""In-memory workflow document shared by the generation pipeline stages."""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+# Copilot: stages mutate the document in place; call invalidate() after structural edits.
+
+
+class WorkflowDocument:
+    """A parsed ComfyUI workflow with lazily built node and link indexes.
+
+    Post-processing, registry clamping and validation all operate on the same
+    document, so a workflow is parsed once when it enters the pipeline and
+    serialised once when it leaves the node (:meth:`to_json`). The indexes are
+    rebuilt on demand; stages that add or remove nodes/links call
+    :meth:`invalidate` afterwards.
+    """
+
+    __slots__ = ("data", "_nodes_by_id", "_links_by_id")
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise TypeError(f"Workflow document must wrap a JSON object, got {type(data).__name__}")
+        self.data = data
+        self._nodes_by_id: dict[int, dict[str, Any]] | None = None
+        self._links_by_id: dict[int, list[Any]] | None = None
+
+    @classmethod
+    def from_json(cls, text: str | bytes) -> WorkflowDocument:
+        """Parse workflow JSON; raises ``json.JSONDecodeError`` or ``ValueError``."""
+
+        payload = json.loads(text)
+        if not isinstance(payload, dict):
+            raise ValueError(f"Workflow JSON must be an object, got {type(payload).__name__}")
+        return cls(payload)
+
+    @classmethod
+    def coerce(cls, workflow: str | bytes | dict[str, Any] | WorkflowDocument) -> WorkflowDocument:
+        """Return ``workflow`` as a document, parsing or wrapping as needed."""
+
+        if isinstance(workflow, WorkflowDocument):
+            return workflow
+        if isinstance(workflow, dict):
+            return cls(workflow)
+        return cls.from_json(workflow)
+
+    @property
+    def nodes(self) -> list[Any]:
+        nodes = self.data.get("nodes")
+        return nodes if isinstance(nodes, list) else []
+
+    @property
+    def links(self) -> list[Any]:
+        links = self.data.get("links")
+        return links if isinstance(links, list) else []
+
+    @property
+    def nodes_by_id(self) -> dict[int, dict[str, Any]]:
+        """Map of node id -> node dict (later duplicates win, like ``build_node_map``)."""
+
+        if self._nodes_by_id is None:
+            self._nodes_by_id = {node["id"]: node for node in self.nodes if isinstance(node, dict) and "id" in node}
+        return self._nodes_by_id
+
+    @property
+    def links_by_id(self) -> dict[int, list[Any]]:
+        """Map of link id -> link array for well-formed links."""
+
+        if self._links_by_id is None:
+            self._links_by_id = {link[0]: link for link in self.links if isinstance(link, list) and link}
+        return self._links_by_id
+
+    def node(self, node_id: int) -> dict[str, Any] | None:
+        return self.nodes_by_id.get(node_id)
+
+    def link(self, link_id: int) -> list[Any] | None:
+        return self.links_by_id.get(link_id)
+
+    def max_node_id(self) -> int:
+        return max((node_id for node_id in self.nodes_by_id if isinstance(node_id, int)), default=0)
+
+    def max_link_id(self) -> int:
+        return max((link_id for link_id in self.links_by_id if isinstance(link_id, int)), default=0)
+
+    def invalidate(self) -> None:
+        """Drop cached indexes after nodes or links were added, removed or replaced."""
+
+        self._nodes_by_id = None
+        self._links_by_id = None
+
+    def to_json(self, indent: int | None = None) -> str:
+        """Serialise the document; this is the pipeline's only ``json.dumps``."""
+
+        return json.dumps(self.data, indent=indent or None, ensure_ascii=False)
+
+    def __repr__(self) -> str:
+        return f"WorkflowDocument(nodes={len(self.nodes)}, links={len(self.links)})"
+
+
+__all__ = ["WorkflowDocument"]
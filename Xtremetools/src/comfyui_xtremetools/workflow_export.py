@@ -0,0 +1,102 @@
+"""Stream workflow JSON to disk with atomic replacement and optional gzip."""
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .config import get_environment_config
+from .logger import get_logger
+
+# Copilot: never write the target path directly; always temp file + os.replace.
+
+logger = get_logger("xtremetools.workflow_export")
+
+
+@dataclass(slots=True)
+class ExportStats:
+    path: Path
+    json_bytes: int  # uncompressed UTF-8 JSON
+    disk_bytes: int
+    compressed: bool
+    elapsed_ms: float
+
+
+def format_byte_size(size_bytes: int) -> str:
+    """Human-readable size in the bytes/KB/MB style the node info panels use."""
+
+    if size_bytes < 1024:
+        return f"{size_bytes} bytes"
+    if size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.1f} KB"
+    return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+
+def resolve_export_path(output_path: str | Path, compress: bool = False) -> Path:
+    """Resolve relative paths against ``XTREMETOOLS_EXPORT_DIR``; add ``.gz`` when compressing."""
+
+    path = Path(output_path).expanduser()
+    if not path.is_absolute():
+        path = get_environment_config().export_dir / path
+    if compress and path.suffix != ".gz":
+        path = path.with_name(path.name + ".gz")
+    return path
+
+
+def write_workflow_file(
+    data: dict[str, Any],
+    path: str | Path,
+    *,
+    indent: int | None = None,
+    compress: bool = False,
+) -> ExportStats:
+    """Serialise ``data`` straight into ``path`` without building the JSON string.
+
+    The JSON is encoded chunk by chunk into a temp file next to ``path``
+    (gzip-compressed when ``compress``; the gzip header carries no name or
+    timestamp, so equal workflows give equal bytes), then moved into place
+    with ``os.replace``, so readers never see a half-written export.
+
+    Raises:
+        OSError: the directory is not writable or the disk is full.
+    """
+
+    start = time.perf_counter()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    encoder = json.JSONEncoder(indent=indent or None, ensure_ascii=False)
+    try:
+        with open(tmp_path, "wb") as raw:
+            sink: Any = gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0) if compress else raw
+            # The wrapper batches json's many tiny chunks before they reach the file or compressor.
+            text = io.TextIOWrapper(sink, encoding="utf-8", newline="")
+            for chunk in encoder.iterencode(data):
+                text.write(chunk)
+            text.flush()
+            json_bytes = sink.tell()  # GzipFile.tell() counts uncompressed bytes
+            text.detach()
+            if compress:
+                sink.close()  # writes the gzip trailer; ``raw`` stays open until the with block ends
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    stats = ExportStats(
+        path=path,
+        json_bytes=json_bytes,
+        disk_bytes=path.stat().st_size,
+        compressed=compress,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+    )
+    logger.debug("Exported workflow to %s (%s, %.1f ms)", path, format_byte_size(stats.disk_bytes), stats.elapsed_ms)
+    return stats
+
+
+__all__ = ["ExportStats", "format_byte_size", "resolve_export_path", "write_workflow_file"]
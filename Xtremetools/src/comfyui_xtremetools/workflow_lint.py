@@ -0,0 +1,175 @@
+"""Validate a directory of workflow JSON files in parallel."""
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from .logger import get_logger
+from .node_discovery import get_last_fetch_timestamp, install_type_registry, refresh_type_registry
+from .type_registry import TypeRegistry
+from .workflow_validator import validate_workflow_json, validate_workflow_stream
+
+# Copilot: workers must stay picklable; keep per-file work in module-level functions.
+
+logger = get_logger("xtremetools.workflow_lint")
+
+_WORKER_AUTO_FIX = False
+
+# Files at least this large are validated with the streaming reader instead of one in-memory parse.
+STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+
+@dataclass(slots=True)
+class LintResult:
+    """Validation outcome for one file; one JSONL record in the CLI output."""
+
+    path: str
+    status: str  # "ok", "invalid" or "error" (unreadable file)
+    size_bytes: int = 0
+    elapsed_ms: float = 0.0
+    errors: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+
+@dataclass(slots=True)
+class LintSummary:
+    files: int = 0
+    ok: int = 0
+    invalid: int = 0
+    errored: int = 0
+    total_bytes: int = 0
+    elapsed_s: float = 0.0
+
+    def add(self, result: LintResult) -> None:
+        self.files += 1
+        self.total_bytes += result.size_bytes
+        if result.status == "ok":
+            self.ok += 1
+        elif result.status == "invalid":
+            self.invalid += 1
+        else:
+            self.errored += 1
+
+    def render(self) -> str:
+        files_per_s = self.files / self.elapsed_s if self.elapsed_s else 0.0
+        mb_per_s = self.total_bytes / (1024 * 1024) / self.elapsed_s if self.elapsed_s else 0.0
+        return (
+            f"Linted {self.files} files ({self.total_bytes / (1024 * 1024):.1f} MB): {self.ok} ok, "
+            f"{self.invalid} invalid, {self.errored} unreadable in {self.elapsed_s:.2f}s "
+            f"({files_per_s:.1f} files/s, {mb_per_s:.2f} MB/s)"
+        )
+
+
+def iter_workflow_files(roots: Iterable[Path], pattern: str = "*.json") -> Iterator[Path]:
+    """Yield files matching ``pattern`` under each root (recursively), or the root itself if it is a file."""
+
+    for root in roots:
+        root = Path(root)
+        if root.is_file():
+            yield root
+        else:
+            yield from sorted(path for path in root.rglob(pattern) if path.is_file())
+
+
+def lint_file(path: str | Path, auto_fix: bool = False) -> LintResult:
+    """Read and validate one workflow file; never raises.
+
+    Without ``auto_fix`` (which needs the whole document to rewrite it), files
+    of ``STREAM_THRESHOLD_BYTES`` or more go through
+    :func:`validate_workflow_stream` to keep each worker's memory bounded.
+    """
+
+    start = time.perf_counter()
+    try:
+        size = Path(path).stat().st_size
+        if not auto_fix and size >= STREAM_THRESHOLD_BYTES:
+            result = validate_workflow_stream(path)
+        else:
+            raw = Path(path).read_bytes()
+            size = len(raw)
+            result = validate_workflow_json(raw, auto_fix=auto_fix, use_cache=False)
+    except OSError as exc:
+        return LintResult(path=str(path), status="error", errors=[f"Read failed: {exc}"])
+    return LintResult(
+        path=str(path),
+        status="ok" if result.is_valid else "invalid",
+        size_bytes=size,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        errors=result.errors,
+        warnings=result.warnings,
+    )
+
+
+def _init_worker(registry: TypeRegistry, fetched_at: float | None, auto_fix: bool) -> None:
+    global _WORKER_AUTO_FIX
+    install_type_registry(registry, fetched_at)
+    _WORKER_AUTO_FIX = auto_fix
+
+
+def _lint_in_worker(path: str) -> LintResult:
+    return lint_file(path, auto_fix=_WORKER_AUTO_FIX)
+
+
+def lint_workflows(
+    paths: Iterable[Path],
+    *,
+    workers: int | None = None,
+    auto_fix: bool = False,
+    refresh_registry: bool = True,
+    on_result: Callable[[LintResult], None] | None = None,
+) -> LintSummary:
+    """Validate ``paths`` with a process pool, calling ``on_result`` as each file finishes.
+
+    The type registry is refreshed once in this process and shipped to every
+    worker, so all files are checked against the same snapshot instead of one
+    ``/object_info`` fetch per process. Results arrive in input order.
+    ``workers=1`` validates in-process.
+    """
+
+    registry = refresh_type_registry(force=refresh_registry)
+    files = [str(path) for path in paths]
+    workers = max(1, workers or os.cpu_count() or 1)
+    summary = LintSummary()
+    start = time.perf_counter()
+
+    if workers == 1 or len(files) <= 1:
+        results: Iterable[LintResult] = (lint_file(path, auto_fix=auto_fix) for path in files)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(registry, get_last_fetch_timestamp(), auto_fix),
+        )
+        # Small chunks amortise IPC without delaying the streamed output much.
+        results = executor.map(_lint_in_worker, files, chunksize=max(1, min(32, len(files) // (workers * 8))))
+
+    try:
+        for result in results:
+            summary.add(result)
+            if on_result is not None:
+                on_result(result)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    summary.elapsed_s = time.perf_counter() - start
+    logger.debug(summary.render())
+    return summary
+
+
+__all__ = [
+    "STREAM_THRESHOLD_BYTES",
+    "LintResult",
+    "LintSummary",
+    "iter_workflow_files",
+    "lint_file",
+    "lint_workflows",
+]
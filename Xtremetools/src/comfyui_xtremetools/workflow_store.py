@@ -0,0 +1,216 @@
+"""Canonical workflow JSON and a content-addressed on-disk workflow store."""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from .config import get_environment_config
+from .logger import get_logger
+from .workflow_document import WorkflowDocument
+
+# Copilot: bump CANONICAL_VERSION whenever canonical_json output changes; stored digests depend on it.
+
+logger = get_logger("xtremetools.workflow_store")
+
+CANONICAL_VERSION = 1
+
+# Integral floats beyond this are left alone: int() would invent precision the float never had.
+_MAX_EXACT_FLOAT_INT = 2**53
+
+
+def _normalise(value: Any) -> Any:
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"{value!r} has no canonical JSON form")
+        return int(value) if value.is_integer() and abs(value) <= _MAX_EXACT_FLOAT_INT else value
+    if isinstance(value, dict):
+        return {str(key): _normalise(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalise(item) for item in value]
+    return value
+
+
+def canonical_workflow(workflow: str | bytes | dict[str, Any] | WorkflowDocument) -> dict[str, Any]:
+    """Return a normalised copy of ``workflow``; the input is never modified.
+
+    * integral floats become ints (``100.0`` -> ``100``, ``-0.0`` -> ``0``);
+      other floats keep Python's shortest round-trip form;
+    * nodes are ordered by ``id``, links by link id, and every output's
+      ``links`` list ascending, as long as all ids involved are integers.
+
+    Key order is left to the encoder (``sort_keys``). NaN and infinities
+    raise ``ValueError``, as does text that is not a JSON object.
+    """
+
+    data = _normalise(WorkflowDocument.coerce(workflow).data)
+    nodes = data.get("nodes")
+    if isinstance(nodes, list) and all(isinstance(node, dict) and type(node.get("id")) is int for node in nodes):
+        nodes.sort(key=lambda node: node["id"])
+        for node in nodes:
+            for socket in node.get("outputs") or ():
+                links = socket.get("links") if isinstance(socket, dict) else None
+                if isinstance(links, list) and all(type(link_id) is int for link_id in links):
+                    links.sort()
+    links = data.get("links")
+    if isinstance(links, list) and all(isinstance(link, list) and link and type(link[0]) is int for link in links):
+        links.sort(key=lambda link: link[0])
+    return data
+
+
+def canonical_json(workflow: str | bytes | dict[str, Any] | WorkflowDocument) -> str:
+    """Serialise :func:`canonical_workflow` with sorted keys.
+
+    Separators match ``WorkflowDocument.to_json`` (``", "``/``": "``), so
+    canonical text can be handed to downstream nodes as-is.
+    """
+
+    return json.dumps(canonical_workflow(workflow), sort_keys=True, ensure_ascii=False, allow_nan=False)
+
+
+def workflow_digest(workflow: str | bytes | dict[str, Any] | WorkflowDocument) -> str:
+    """sha256 of the canonical JSON: equal for workflows that differ only cosmetically."""
+
+    return hashlib.sha256(canonical_json(workflow).encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class StoredWorkflow:
+    digest: str
+    path: Path
+    size_bytes: int
+    created: bool  # False when an identical workflow was already stored
+    text: str = field(default="", repr=False)  # the canonical JSON
+
+
+class WorkflowStore:
+    """Content-addressed workflow files under ``root``.
+
+    Each workflow is stored once as canonical JSON at
+    ``root/<digest[:2]>/<digest>.json`` (written to a temp file and renamed),
+    and ``index.jsonl`` gets one line per new or deleted blob. Storing a
+    workflow that is already present only costs the canonical encoding and a
+    ``stat``. Blobs are only removed through :meth:`delete`, so a store
+    should have a single owner that knows which digests are still in use:
+    the exporter's shared store never deletes, while the workflow cache keeps
+    its own store and deletes blobs no cache entry references any more.
+    """
+
+    INDEX_NAME = "index.jsonl"
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.index_path = self.root / self.INDEX_NAME
+        self.writes = 0
+        self.dedupe_hits = 0
+        self.deletes = 0
+        self._lock = threading.Lock()
+        self._index: dict[str, dict[str, Any]] | None = None
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def __contains__(self, digest: object) -> bool:
+        return isinstance(digest, str) and self.path_for(digest).exists()
+
+    def _load_index(self) -> dict[str, dict[str, Any]]:
+        if self._index is not None:
+            return self._index
+        index: dict[str, dict[str, Any]] = {}
+        if self.index_path.exists():
+            for line in self.index_path.read_text(encoding="utf-8").splitlines():
+                try:
+                    record = json.loads(line)
+                    if record.get("deleted"):
+                        index.pop(record["digest"], None)
+                    else:
+                        index[record["digest"]] = record
+                except (json.JSONDecodeError, KeyError, TypeError) as exc:
+                    logger.warning("Skipping unreadable workflow store index line: %s", exc)
+        self._index = index
+        return index
+
+    def put(self, workflow: str | bytes | dict[str, Any] | WorkflowDocument) -> StoredWorkflow:
+        """Store ``workflow`` under its canonical digest unless it is already there."""
+
+        text = canonical_json(workflow)
+        encoded = text.encode("utf-8")
+        digest = hashlib.sha256(encoded).hexdigest()
+        path = self.path_for(digest)
+        with self._lock:
+            if path.exists():
+                self.dedupe_hits += 1
+                return StoredWorkflow(digest=digest, path=path, size_bytes=len(encoded), created=False, text=text)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(encoded)
+            os.replace(tmp_path, path)
+            record = {"digest": digest, "bytes": len(encoded), "created": time.time(), "canonical_version": CANONICAL_VERSION}
+            # One short append per new blob; concurrent writers at worst repeat a digest, which loading tolerates.
+            with open(self.index_path, "a", encoding="utf-8") as index_file:
+                index_file.write(json.dumps(record) + "\n")
+            self._load_index()[digest] = record
+            self.writes += 1
+        logger.debug("Stored workflow %s (%s bytes)", digest[:12], len(encoded))
+        return StoredWorkflow(digest=digest, path=path, size_bytes=len(encoded), created=True, text=text)
+
+    def get_text(self, digest: str) -> str | None:
+        """Canonical JSON stored under ``digest``, or ``None`` when it is missing."""
+
+        try:
+            return self.path_for(digest).read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def delete(self, digest: str) -> bool:
+        """Remove the blob stored under ``digest``; returns whether one existed."""
+
+        with self._lock:
+            try:
+                self.path_for(digest).unlink()
+            except FileNotFoundError:
+                return False
+            with open(self.index_path, "a", encoding="utf-8") as index_file:
+                index_file.write(json.dumps({"digest": digest, "deleted": True, "created": time.time()}) + "\n")
+            self._load_index().pop(digest, None)
+            self.deletes += 1
+        logger.debug("Deleted workflow %s", digest[:12])
+        return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load_index())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "blobs": len(self),
+            "writes": self.writes,
+            "dedupe_hits": self.dedupe_hits,
+            "deletes": self.deletes,
+            "root": str(self.root),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_workflow_store() -> WorkflowStore:
+    """Return the process-wide store under ``XTREMETOOLS_CACHE_DIR/store``."""
+
+    return WorkflowStore(get_environment_config().cache_dir / "store")
+
+
+__all__ = [
+    "CANONICAL_VERSION",
+    "StoredWorkflow",
+    "WorkflowStore",
+    "canonical_json",
+    "canonical_workflow",
+    "get_workflow_store",
+    "workflow_digest",
+]
@@ -1,106 +1,449 @@
 """Workflow validation + schema enforcement helpers."""
 from __future__ import annotations
 
-import json
-from typing import Any
+import hashlib
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import IO, Any
 
-from pydantic import BaseModel, Field, ValidationError
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
+from typing_extensions import NotRequired, TypedDict
 
+from .cache_utils import LRUCache
 from .config import get_environment_config
+from .json_stream import JSONMemberReader, StreamParseError
 from .logger import get_logger
+from .node_discovery import current_type_registry
+from .schema_compiler import CompiledSchema, load_compiled_schema
+from .type_registry import TypeRegistry
+from .workflow_document import WorkflowDocument
 
 logger = get_logger("xtremetools.workflow_validator")
 
 # Copilot: generate docstrings + annotations for new validator helpers.
 
 _LAST_VALIDATION_STATE: dict[str, bool | None] = {"passed": None}
-_SCHEMA_CACHE: dict[str, Any] | None = None
 
 
-class SocketModel(BaseModel):
+class SocketPayload(TypedDict):
+    __pydantic_config__ = ConfigDict(extra="allow")  # type: ignore[misc]
+
     name: str
-    type: str | None = None
-    link: int | None = None
-    links: list[int] | None = None
+    type: NotRequired[str | None]
+    link: NotRequired[int | None]
+    links: NotRequired[list[int] | None]
+
 
+class NodePayload(TypedDict):
+    __pydantic_config__ = ConfigDict(extra="allow")  # type: ignore[misc]
 
-class NodeModel(BaseModel):
     id: int
     type: str
-    pos: list[float] | None = None
-    inputs: list[SocketModel] = Field(default_factory=list)
-    outputs: list[SocketModel] = Field(default_factory=list)
+    pos: NotRequired[list[int | float] | None]
+    inputs: NotRequired[list[SocketPayload]]
+    outputs: NotRequired[list[SocketPayload]]
+
+
+class WorkflowPayload(TypedDict):
+    """Shape Pydantic checks before the compiled schema runs; unknown keys are kept as-is.
+
+    Lax like the original ``BaseModel``: ``"1"`` or ``1.0`` for an int field is
+    coerced, not rejected. Callers try ``strict=True`` first, so the coerced
+    copy (and a re-serialisation) is only needed when coercion happens.
+    """
 
+    __pydantic_config__ = ConfigDict(extra="allow")  # type: ignore[misc]
 
-class WorkflowModel(BaseModel):
     last_node_id: int
     last_link_id: int
-    nodes: list[NodeModel] = Field(default_factory=list)
-    links: list[list[Any]] = Field(default_factory=list)
-    groups: list[dict[str, Any]] = Field(default_factory=list)
-    config: dict[str, Any] = Field(default_factory=dict)
-    extra: dict[str, Any] = Field(default_factory=dict)
-    version: float | int | str | None = Field(default=0.4)
+    nodes: NotRequired[list[NodePayload]]
+    links: NotRequired[list[list[Any]]]
+    groups: NotRequired[list[dict[str, Any]]]
+    config: NotRequired[dict[str, Any]]
+    extra: NotRequired[dict[str, Any]]
+    version: NotRequired[int | float | str | None]
+
+
+# Validates straight from str/bytes into plain dicts: one parse, one object graph.
+_WORKFLOW_ADAPTER: TypeAdapter[WorkflowPayload] = TypeAdapter(WorkflowPayload)
+# Per-element shape checks for validate_workflow_stream.
+_NODE_ADAPTER: TypeAdapter[NodePayload] = TypeAdapter(NodePayload)
+_LINK_ADAPTER: TypeAdapter[list[Any]] = TypeAdapter(list[Any])
+# Error-location tags Pydantic appends for each branch of a union (``int | float | str``).
+_UNION_BRANCH_TAGS = frozenset({"int", "float", "str"})
+
+# Top-level fields ComfyUI expects; written into the payload when missing.
+_TOP_LEVEL_DEFAULTS: dict[str, Any] = {"nodes": [], "links": [], "groups": [], "config": {}, "extra": {}, "version": 0.4}
 
 
 class WorkflowValidationResult(BaseModel):
     report: str
     is_valid: bool
-    workflow_json: str
+    workflow_json: str = ""
     errors: list[str] = Field(default_factory=list)
     warnings: list[str] = Field(default_factory=list)
+    # True when auto-fix (or default filling) changed the payload.
+    modified: bool = False
+    # Set by validate_workflow_document; callers serialise it at the node boundary.
+    document: Any = Field(default=None, exclude=True)
 
 
-def _load_schema_text() -> str:
-    config = get_environment_config()
-    path = config.workflow_schema_path
-    if not path.exists():
-        logger.warning("Workflow schema not found at %s", path)
-        return "{}"
-    return path.read_text(encoding="utf-8")
+def _compiled_schema() -> CompiledSchema:
+    """Compiled ``workflow_schema.json``; recompiled only when the file changes."""
 
+    return load_compiled_schema(get_environment_config().workflow_schema_path)
 
-def _ensure_schema_loaded() -> dict[str, Any]:
-    global _SCHEMA_CACHE
-    if _SCHEMA_CACHE is None:
-        try:
-            _SCHEMA_CACHE = json.loads(_load_schema_text())
-        except json.JSONDecodeError as exc:  # pragma: no cover - schema file edited incorrectly
-            logger.error("Workflow schema file corrupted: %s", exc)
-            _SCHEMA_CACHE = {}
-    return _SCHEMA_CACHE
 
+def _fill_missing_sockets(payload: dict[str, Any], warnings: list[str]) -> None:
+    """Give nodes without ``inputs``/``outputs`` empty lists, as ComfyUI does on load."""
+
+    for index, node in enumerate(payload.get("nodes") or []):
+        if not isinstance(node, dict):
+            continue
+        missing = [field for field in ("inputs", "outputs") if field not in node]
+        for field in missing:
+            node[field] = []
+        if missing:
+            warnings.append(f"/nodes/{index}: missing {' and '.join(missing)}; auto-fixing with empty list")
 
-def validate_workflow_json(workflow_json: str, auto_fix: bool = True) -> WorkflowValidationResult:
-    """Validate workflow JSON using Pydantic + schema heuristics."""
 
-    errors: list[str] = []
-    warnings: list[str] = []
-    schema = _ensure_schema_loaded()
+def _format_validation_errors(exc: ValidationError, limit: int = 50, prefix: str = "") -> list[str]:
+    """Render Pydantic errors with the same JSON-pointer paths as the compiled schema.
+
+    A value that fails every branch of a union is reported once per location
+    ("Input should be int or float") rather than once per branch.
+    """
+
+    by_location: dict[tuple[Any, ...], list[str]] = {}
+    branches: dict[tuple[Any, ...], list[str]] = {}
+    for error in exc.errors(include_url=False):
+        loc = tuple(error["loc"])
+        if loc and loc[-1] in _UNION_BRANCH_TAGS:
+            branches.setdefault(loc[:-1], []).append(loc[-1])
+            by_location.setdefault(loc[:-1], [])
+        else:
+            by_location.setdefault(loc, []).append(error["msg"])
+    messages: list[tuple[tuple[Any, ...], str]] = []
+    for loc, msgs in by_location.items():
+        tags = branches.get(loc)
+        if tags:
+            expected = tags[0] if len(tags) == 1 else f"{', '.join(tags[:-1])} or {tags[-1]}"
+            messages.append((loc, f"Input should be {expected}"))
+        messages.extend((loc, msg) for msg in msgs)
+    issues = [
+        f"Schema validation failed: {'/'.join((prefix, *(str(part) for part in loc))) or '/'}: {msg}"
+        for loc, msg in messages[:limit]
+    ]
+    if len(messages) > limit:
+        issues.append(f"Schema validation failed: {len(messages) - limit} more error(s)")
+    return issues
+
+
+@lru_cache(maxsize=1)
+def get_validation_cache() -> LRUCache[str, WorkflowValidationResult]:
+    """Process-wide LRU of validation results keyed by content hash (see :func:`validation_cache_key`)."""
+
+    return LRUCache(get_environment_config().validation_cache_max_entries)
+
+
+def validation_cache_key(workflow_json: str | bytes, auto_fix: bool) -> str:
+    """sha256 of the workflow bytes + schema and type-registry fingerprints + ``auto_fix`` flag.
+
+    The registry is fingerprinted as currently loaded; building a key never
+    triggers an ``/object_info`` fetch.
+    """
+
+    raw = workflow_json.encode("utf-8") if isinstance(workflow_json, str) else workflow_json
+    digest = hashlib.sha256(raw)
+    digest.update(f"|{_compiled_schema().fingerprint}|{current_type_registry().fingerprint()}|{int(auto_fix)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def validate_workflow_json(
+    workflow_json: str | bytes,
+    auto_fix: bool = True,
+    use_cache: bool = True,
+) -> WorkflowValidationResult:
+    """Validate workflow JSON using Pydantic + schema heuristics.
+
+    The text is parsed and shape-checked in one step by a cached
+    ``TypeAdapter`` (no intermediate ``json.loads`` tree plus model graph),
+    and ``workflow_json`` is only re-serialised when auto-fix changed
+    something; otherwise the input text is returned unchanged.
+
+    With ``use_cache`` identical bytes validated under the same schema and
+    ``auto_fix`` flag return a copy of the stored result without re-parsing.
+    """
 
     if not workflow_json.strip():
-        errors.append("workflow_json payload is empty")
-        return WorkflowValidationResult(report="INVALID: empty workflow", is_valid=False, workflow_json="{}", errors=errors)
+        return WorkflowValidationResult(
+            report="INVALID: empty workflow", is_valid=False, workflow_json="{}", errors=["workflow_json payload is empty"]
+        )
+
+    cache = get_validation_cache() if use_cache and get_environment_config().validation_cache_max_entries else None
+    key = validation_cache_key(workflow_json, auto_fix) if cache is not None else ""
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        _LAST_VALIDATION_STATE["passed"] = cached.is_valid and not cached.warnings
+        return cached.model_copy(deep=True)
+
+    result = _validate_workflow_text(workflow_json, auto_fix)
+    if cache is not None:
+        # The stored copy drops the (mutable) document; hits hand out deep copies.
+        cache.put(key, result.model_copy(update={"document": None, "errors": list(result.errors), "warnings": list(result.warnings)}))
+    return result
 
-    try:
-        payload = json.loads(workflow_json)
-    except json.JSONDecodeError as exc:
-        errors.append(f"JSON parse error: {exc}")
-        return WorkflowValidationResult(report="INVALID: parse error", is_valid=False, workflow_json="{}", errors=errors)
 
+def _validate_workflow_text(workflow_json: str | bytes, auto_fix: bool) -> WorkflowValidationResult:
+    coerced = False
     try:
-        workflow = WorkflowModel(**payload)
+        payload = _WORKFLOW_ADAPTER.validate_json(workflow_json, strict=True)
     except ValidationError as exc:
-        errors.append(f"Schema validation failed: {exc}")
-        return WorkflowValidationResult(report="INVALID: schema rejection", is_valid=False, workflow_json=workflow_json, errors=errors)
+        first = exc.errors(include_url=False)[0]
+        if first["type"] == "json_invalid":
+            return WorkflowValidationResult(
+                report="INVALID: parse error", is_valid=False, workflow_json="{}", errors=[f"JSON parse error: {first['msg']}"]
+            )
+        if not first["loc"]:
+            return WorkflowValidationResult(
+                report="INVALID: parse error",
+                is_valid=False,
+                workflow_json="{}",
+                errors=[f"JSON parse error: workflow must be an object ({first['msg']})"],
+            )
+        try:
+            payload = _WORKFLOW_ADAPTER.validate_json(workflow_json)
+        except ValidationError as lax_exc:
+            return WorkflowValidationResult(
+                report="INVALID: schema rejection", is_valid=False, errors=_format_validation_errors(lax_exc)
+            )
+        coerced = True
+
+    document = WorkflowDocument(payload)
+    result = _check_workflow(document, auto_fix=auto_fix)
+    if result.modified or coerced:
+        result.modified = True
+        result.workflow_json = document.to_json()
+    else:
+        result.workflow_json = workflow_json.decode("utf-8") if isinstance(workflow_json, bytes) else workflow_json
+    return result
+
+
+def validate_workflow_document(document: WorkflowDocument, auto_fix: bool = True) -> WorkflowValidationResult:
+    """Validate a parsed workflow in place, without re-serialising it.
+
+    Auto-fixes (``last_node_id``/``last_link_id``) and the top-level defaults
+    ComfyUI expects are written back into ``document``; the result carries the
+    document instead of ``workflow_json`` so the caller decides when to dump it.
+    """
+
+    coerced = False
+    try:
+        _WORKFLOW_ADAPTER.validate_python(document.data, strict=True)
+    except ValidationError:
+        try:
+            payload = _WORKFLOW_ADAPTER.validate_python(document.data)
+        except ValidationError as exc:
+            return WorkflowValidationResult(
+                report="INVALID: schema rejection", is_valid=False, errors=_format_validation_errors(exc), document=document
+            )
+        document.data.clear()
+        document.data.update(payload)
+        document.invalidate()
+        coerced = True
+    result = _check_workflow(document, auto_fix=auto_fix)
+    result.modified = result.modified or coerced
+    return result
+
+
+def _find_cycle(successors: dict[int, list[int]]) -> list[int] | None:
+    """Iterative three-colour DFS; returns one cycle as a closed node path, or None."""
+
+    state: dict[int, int] = {}  # 1 = on the current path, 2 = finished
+    for root in successors:
+        if root in state:
+            continue
+        path = [root]
+        stack = [iter(successors[root])]
+        state[root] = 1
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                state[path.pop()] = 2
+                stack.pop()
+                continue
+            mark = state.get(child)
+            if mark == 1:
+                return path[path.index(child) :] + [child]
+            if mark is None:
+                state[child] = 1
+                path.append(child)
+                stack.append(iter(successors.get(child, ())))
+    return None
+
+
+# Compact socket index per node: ((input type, link id), ...), ((output type, (link ids...)), ...).
+_NodeSockets = tuple[tuple[tuple[Any, Any], ...], tuple[tuple[Any, tuple[Any, ...]], ...]]
+# Link rows without the id: (source id, source slot, target id, target slot, type).
+_LinkRow = tuple[Any, Any, Any, Any, Any]
+
+
+# Link fields that must be integers before the graph checks compare or index with them.
+_LINK_INT_FIELDS = ((0, "id"), (1, "source node id"), (2, "source slot"), (3, "target node id"), (4, "target slot"))
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _malformed_link_fields(link: list[Any], index: int) -> list[str]:
+    """One error per id/slot field of a 6-field link that is not an integer; such links are not indexed."""
+
+    label = link[0] if _is_int(link[0]) else index
+    return [f"Link {label}: {name} must be an integer" for position, name in _LINK_INT_FIELDS if not _is_int(link[position])]
+
+
+def _node_sockets(node: dict[str, Any]) -> _NodeSockets:
+    return (
+        tuple((socket.get("type"), socket.get("link")) for socket in node.get("inputs") or ()),
+        tuple((socket.get("type"), tuple(socket.get("links") or ())) for socket in node.get("outputs") or ()),
+    )
+
+
+def check_graph_integrity(payload: dict[str, Any], registry: TypeRegistry) -> list[str]:
+    """Check that sockets, links and types agree and that the graph is acyclic.
+
+    Builds one hash index over nodes and one over links, then walks every
+    link and every socket reference once, so the pass is O(V + E):
+
+    * node ids and link ids, endpoints and slots are integers;
+    * no duplicate node ids;
+    * link slots are in range of the source outputs / target inputs;
+    * ``links`` and ``inputs[].link`` / ``outputs[].links`` reference each other;
+    * socket types are compatible under ``registry`` (``*`` matches anything);
+    * following links never returns to a node.
+    """
+
+    errors: list[str] = []
+    nodes_by_id: dict[int, _NodeSockets] = {}
+    for index, node in enumerate(payload.get("nodes", [])):
+        if not _is_int(node.get("id")):
+            errors.append(f"Node {index}: id must be an integer")
+            continue
+        if node["id"] in nodes_by_id:
+            errors.append(f"Duplicate node ID {node['id']}")
+        nodes_by_id[node["id"]] = _node_sockets(node)
+    links_by_id: dict[Any, _LinkRow] = {}
+    for index, link in enumerate(payload.get("links", [])):
+        if not isinstance(link, list) or len(link) != 6:
+            continue  # reported as malformed by the caller / schema
+        malformed = _malformed_link_fields(link, index)
+        if malformed:
+            errors.extend(malformed)
+            continue
+        links_by_id[link[0]] = tuple(link[1:])
+    errors.extend(_check_indexed_graph(nodes_by_id, links_by_id, registry))
+    return errors
+
+
+def _link_issues(
+    link_id: Any,
+    row: _LinkRow,
+    nodes_by_id: dict[int, _NodeSockets],
+    registry: TypeRegistry,
+) -> list[str]:
+    """Slot range, socket listing and type checks of one link against its endpoint nodes."""
+
+    source_id, source_slot, target_id, target_slot, link_type = row
+    source, target = nodes_by_id.get(source_id), nodes_by_id.get(target_id)
+    if source is None or target is None:
+        return []  # reported as an unknown node
+    errors: list[str] = []
+    outputs, inputs = source[1], target[0]
+    if not 0 <= source_slot < len(outputs):
+        errors.append(f"Link {link_id} source slot {source_slot} out of range for node {source_id} ({len(outputs)} outputs)")
+    if not 0 <= target_slot < len(inputs):
+        errors.append(f"Link {link_id} target slot {target_slot} out of range for node {target_id} ({len(inputs)} inputs)")
+    if errors:
+        return errors
+    (output_type, output_links), (input_type, input_link) = outputs[source_slot], inputs[target_slot]
+    if link_id not in output_links:
+        errors.append(f"Link {link_id} not listed in source node {source_id} output {source_slot} links")
+    if input_link != link_id:
+        errors.append(f"Link {link_id} not listed in target node {target_id} input {target_slot}")
+    source_type = output_type or link_type
+    if source_type and input_type and "*" not in (source_type, input_type):
+        if not registry.is_link_allowed(source_type, input_type):
+            errors.append(f"Link {link_id} connects incompatible types {source_type} -> {input_type}")
+    return errors
+
+
+def _socket_issues(node_id: int, sockets: _NodeSockets, links_by_id: dict[Any, _LinkRow]) -> list[str]:
+    """Check that every link a node's sockets name exists and points back at that socket."""
+
+    errors: list[str] = []
+    inputs, outputs = sockets
+    for slot, (_, link_id) in enumerate(inputs):
+        if link_id is None:
+            continue
+        link = links_by_id.get(link_id)
+        if link is None:
+            errors.append(f"Node {node_id} input {slot} references missing link {link_id}")
+        elif (link[2], link[3]) != (node_id, slot):
+            errors.append(f"Node {node_id} input {slot} references link {link_id}, which targets node {link[2]} input {link[3]}")
+    for slot, (_, output_links) in enumerate(outputs):
+        for link_id in output_links:
+            link = links_by_id.get(link_id)
+            if link is None:
+                errors.append(f"Node {node_id} output {slot} references missing link {link_id}")
+            elif (link[0], link[1]) != (node_id, slot):
+                errors.append(f"Node {node_id} output {slot} references link {link_id}, which starts at node {link[0]} output {link[1]}")
+    return errors
+
+
+def _check_indexed_graph(
+    nodes_by_id: dict[int, _NodeSockets],
+    links_by_id: dict[Any, _LinkRow],
+    registry: TypeRegistry,
+) -> list[str]:
+    """The checks of :func:`check_graph_integrity` over prebuilt node and link indexes."""
 
-    node_ids = {node.id for node in workflow.nodes}
+    errors: list[str] = []
+    successors: dict[int, list[int]] = {node_id: [] for node_id in nodes_by_id}
+    for link_id, row in links_by_id.items():
+        if row[0] in nodes_by_id and row[2] in nodes_by_id:
+            successors[row[0]].append(row[2])
+        errors.extend(_link_issues(link_id, row, nodes_by_id, registry))
+    for node_id, sockets in nodes_by_id.items():
+        errors.extend(_socket_issues(node_id, sockets, links_by_id))
+
+    cycle = _find_cycle(successors)
+    if cycle:
+        errors.append(f"Cycle detected: {' -> '.join(str(node_id) for node_id in cycle)}")
+    return errors
+
+
+def _check_workflow(document: WorkflowDocument, auto_fix: bool) -> WorkflowValidationResult:
+    """Link/id checks, auto-fixes and the compiled schema over an already shape-checked payload."""
+
+    errors: list[str] = []
+    warnings: list[str] = []
+    schema = _compiled_schema()
+    payload = document.data
+    nodes = payload.get("nodes", [])
+    links = payload.get("links", [])
+    modified = False
+
+    node_ids = {node["id"] for node in nodes if _is_int(node.get("id"))}
     link_ids = set()
 
-    for index, link in enumerate(workflow.links):
+    for index, link in enumerate(links):
         if len(link) != 6:
             errors.append(f"Link {index} malformed: expected 6 fields")
             continue
+        if _malformed_link_fields(link, index):
+            continue  # reported by check_graph_integrity below
         link_id = link[0]
         if link_id in link_ids:
             errors.append(f"Duplicate link id {link_id}")
@@ -114,30 +457,42 @@ def validate_workflow_json(workflow_json: str, auto_fix: bool = True) -> Workflo
     if not errors and auto_fix:
         last_node_expected = max(node_ids, default=0)
         last_link_expected = max(link_ids, default=0)
-        if workflow.last_node_id < last_node_expected:
+        if payload["last_node_id"] < last_node_expected:
             warnings.append(
-                f"last_node_id ({workflow.last_node_id}) < highest node id ({last_node_expected}); auto-fixing"
+                f"last_node_id ({payload['last_node_id']}) < highest node id ({last_node_expected}); auto-fixing"
             )
-            workflow.last_node_id = last_node_expected
-        if workflow.last_link_id < last_link_expected:
+            payload["last_node_id"] = last_node_expected
+            modified = True
+        if payload["last_link_id"] < last_link_expected:
             warnings.append(
-                f"last_link_id ({workflow.last_link_id}) < highest link id ({last_link_expected}); auto-fixing"
+                f"last_link_id ({payload['last_link_id']}) < highest link id ({last_link_expected}); auto-fixing"
             )
-            workflow.last_link_id = last_link_expected
+            payload["last_link_id"] = last_link_expected
+            modified = True
 
     report_lines = [
         "XTREMETOOLS WORKFLOW VALIDATION",
         "===============================",
-        f"Nodes: {len(workflow.nodes)}",
-        f"Links: {len(workflow.links)}",
-        f"last_node_id: {workflow.last_node_id}",
-        f"last_link_id: {workflow.last_link_id}",
+        f"Nodes: {len(nodes)}",
+        f"Links: {len(links)}",
+        f"last_node_id: {payload['last_node_id']}",
+        f"last_link_id: {payload['last_link_id']}",
     ]
 
-    required_fields = schema.get("required", []) if isinstance(schema, dict) else []
-    for field in required_fields:
+    for field in schema.required:
         if field not in payload:
             errors.append(f"Missing top-level required field: {field}")
+    if auto_fix:
+        socket_warnings = len(warnings)
+        _fill_missing_sockets(payload, warnings)
+        modified = modified or len(warnings) > socket_warnings
+    errors.extend(check_graph_integrity(payload, current_type_registry()))
+    # Top-level required fields are reported above in their established wording.
+    errors.extend(
+        f"Schema: {issue}"
+        for issue in schema.validate(payload)
+        if not issue.startswith("/: missing required property")
+    )
 
     if errors:
         for issue in errors:
@@ -149,16 +504,513 @@ def validate_workflow_json(workflow_json: str, auto_fix: bool = True) -> Workflo
     is_valid = not errors
     _LAST_VALIDATION_STATE["passed"] = is_valid and not warnings
 
-    updated_json = workflow.model_dump_json(by_alias=True)
+    for field, default in _TOP_LEVEL_DEFAULTS.items():
+        if field not in payload:
+            payload[field] = type(default)() if isinstance(default, (list, dict)) else default
+            modified = True
     return WorkflowValidationResult(
         report="\n".join(report_lines),
         is_valid=is_valid,
-        workflow_json=updated_json,
         errors=errors,
         warnings=warnings,
+        modified=modified,
+        document=document,
     )
 
 
+def validate_workflow_stream(
+    source: str | os.PathLike[str] | IO[Any],
+    *,
+    chunk_size: int = 1 << 16,
+    max_errors: int = 200,
+) -> WorkflowValidationResult:
+    """Validate a workflow file node by node without building the whole tree.
+
+    ``source`` is a path or an open file (binary or text). Nodes and links are
+    decoded one element at a time and checked against the Pydantic shape and
+    the compiled schema, then reduced to compact socket/link indexes; the
+    graph checks of :func:`check_graph_integrity` run over those indexes once
+    the stream ends. Memory therefore grows with the number of sockets and
+    links, not with widget values, properties or other per-node payload.
+
+    Nothing is rewritten: counters that auto-fix would raise are reported as
+    warnings and ``workflow_json`` stays empty. At most ``max_errors`` errors
+    are kept; the rest are counted.
+    """
+
+    schema = _compiled_schema()
+    errors: list[str] = []
+    warnings: list[str] = []
+    suppressed = 0
+
+    def add_errors(issues: list[str]) -> None:
+        nonlocal suppressed
+        room = max(0, max_errors - len(errors))
+        errors.extend(issues[:room])
+        suppressed += len(issues) - len(issues[:room])
+
+    top_level: dict[str, Any] = {}
+    nodes_by_id: dict[int, _NodeSockets] = {}
+    links_by_id: dict[Any, _LinkRow] = {}
+    node_count = link_count = 0
+
+    handle = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        reader = JSONMemberReader(handle, stream_keys=("nodes", "links"), chunk_size=chunk_size)
+        for key, index, value in reader.events():
+            if index is None:
+                top_level[key] = value
+            elif key == "nodes":
+                node_count += 1
+                try:
+                    value = _NODE_ADAPTER.validate_python(value)
+                except ValidationError as exc:
+                    add_errors(_format_validation_errors(exc, limit=10, prefix=f"/nodes/{index}"))
+                    continue
+                add_errors([f"Schema: {issue}" for issue in schema.validate_item("nodes", index, value, max_errors=10)])
+                if value["id"] in nodes_by_id:
+                    add_errors([f"Duplicate node ID {value['id']}"])
+                nodes_by_id[value["id"]] = _node_sockets(value)
+            else:
+                link_count += 1
+                try:
+                    _LINK_ADAPTER.validate_python(value)
+                except ValidationError as exc:
+                    add_errors(_format_validation_errors(exc, limit=10, prefix=f"/links/{index}"))
+                    continue
+                add_errors([f"Schema: {issue}" for issue in schema.validate_item("links", index, value, max_errors=10)])
+                if len(value) != 6:
+                    add_errors([f"Link {index} malformed: expected 6 fields"])
+                    continue
+                malformed = _malformed_link_fields(value, index)
+                if malformed:
+                    add_errors(malformed)
+                    continue
+                if value[0] in links_by_id:
+                    add_errors([f"Duplicate link id {value[0]}"])
+                links_by_id[value[0]] = tuple(value[1:])
+    except StreamParseError as exc:
+        return WorkflowValidationResult(report="INVALID: parse error", is_valid=False, errors=[f"JSON parse error: {exc}"])
+    except OSError as exc:
+        return WorkflowValidationResult(report="INVALID: read error", is_valid=False, errors=[f"Could not read workflow: {exc}"])
+    finally:
+        if handle is not source:
+            handle.close()
+
+    for link_id, (source_id, _, target_id, _, _) in links_by_id.items():
+        if source_id not in nodes_by_id:
+            add_errors([f"Link {link_id} references unknown source node {source_id}"])
+        if target_id not in nodes_by_id:
+            add_errors([f"Link {link_id} references unknown target node {target_id}"])
+
+    try:
+        top_level = dict(_WORKFLOW_ADAPTER.validate_python(top_level))
+    except ValidationError as exc:
+        add_errors(_format_validation_errors(exc))
+    else:
+        if not errors:
+            for field, kind, highest in (
+                ("last_node_id", "node", max(nodes_by_id, default=0)),
+                ("last_link_id", "link", max(links_by_id, default=0)),
+            ):
+                if top_level[field] < highest:
+                    warnings.append(f"{field} ({top_level[field]}) < highest {kind} id ({highest})")
+        add_errors([f"Missing top-level required field: {field}" for field in schema.required if field not in top_level])
+        # Streamed arrays are stand-in empty lists here; their items were checked above.
+        add_errors(
+            [f"Schema: {issue}" for issue in schema.validate(top_level) if not issue.startswith("/: missing required property")]
+        )
+    add_errors(_check_indexed_graph(nodes_by_id, links_by_id, current_type_registry()))
+    if suppressed:
+        errors.append(f"{suppressed} more error(s) not shown")
+
+    report_lines = [
+        "XTREMETOOLS WORKFLOW VALIDATION",
+        "===============================",
+        f"Nodes: {node_count}",
+        f"Links: {link_count}",
+        f"last_node_id: {top_level.get('last_node_id')}",
+        f"last_link_id: {top_level.get('last_link_id')}",
+        f"Streamed: {reader.bytes_read} bytes",
+        *(f"ERROR: {issue}" for issue in errors),
+        *(f"WARN: {warn}" for warn in warnings),
+    ]
+    is_valid = not errors
+    _LAST_VALIDATION_STATE["passed"] = is_valid and not warnings
+    return WorkflowValidationResult(report="\n".join(report_lines), is_valid=is_valid, errors=errors, warnings=warnings)
+
+
+@dataclass(slots=True)
+class WorkflowDiff:
+    """Edits since a :class:`ValidationState` was built, keyed by id.
+
+    ``nodes`` / ``links`` map an id to the new node dict / link array, or to
+    ``None`` when it was deleted; ``top_level`` holds changed top-level
+    fields such as ``last_node_id``.
+    """
+
+    nodes: dict[int, dict[str, Any] | None] = field(default_factory=dict)
+    links: dict[Any, list[Any] | None] = field(default_factory=dict)
+    top_level: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class ValidationState:
+    """Compact indexes and per-node/per-link issues of a validated workflow.
+
+    Built by :func:`build_validation_state` and updated in place by
+    :func:`validate_workflow_diff`. Issues are keyed by the node or link they
+    belong to, so an edit only replaces the entries it can affect. A
+    topological rank of the nodes is kept so a new link is checked for cycles
+    by searching only between its endpoints' ranks.
+    """
+
+    registry: TypeRegistry
+    top_level: dict[str, Any] = field(default_factory=dict)
+    nodes: dict[int, _NodeSockets] = field(default_factory=dict)
+    links: dict[Any, _LinkRow] = field(default_factory=dict)
+    # node id -> ids of links whose row names it as source or target
+    endpoint_links: dict[int, set[Any]] = field(default_factory=dict)
+    # link id -> ids of nodes whose sockets name it
+    socket_refs: dict[Any, set[int]] = field(default_factory=dict)
+    # Graph edges: link id -> (source, target) for links whose endpoints both exist.
+    edges: dict[Any, tuple[int, int]] = field(default_factory=dict)
+    successors: dict[int, dict[int, int]] = field(default_factory=dict)
+    predecessors: dict[int, dict[int, int]] = field(default_factory=dict)
+    # Topological rank per node; None while the graph has a cycle.
+    rank: dict[int, int] | None = field(default_factory=dict)
+    next_rank: int = 0
+    max_node_id: int = 0
+    max_link_id: int = 0
+    issues: dict[tuple[str, Any], list[str]] = field(default_factory=dict)
+
+    def _set_issues(self, key: tuple[str, Any], issues: list[str]) -> None:
+        if issues:
+            self.issues[key] = issues
+        else:
+            self.issues.pop(key, None)
+
+    def _index_node(self, node_id: int, node: Any, label: Any, schema: CompiledSchema) -> None:
+        try:
+            node = _NODE_ADAPTER.validate_python(node)
+        except ValidationError as exc:
+            self._set_issues(("node-shape", node_id), _format_validation_errors(exc, limit=10, prefix=f"/nodes/{label}"))
+            return
+        issues = [f"Schema: {issue}" for issue in schema.validate_item("nodes", label, node, max_errors=10)]
+        if node["id"] != node_id and not isinstance(node_id, tuple):
+            issues.append(f"Node {node_id} was replaced by a node with id {node['id']}")
+        self._set_issues(("node-shape", node_id), issues)
+        sockets = _node_sockets(node)
+        self.nodes[node_id] = sockets
+        for link_id in _socket_link_ids(sockets):
+            self.socket_refs.setdefault(link_id, set()).add(node_id)
+        if self.rank is not None and node_id not in self.rank:
+            self.rank[node_id] = self.next_rank
+            self.next_rank += 1
+        if isinstance(node_id, int):
+            self.max_node_id = max(self.max_node_id, node_id)
+
+    def _drop_node(self, node_id: int) -> None:
+        self.issues.pop(("node-shape", node_id), None)
+        self.issues.pop(("duplicate", node_id), None)
+        sockets = self.nodes.pop(node_id, None)
+        if sockets is None:
+            return
+        for link_id in _socket_link_ids(sockets):
+            referrers = self.socket_refs.get(link_id)
+            if referrers is not None:
+                referrers.discard(node_id)
+                if not referrers:
+                    del self.socket_refs[link_id]
+
+    def _index_link(self, link_id: Any, link: Any, label: Any, schema: CompiledSchema) -> None:
+        try:
+            _LINK_ADAPTER.validate_python(link)
+        except ValidationError as exc:
+            self._set_issues(("link-shape", link_id), _format_validation_errors(exc, limit=10, prefix=f"/links/{label}"))
+            return
+        issues = [f"Schema: {issue}" for issue in schema.validate_item("links", label, link, max_errors=10)]
+        malformed: list[str] = []
+        if len(link) != 6:
+            issues.append(f"Link {label} malformed: expected 6 fields")
+        else:
+            malformed = _malformed_link_fields(link, label)
+            issues.extend(malformed)
+            if link[0] != link_id and not isinstance(link_id, tuple):
+                issues.append(f"Link {link_id} was replaced by a link with id {link[0]}")
+        self._set_issues(("link-shape", link_id), issues)
+        if len(link) != 6 or malformed:
+            return
+        row = tuple(link[1:])
+        self.links[link_id] = row
+        self.endpoint_links.setdefault(row[0], set()).add(link_id)
+        self.endpoint_links.setdefault(row[2], set()).add(link_id)
+        if isinstance(link_id, int):
+            self.max_link_id = max(self.max_link_id, link_id)
+
+    def _drop_link(self, link_id: Any) -> None:
+        self.issues.pop(("link-shape", link_id), None)
+        row = self.links.pop(link_id, None)
+        if row is None:
+            return
+        for node_id in (row[0], row[2]):
+            linked = self.endpoint_links.get(node_id)
+            if linked is not None:
+                linked.discard(link_id)
+                if not linked:
+                    del self.endpoint_links[node_id]
+
+    def _check_top_level(self, schema: CompiledSchema) -> None:
+        try:
+            self.top_level = dict(_WORKFLOW_ADAPTER.validate_python(self.top_level))
+        except ValidationError as exc:
+            self._set_issues(("top", None), _format_validation_errors(exc))
+            return
+        issues = [f"Missing top-level required field: {name}" for name in schema.required if name not in self.top_level]
+        issues.extend(
+            f"Schema: {issue}" for issue in schema.validate(self.top_level) if not issue.startswith("/: missing required property")
+        )
+        self._set_issues(("top", None), issues)
+
+    def _sync_edge(self, link_id: Any) -> tuple[bool, tuple[int, int] | None]:
+        """Bring the graph edge of ``link_id`` in line with its row; returns (edge removed, edge added)."""
+
+        row = self.links.get(link_id)
+        wanted = (row[0], row[2]) if row is not None and row[0] in self.nodes and row[2] in self.nodes else None
+        current = self.edges.get(link_id)
+        if wanted == current:
+            return False, None
+        if current is not None:
+            del self.edges[link_id]
+            source, target = current
+            for table, key, other in ((self.successors, source, target), (self.predecessors, target, source)):
+                counts = table[key]
+                counts[other] -= 1
+                if not counts[other]:
+                    del counts[other]
+        if wanted is not None:
+            self.edges[link_id] = wanted
+            source, target = wanted
+            successors = self.successors.setdefault(source, {})
+            successors[target] = successors.get(target, 0) + 1
+            predecessors = self.predecessors.setdefault(target, {})
+            predecessors[source] = predecessors.get(source, 0) + 1
+        return current is not None, wanted
+
+    def _check_link(self, link_id: Any) -> None:
+        row = self.links.get(link_id)
+        if row is None:
+            self.issues.pop(("link", link_id), None)
+            return
+        issues = [
+            f"Link {link_id} references unknown {role} node {node_id}"
+            for role, node_id in (("source", row[0]), ("target", row[2]))
+            if node_id not in self.nodes
+        ]
+        issues.extend(_link_issues(link_id, row, self.nodes, self.registry))
+        self._set_issues(("link", link_id), issues)
+
+    def _check_node(self, node_id: int) -> None:
+        sockets = self.nodes.get(node_id)
+        self._set_issues(("node", node_id), _socket_issues(node_id, sockets, self.links) if sockets is not None else [])
+
+    def _order_after(self, source: int, target: int) -> list[int] | None:
+        """Keep ``rank`` topological after adding ``source -> target``; returns a cycle if one closes.
+
+        Pearce-Kelly: only nodes ranked between ``target`` and ``source`` are visited.
+        """
+
+        assert self.rank is not None
+        rank = self.rank
+        if source == target:
+            return [source, source]
+        lower, upper = rank[target], rank[source]
+        if upper < lower:
+            return None
+        parents: dict[int, int | None] = {target: None}
+        stack = [target]
+        while stack:
+            node_id = stack.pop()
+            for child in self.successors.get(node_id, ()):
+                if child == source:
+                    path = [node_id]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])  # type: ignore[arg-type]
+                    return [source, *reversed(path), source]
+                if child not in parents and rank[child] < upper:
+                    parents[child] = node_id
+                    stack.append(child)
+        backward = {source}
+        stack = [source]
+        while stack:
+            node_id = stack.pop()
+            for parent in self.predecessors.get(node_id, ()):
+                if parent not in backward and rank[parent] > lower:
+                    backward.add(parent)
+                    stack.append(parent)
+        moved = sorted(backward, key=rank.__getitem__) + sorted(parents, key=rank.__getitem__)
+        for node_id, slot in zip(moved, sorted(rank[node_id] for node_id in moved)):
+            rank[node_id] = slot
+        return None
+
+    def _recheck_cycles(self) -> None:
+        """Full cycle check; also rebuilds the topological rank when the graph is acyclic."""
+
+        cycle = _find_cycle({node_id: list(self.successors.get(node_id, ())) for node_id in self.nodes})
+        if cycle:
+            self.rank = None
+            self.issues[("cycle", None)] = [f"Cycle detected: {' -> '.join(str(node_id) for node_id in cycle)}"]
+            return
+        self.issues.pop(("cycle", None), None)
+        indegree = {node_id: len(self.predecessors.get(node_id, ())) for node_id in self.nodes}
+        ready = [node_id for node_id, degree in indegree.items() if not degree]
+        self.rank = {}
+        while ready:
+            node_id = ready.pop()
+            self.rank[node_id] = len(self.rank)
+            for child in self.successors.get(node_id, ()):
+                indegree[child] -= 1
+                if not indegree[child]:
+                    ready.append(child)
+        self.next_rank = len(self.rank)
+
+    def _refresh(self, nodes: set[int], links: set[Any], full_cycle_check: bool = False) -> None:
+        removed_edge = False
+        added: list[tuple[int, int]] = []
+        for link_id in links:
+            removed, edge = self._sync_edge(link_id)
+            removed_edge = removed_edge or removed
+            if edge is not None:
+                added.append(edge)
+            self._check_link(link_id)
+        for node_id in nodes:
+            self._check_node(node_id)
+            if node_id not in self.nodes:
+                self.successors.pop(node_id, None)
+                self.predecessors.pop(node_id, None)
+                if self.rank is not None:
+                    self.rank.pop(node_id, None)
+
+        if full_cycle_check or (self.rank is None and removed_edge):
+            self._recheck_cycles()
+        elif self.rank is not None:
+            for source, target in added:
+                cycle = self._order_after(source, target)
+                if cycle:
+                    self.rank = None
+                    self.issues[("cycle", None)] = [f"Cycle detected: {' -> '.join(str(node_id) for node_id in cycle)}"]
+                    break
+
+    def result(self) -> WorkflowValidationResult:
+        """Current verdict as a :class:`WorkflowValidationResult` (no ``workflow_json``)."""
+
+        errors = [issue for issues in self.issues.values() for issue in issues]
+        warnings = [
+            f"{name} ({self.top_level[name]}) < highest {kind} id ({highest})"
+            for name, kind, highest in (("last_node_id", "node", self.max_node_id), ("last_link_id", "link", self.max_link_id))
+            if isinstance(self.top_level.get(name), int) and self.top_level[name] < highest
+        ]
+        report_lines = [
+            "XTREMETOOLS WORKFLOW VALIDATION",
+            "===============================",
+            f"Nodes: {len(self.nodes)}",
+            f"Links: {len(self.links)}",
+            f"last_node_id: {self.top_level.get('last_node_id')}",
+            f"last_link_id: {self.top_level.get('last_link_id')}",
+            *(f"ERROR: {issue}" for issue in errors),
+            *(f"WARN: {warn}" for warn in warnings),
+        ]
+        is_valid = not errors
+        _LAST_VALIDATION_STATE["passed"] = is_valid and not warnings
+        return WorkflowValidationResult(report="\n".join(report_lines), is_valid=is_valid, errors=errors, warnings=warnings)
+
+
+def _socket_link_ids(sockets: _NodeSockets) -> set[Any]:
+    inputs, outputs = sockets
+    return {link for _, link in inputs if link is not None} | {link for _, links in outputs for link in links}
+
+
+def build_validation_state(
+    workflow: str | bytes | dict[str, Any] | WorkflowDocument,
+    registry: TypeRegistry | None = None,
+) -> ValidationState:
+    """Run a full validation and keep its indexes for :func:`validate_workflow_diff`.
+
+    The state holds compact socket/link indexes, not the workflow itself, and
+    checks links against ``registry`` (the currently loaded registry by default) for its
+    whole lifetime. Raises ``json.JSONDecodeError``/``ValueError`` when
+    ``workflow`` is not a JSON object.
+    """
+
+    document = WorkflowDocument.coerce(workflow)
+    try:
+        # Index the coerced copy ("1" -> 1), as validate_workflow_json would.
+        document = WorkflowDocument(_WORKFLOW_ADAPTER.validate_python(document.data))
+    except ValidationError:
+        pass  # per-node/per-link shape errors are reported while indexing
+    schema = _compiled_schema()
+    state = ValidationState(registry=registry or current_type_registry())
+    state.top_level = {
+        key: [] if key in ("nodes", "links") and isinstance(value, list) else value for key, value in document.data.items()
+    }
+    state._check_top_level(schema)
+
+    for index, node in enumerate(document.nodes):
+        node_id = node.get("id") if isinstance(node, dict) else None
+        if not isinstance(node_id, int):
+            state._index_node(("row", index), node, index, schema)  # type: ignore[arg-type]
+            continue
+        if node_id in state.nodes:
+            state.issues[("duplicate", node_id)] = [f"Duplicate node ID {node_id}"]
+            state._drop_node(node_id)
+        state._index_node(node_id, node, index, schema)
+    for index, link in enumerate(document.links):
+        link_id = link[0] if isinstance(link, list) and len(link) == 6 and isinstance(link[0], int) else ("row", index)
+        if link_id in state.links:
+            state.issues[("link-duplicate", link_id)] = [f"Duplicate link id {link_id}"]
+            state._drop_link(link_id)
+        state._index_link(link_id, link, index, schema)
+
+    state._refresh(set(state.nodes), set(state.links), full_cycle_check=True)
+    return state
+
+
+def validate_workflow_diff(state: ValidationState, diff: WorkflowDiff) -> WorkflowValidationResult:
+    """Apply ``diff`` to ``state`` and re-check only what it can affect.
+
+    Changed nodes are re-checked together with the links that start or end at
+    them; changed links together with the nodes whose sockets name them. A
+    new edge is placed in the topological rank by a search bounded by its
+    endpoints' ranks, and the full cycle search only runs again when edges
+    are removed from a graph that had a cycle. A single-link edit is
+    therefore independent of the graph size.
+
+    Node and link schema paths use the id in place of the array index.
+    """
+
+    schema = _compiled_schema()
+    nodes: set[int] = set()
+    links: set[Any] = set()
+    for node_id, node in diff.nodes.items():
+        links |= state.endpoint_links.get(node_id, set())
+        state._drop_node(node_id)
+        if node is not None:
+            state._index_node(node_id, node, node_id, schema)
+        nodes.add(node_id)
+    for link_id, link in diff.links.items():
+        nodes |= state.socket_refs.get(link_id, set())
+        state.issues.pop(("link-duplicate", link_id), None)
+        state._drop_link(link_id)
+        if link is not None:
+            state._index_link(link_id, link, link_id, schema)
+        links.add(link_id)
+    if diff.top_level:
+        state.top_level.update(diff.top_level)
+        state._check_top_level(schema)
+    state._refresh(nodes, links)
+    return state.result()
+
+
 def get_last_validation_passed() -> bool | None:
     return _LAST_VALIDATION_STATE["passed"]
 
@@ -166,5 +1018,14 @@ def get_last_validation_passed() -> bool | None:
 __all__ = [
     "WorkflowValidationResult",
     "validate_workflow_json",
+    "validate_workflow_document",
+    "validate_workflow_stream",
+    "WorkflowDiff",
+    "ValidationState",
+    "build_validation_state",
+    "validate_workflow_diff",
+    "validation_cache_key",
+    "get_validation_cache",
+    "check_graph_integrity",
     "get_last_validation_passed",
 ]
@@ -0,0 +1,66 @@
+"""CLI helper to generate many workflows from a JSONL file of requests."""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "Xtremetools" / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from comfyui_xtremetools.batch import BatchOutcome, load_batch_requests, run_batch
+from comfyui_xtremetools.config import get_environment_config
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    config = get_environment_config()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("requests", type=Path, help="JSONL file, one request per line")
+    parser.add_argument("--output-dir", type=Path, default=Path("batch_output"), help="where workflows and checkpoint.jsonl go")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent generations")
+    parser.add_argument("--server-url", default=config.lm_studio_server_url)
+    parser.add_argument("--model", default=config.lm_studio_model)
+    parser.add_argument("--timeout", type=float, default=None, help="per-request timeout in seconds")
+    parser.add_argument("--temperature", type=float, default=0.3)
+    parser.add_argument("--max-tokens", type=int, default=4096)
+    parser.add_argument("--retry-attempts", type=int, default=1)
+    parser.add_argument("--repair-iterations", type=int, default=0)
+    parser.add_argument("--deadline", type=float, default=0.0, help="per-item time budget in seconds (0 = none)")
+    parser.add_argument("--use-cache", action="store_true", help="reuse cached workflows for repeated requests")
+    parser.add_argument("--no-resume", action="store_true", help="ignore the checkpoint journal and regenerate everything")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+
+    def report(outcome: BatchOutcome) -> None:
+        detail = outcome.output_path or "; ".join(outcome.errors)[:120]
+        print(f"[{outcome.status}] {outcome.item_id} ({outcome.elapsed_ms:.0f} ms) {detail}", flush=True)
+
+    summary = run_batch(
+        load_batch_requests(args.requests),
+        args.output_dir,
+        workers=args.workers,
+        server_url=args.server_url,
+        model=args.model,
+        timeout=args.timeout,
+        generator_options={
+            "temperature": args.temperature,
+            "max_tokens": args.max_tokens,
+            "retry_attempts": args.retry_attempts,
+            "repair_iterations": args.repair_iterations,
+            "use_cache": args.use_cache,
+            "deadline_seconds": args.deadline,
+        },
+        resume=not args.no_resume,
+        on_outcome=report,
+    )
+    print(summary.render())
+    return 0 if summary.failed == 0 and summary.invalid == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
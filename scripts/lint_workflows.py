@@ -0,0 +1,53 @@
+"""CLI helper to validate every workflow JSON file under one or more paths."""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "Xtremetools" / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from comfyui_xtremetools.workflow_lint import LintResult, iter_workflow_files, lint_workflows
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", type=Path, nargs="+", help="workflow files or directories (searched recursively)")
+    parser.add_argument("--pattern", default="*.json", help="glob for files inside directories")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (1 = in-process)")
+    parser.add_argument("--auto-fix", action="store_true", help="apply the validator's auto-fixes before judging a file")
+    parser.add_argument("--output", type=Path, default=None, help="write JSONL results here instead of stdout")
+    parser.add_argument("--errors-only", action="store_true", help="only emit records for invalid or unreadable files")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    sink = args.output.open("w", encoding="utf-8") if args.output else sys.stdout
+
+    def report(result: LintResult) -> None:
+        if args.errors_only and result.status == "ok":
+            return
+        sink.write(result.to_json() + "\n")
+        sink.flush()
+
+    try:
+        summary = lint_workflows(
+            iter_workflow_files(args.paths, args.pattern),
+            workers=args.workers,
+            auto_fix=args.auto_fix,
+            on_result=report,
+        )
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+    print(summary.render(), file=sys.stderr)
+    return 0 if summary.invalid == 0 and summary.errored == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
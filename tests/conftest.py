@@ -68,6 +68,19 @@ class FakeLMStudioServer:
         self._responses.extend(responses)
 
 
+@pytest.fixture(autouse=True)
+def isolated_cascade_stats(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep persisted cascade tier stats out of the real cache directory."""
+
+    from comfyui_xtremetools import generator
+
+    path = tmp_path_factory.mktemp("cascade") / "cascade_stats.json"
+    monkeypatch.setattr(generator, "_cascade_stats_path", lambda: path)
+    monkeypatch.setattr(generator, "_CASCADE_STATS", {})
+    monkeypatch.setattr(generator, "_CASCADE_STATE", {"loaded": False})
+    return path
+
+
 @pytest.fixture
 def fake_lm_studio_server(monkeypatch: pytest.MonkeyPatch) -> FakeLMStudioServer:
     """Fixture that patches LM Studio HTTP calls with queued responses."""
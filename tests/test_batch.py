@@ -0,0 +1,108 @@
+"""Tests for batch workflow generation and checkpoint resume."""
+from __future__ import annotations
+
+import json
+import urllib.error
+
+from comfyui_xtremetools.batch import CheckpointJournal, load_batch_requests, run_batch
+
+
+class _DummyGenResponse:
+    def __init__(self, content: str):
+        self._payload = {
+            "model": "phi-local",
+            "choices": [{"message": {"content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 20},
+        }
+
+    def __enter__(self):  # noqa: D401
+        return self
+
+    def __exit__(self, exc_type, exc, tb):  # noqa: ANN001
+        return None
+
+    def read(self) -> bytes:  # noqa: D401
+        return json.dumps(self._payload).encode("utf-8")
+
+
+def _fake_lm_studio(monkeypatch, calls: list[str]) -> None:  # noqa: ANN001
+    valid = json.dumps({"nodes": [], "links": [], "last_node_id": 0, "last_link_id": 0})
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:
+            raise urllib.error.URLError("object_info unavailable in tests")
+        body = json.loads(request.data.decode("utf-8"))
+        prompt = body["messages"][-1]["content"]
+        calls.append(prompt)
+        return _DummyGenResponse("no json here" if "broken" in prompt else valid)
+
+    monkeypatch.setattr("comfyui_xtremetools.base.lm_studio.urllib.request.urlopen", fake_urlopen)
+
+
+def _write_requests(path, rows) -> None:  # noqa: ANN001
+    path.write_text("\n".join(json.dumps(row) for row in rows) + "\n", encoding="utf-8")
+
+
+def test_load_batch_requests_builds_structured_requests(tmp_path) -> None:
+    source = tmp_path / "requests.jsonl"
+    _write_requests(
+        source,
+        [
+            {"id": "a", "request": "raw request"},
+            {"description": "Make a prompt pipeline", "workflow_type": "prompt_engineering", "complexity": "simple"},
+            {"description": "Use the request node's defaults"},
+        ],
+    )
+
+    items = list(load_batch_requests(source))
+
+    assert [item.item_id for item in items] == ["a", "00002", "00003"]
+    assert items[0].request == "raw request"
+    assert "TYPE: prompt_engineering" in items[1].request
+    assert "TYPE: lm_studio_pipeline" in items[2].request
+
+
+def test_run_batch_writes_outputs_and_resumes_from_checkpoint(tmp_path, monkeypatch) -> None:
+    calls: list[str] = []
+    _fake_lm_studio(monkeypatch, calls)
+    source = tmp_path / "requests.jsonl"
+    _write_requests(
+        source,
+        [{"id": "one", "request": "first"}, {"id": "two", "request": "second"}, {"id": "bad", "request": "broken"}],
+    )
+    output_dir = tmp_path / "out"
+    options = {"auto_layout": False, "synthesize_links": False}
+
+    summary = run_batch(load_batch_requests(source), output_dir, workers=2, generator_options=options)
+
+    assert (summary.total, summary.succeeded, summary.invalid) == (3, 2, 1)
+    assert json.loads((output_dir / "one.json").read_text(encoding="utf-8"))["last_node_id"] == 0
+    assert (output_dir / "bad.invalid.json").exists()
+    assert set(CheckpointJournal(output_dir).completed()) == {"one", "two"}
+
+    # Simulate a crash mid-write: the truncated line is ignored on resume.
+    with (output_dir / CheckpointJournal.FILE_NAME).open("a", encoding="utf-8") as handle:
+        handle.write('{"item_id": "tw')
+    calls.clear()
+
+    resumed = run_batch(load_batch_requests(source), output_dir, workers=2, generator_options=options)
+
+    assert resumed.skipped == 2
+    assert calls == ["broken"]
+
+
+def test_run_batch_records_generator_errors_instead_of_validating_the_placeholder(tmp_path, monkeypatch) -> None:
+    def offline_urlopen(request, timeout=None):  # noqa: ANN001
+        raise urllib.error.URLError("LM Studio is not running")
+
+    monkeypatch.setattr("comfyui_xtremetools.base.lm_studio.urllib.request.urlopen", offline_urlopen)
+    source = tmp_path / "requests.jsonl"
+    _write_requests(source, [{"id": "down", "request": "anything"}])
+    outcomes = []
+
+    summary = run_batch(load_batch_requests(source), tmp_path / "out", workers=1, on_outcome=outcomes.append)
+
+    assert (summary.failed, summary.invalid) == (1, 0)
+    assert outcomes[0].status == "error" and outcomes[0].output_path is None
+    assert "LM Studio is not running" in " ".join(outcomes[0].errors)
+    assert not any("Schema" in error or "Missing" in error for error in outcomes[0].errors)
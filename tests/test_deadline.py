@@ -0,0 +1,39 @@
+"""Tests for the shared generation deadline."""
+from __future__ import annotations
+
+import pytest
+
+from comfyui_xtremetools.deadline import Deadline, DeadlineExceeded
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_deadline_clamps_timeouts_to_remaining_budget() -> None:
+    clock = _Clock()
+    deadline = Deadline(10.0, clock=clock)
+
+    assert deadline.clamp_timeout(60) == 10.0
+    clock.now += 7.5
+    assert deadline.remaining() == pytest.approx(2.5)
+    assert deadline.clamp_timeout(1.0) == 1.0
+    assert deadline.clamp_timeout(None) == pytest.approx(2.5)
+
+    clock.now += 5
+    assert deadline.expired
+    with pytest.raises(DeadlineExceeded):
+        deadline.clamp_timeout(60)
+
+
+def test_unbounded_deadline_never_expires() -> None:
+    deadline = Deadline(0)
+
+    assert not deadline.bounded
+    assert deadline.remaining() is None
+    assert deadline.clamp_timeout(60) == 60
+    deadline.check("anything")
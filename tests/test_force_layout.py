@@ -0,0 +1,72 @@
+"""Tests for the optional force-directed layout engine."""
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+from comfyui_xtremetools.base import force_layout
+from comfyui_xtremetools.base.workflow_postprocessor import post_process_workflow
+
+
+def _grid_workflow(workflow_builder, width: int, depth: int) -> dict:
+    nodes = []
+    links = []
+    for layer in range(depth):
+        for index in range(width):
+            node_id = layer * width + index + 1
+            nodes.append({"id": node_id, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0]})
+            if layer:
+                source = (layer - 1) * width + index + 1
+                links.append([len(links) + 1, source, 0, node_id, 0, "STRING"])
+    return workflow_builder(last_node_id=len(nodes), last_link_id=len(links), nodes=nodes, links=links)
+
+
+def test_force_layout_refines_large_graph_within_budget(workflow_builder) -> None:
+    pytest.importorskip("numpy")
+    workflow = _grid_workflow(workflow_builder, width=50, depth=40)
+
+    start = time.perf_counter()
+    parsed = json.loads(
+        post_process_workflow(json.dumps(workflow), apply_layout=True, synthesize_links=False, use_layout_cache=False, layout_engine="force")
+    )
+    elapsed = time.perf_counter() - start
+
+    positions = {node["id"]: tuple(node["pos"]) for node in parsed["nodes"]}
+    assert len(set(positions.values())) == len(positions)
+    assert all(all(value == value for value in pos) for pos in positions.values())  # no NaN
+    # Seeded from the layered layout, so flow still runs left to right on average.
+    first = sum(positions[node_id][0] for node_id in range(1, 51)) / 50
+    last = sum(positions[node_id][0] for node_id in range(1951, 2001)) / 50
+    assert first < last
+    assert elapsed < 10.0
+
+
+def test_force_layout_pulls_linked_nodes_together() -> None:
+    pytest.importorskip("numpy")
+    seed = {1: [0.0, 0.0], 2: [5000.0, 0.0], 3: [0.0, 5000.0]}
+
+    refined = force_layout.force_directed_positions(seed, [(1, 2)], spacing=300.0, iterations=100, anchor=0.0)
+
+    linked = abs(refined[2][0] - refined[1][0])
+    assert linked < 5000.0
+
+
+def test_force_layout_falls_back_without_numpy(monkeypatch, workflow_builder) -> None:
+    monkeypatch.setattr(force_layout, "np", None)
+    workflow = _grid_workflow(workflow_builder, width=3, depth=3)
+
+    forced = post_process_workflow(json.dumps(workflow), synthesize_links=False, use_layout_cache=False, layout_engine="force")
+    layered = post_process_workflow(json.dumps(workflow), synthesize_links=False, use_layout_cache=False)
+
+    assert forced == layered
+    with pytest.raises(RuntimeError):
+        force_layout.force_directed_positions({1: [0.0, 0.0]}, [])
+
+
+def test_unknown_layout_engine_is_rejected(workflow_builder) -> None:
+    workflow = _grid_workflow(workflow_builder, width=1, depth=2)
+
+    with pytest.raises(ValueError):
+        post_process_workflow(json.dumps(workflow), layout_engine="spring")
@@ -0,0 +1,41 @@
+"""Tests for the JSON Patch helper used by the repair loop."""
+from __future__ import annotations
+
+import pytest
+
+from comfyui_xtremetools.json_patch import JSONPatchError, apply_json_patch
+
+
+def test_apply_json_patch_operations_do_not_mutate_input() -> None:
+    document = {"links": [[1, 1, 0, 9, 0, "STRING"]], "nodes": [{"id": 1}]}
+    patched = apply_json_patch(
+        document,
+        [
+            {"op": "replace", "path": "/links/0/3", "value": 2},
+            {"op": "add", "path": "/nodes/-", "value": {"id": 2}},
+            {"op": "copy", "from": "/nodes/1/id", "path": "/last_node_id"},
+            {"op": "test", "path": "/last_node_id", "value": 2},
+        ],
+    )
+
+    assert patched["links"][0][3] == 2
+    assert patched["nodes"][-1] == {"id": 2}
+    assert patched["last_node_id"] == 2
+    assert document["links"][0][3] == 9
+
+
+def test_apply_json_patch_rejects_bad_paths() -> None:
+    with pytest.raises(JSONPatchError):
+        apply_json_patch({"links": []}, [{"op": "remove", "path": "/links/0"}])
+    with pytest.raises(JSONPatchError):
+        apply_json_patch({"a": 1}, [{"op": "test", "path": "/a", "value": 2}])
+
+
+def test_apply_json_patch_rejects_non_string_fields() -> None:
+    for operation in (
+        {"op": "add", "path": 5, "value": 1},
+        {"op": ["add"], "path": "/a", "value": 1},
+        {"op": "copy", "from": 0, "path": "/a"},
+    ):
+        with pytest.raises(JSONPatchError):
+            apply_json_patch({"a": 1}, [operation])
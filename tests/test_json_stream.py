@@ -0,0 +1,48 @@
+"""Tests for the incremental JSON scanner used by streaming generation."""
+from __future__ import annotations
+
+from comfyui_xtremetools.json_stream import IncrementalJSONScanner
+
+
+def test_scanner_completes_when_top_level_object_closes() -> None:
+    scanner = IncrementalJSONScanner()
+    chunks = ["```json\n", '{"nodes": [{"type": "A}"', "}], ", '"links": []}', " and some prose"]
+    statuses = [scanner.feed(chunk) for chunk in chunks]
+
+    assert statuses == ["pending", "pending", "pending", "complete", "complete"]
+    assert scanner.json_text == '{"nodes": [{"type": "A}"}], "links": []}'
+
+
+def test_scanner_aborts_on_prose_and_unbalanced_structure() -> None:
+    prose = IncrementalJSONScanner()
+    assert prose.feed("Sure! Here is") == "error"
+    assert "prose before JSON" in (prose.error or "")
+
+    unbalanced = IncrementalJSONScanner()
+    assert unbalanced.feed('{"nodes": [}') == "error"
+    assert "unbalanced" in (unbalanced.error or "")
+
+    tolerant = IncrementalJSONScanner(max_preamble=20)
+    assert tolerant.feed("Here you go: {}") == "complete"
+
+
+def test_member_reader_streams_array_items_across_tiny_chunks() -> None:
+    import io
+    import json
+
+    import pytest
+
+    from comfyui_xtremetools.json_stream import JSONMemberReader, StreamParseError
+
+    doc = {"last_node_id": 2, "nodes": [{"id": 1, "title": 'a"]}\\'}, {"id": 2, "title": "é"}], "version": 0.4}
+    events = list(JSONMemberReader(io.BytesIO(json.dumps(doc, ensure_ascii=False).encode("utf-8")), ["nodes"], chunk_size=1).events())
+
+    assert events == [
+        ("last_node_id", None, 2),
+        ("nodes", None, []),
+        ("nodes", 0, doc["nodes"][0]),
+        ("nodes", 1, doc["nodes"][1]),
+        ("version", None, 0.4),
+    ]
+    with pytest.raises(StreamParseError, match="offset 21"):
+        list(JSONMemberReader(io.StringIO('{"nodes": [{"id": 1},]}'), ["nodes"], chunk_size=4).events())
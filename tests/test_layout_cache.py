@@ -0,0 +1,61 @@
+"""Tests for the structural layout cache."""
+from __future__ import annotations
+
+import copy
+import json
+
+from comfyui_xtremetools.base.layout_cache import CachedLayout, LayoutCache, structural_layout_key
+from comfyui_xtremetools.base.workflow_postprocessor import WorkflowDAGLayout
+
+
+def _graph() -> tuple[dict[int, dict], list]:
+    nodes_map = {
+        1: {"id": 1, "type": "XtremetoolsLMStudioServerSettings", "pos": [0, 0]},
+        2: {"id": 2, "type": "XtremetoolsLMStudioText", "pos": [0, 0], "widgets_values": ["hello"]},
+        3: {"id": 3, "type": "ShowText|pysssss", "pos": [0, 0]},
+    }
+    links = [[1, 1, 0, 2, 0, "LM_STUDIO_SERVER"], [2, 2, 0, 3, 0, "STRING"]]
+    return nodes_map, links
+
+
+def test_structural_key_ignores_positions_and_widgets() -> None:
+    nodes_map, links = _graph()
+    edited = copy.deepcopy(nodes_map)
+    edited[2]["pos"] = [999, 999]
+    edited[2]["widgets_values"] = ["changed"]
+
+    assert structural_layout_key(nodes_map, links) == structural_layout_key(edited, links)
+    assert structural_layout_key(nodes_map, links) != structural_layout_key(nodes_map, links[:1])
+    edited[3]["type"] = "Note|pysssss"
+    assert structural_layout_key(nodes_map, links) != structural_layout_key(edited, links)
+
+
+def test_layout_reapplies_cached_positions(monkeypatch) -> None:
+    cache = LayoutCache(max_entries=4)
+    monkeypatch.setattr("comfyui_xtremetools.base.workflow_postprocessor.get_layout_cache", lambda: cache)
+    nodes_map, links = _graph()
+    order = WorkflowDAGLayout.layout(nodes_map, links)
+    expected = {node_id: node["pos"] for node_id, node in nodes_map.items()}
+
+    def fail(*args, **kwargs):  # noqa: ANN002, ANN003
+        raise AssertionError("layout should come from the cache")
+
+    monkeypatch.setattr(WorkflowDAGLayout, "assign_positions", staticmethod(fail))
+    edited, _ = _graph()
+    edited[2]["widgets_values"] = ["edited"]
+
+    assert WorkflowDAGLayout.layout(edited, links) == order
+    assert {node_id: node["pos"] for node_id, node in edited.items()} == expected
+    assert cache.stats()["hits"] == 1
+
+
+def test_layout_cache_disk_tier_round_trip(tmp_path) -> None:
+    key = "ab" + "0" * 62
+    LayoutCache(max_entries=2, disk_dir=tmp_path).put(key, CachedLayout(positions={7: [100, 250]}, order=[7]))
+
+    fresh = LayoutCache(max_entries=2, disk_dir=tmp_path)
+    layout = fresh.get(key)
+
+    assert layout is not None and layout.positions == {7: [100, 250]} and layout.order == [7]
+    assert fresh.stats()["disk_hits"] == 1
+    assert json.loads((tmp_path / "ab" / f"{key}.json").read_text(encoding="utf-8"))["order"] == [7]
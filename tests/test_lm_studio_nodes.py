@@ -52,6 +52,28 @@ def test_lm_studio_generation_settings_node_outputs_dataclass() -> None:
     assert "json_object" in info
 
 
+def test_lm_studio_generation_settings_json_schema_defaults_to_workflow_schema() -> None:
+    node = XtremetoolsLMStudioGenerationSettings()
+    settings, info = node.build_generation_settings(
+        temperature=0.2,
+        max_tokens=256,
+        response_format="json_schema",
+    )
+
+    payload = settings.response_format
+    assert payload["type"] == "json_schema"
+    schema = payload["json_schema"]["schema"]
+    assert "$schema" not in schema
+    assert schema["properties"]["links"]["items"]["items"] == {"type": ["integer", "string"]}
+    assert "Schema: workflow schema" in info
+
+
+def test_lm_studio_generation_settings_json_schema_rejects_invalid_schema() -> None:
+    node = XtremetoolsLMStudioGenerationSettings()
+    with pytest.raises(ValueError):
+        node.build_generation_settings(0.2, 256, response_format="json_schema", json_schema="{not json")
+
+
 @pytest.mark.usefixtures("fake_lm_studio_server")
 def test_lm_studio_node_success(fake_lm_studio_server) -> None:
     fake_lm_studio_server.queue(
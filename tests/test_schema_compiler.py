@@ -0,0 +1,109 @@
+"""Tests for the compiled workflow JSON Schema validator."""
+from __future__ import annotations
+
+import json
+import os
+import time
+
+from comfyui_xtremetools.config import get_environment_config
+from comfyui_xtremetools.schema_compiler import compile_schema, load_compiled_schema
+from comfyui_xtremetools.workflow_validator import validate_workflow_json
+
+
+def _node(node_id: int, **overrides) -> dict:
+    node = {"id": node_id, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0], "inputs": [], "outputs": []}
+    node.update(overrides)
+    return node
+
+
+def test_compiled_schema_reports_per_path_errors() -> None:
+    schema = load_compiled_schema(get_environment_config().workflow_schema_path)
+    payload = {
+        "last_node_id": 2,
+        "last_link_id": 1,
+        "nodes": [_node(1), _node(2, pos=[0, 0, 0], widgets_values="oops", inputs=[{"name": "text"}])],
+        "links": [[1, 1, 0, 2, 0, None]],
+    }
+
+    errors = schema.validate(payload)
+
+    assert "/nodes/1/pos: expected at most 2 items, got 3" in errors
+    assert "/nodes/1/widgets_values: expected array, got string" in errors
+    assert "/nodes/1/inputs/0: missing required property 'type'" in errors
+    assert "/links/0/5: expected string, got null" in errors
+    assert not any(error.startswith("/nodes/0") for error in errors)
+
+
+def test_compiled_schema_accepts_null_output_links() -> None:
+    schema = load_compiled_schema(get_environment_config().workflow_schema_path)
+    payload = {
+        "last_node_id": 1,
+        "last_link_id": 0,
+        "nodes": [_node(1, outputs=[{"name": "joined", "type": "STRING", "links": None}])],
+        "links": [],
+    }
+
+    assert schema.validate(payload) == []
+    payload["nodes"][0]["outputs"][0]["links"] = "1"
+    assert schema.validate(payload) == ["/nodes/0/outputs/0/links: expected array or null, got string"]
+
+
+def test_compiled_schema_stops_after_max_errors() -> None:
+    schema = compile_schema({"type": "array", "items": {"type": "integer"}})
+
+    errors = schema.validate(["x"] * 100, max_errors=5)
+
+    assert len(errors) == 6
+    assert errors[-1] == "/: stopped after 5 schema errors"
+
+
+def test_compiled_schema_recompiles_when_file_changes(tmp_path) -> None:
+    path = tmp_path / "schema.json"
+    path.write_text(json.dumps({"type": "object", "required": ["nodes"]}), encoding="utf-8")
+    first = load_compiled_schema(path)
+    assert load_compiled_schema(path) is first
+
+    path.write_text(json.dumps({"type": "object", "required": ["nodes", "links"]}), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    second = load_compiled_schema(path)
+
+    assert second is not first
+    assert second.fingerprint != first.fingerprint
+    assert second.validate({"nodes": []}) == ["/: missing required property 'links'"]
+
+
+def test_compiled_schema_validates_large_workflows_quickly() -> None:
+    schema = load_compiled_schema(get_environment_config().workflow_schema_path)
+    nodes = [
+        _node(
+            node_id,
+            size=[320, 120],
+            widgets_values=["a", 1],
+            inputs=[{"name": "text", "type": "STRING", "link": node_id - 1 if node_id > 1 else None}],
+            outputs=[{"name": "text", "type": "STRING", "links": [node_id]}],
+        )
+        for node_id in range(1, 10_001)
+    ]
+    links = [[node_id, node_id, 0, node_id + 1, 0, "STRING"] for node_id in range(1, 10_000)]
+    payload = {"last_node_id": 10_000, "last_link_id": 9_999, "nodes": nodes, "links": links}
+
+    start = time.perf_counter()
+    errors = schema.validate(payload)
+    elapsed = time.perf_counter() - start
+
+    assert errors == []
+    assert elapsed < 2.0
+
+
+def test_validator_auto_fills_missing_sockets() -> None:
+    workflow = {"last_node_id": 1, "last_link_id": 0, "nodes": [{"id": 1, "type": "ShowText|pysssss"}], "links": []}
+
+    fixed = validate_workflow_json(json.dumps(workflow), auto_fix=True)
+    strict = validate_workflow_json(json.dumps(workflow), auto_fix=False)
+
+    assert fixed.is_valid
+    assert any("missing inputs and outputs" in warning for warning in fixed.warnings)
+    assert json.loads(fixed.workflow_json)["nodes"][0]["inputs"] == []
+    assert not strict.is_valid
+    assert "Schema: /nodes/0: missing required property 'inputs'" in strict.errors
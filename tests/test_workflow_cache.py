@@ -0,0 +1,75 @@
+"""Tests for the validated-workflow cache."""
+from __future__ import annotations
+
+import json
+
+from comfyui_xtremetools.base.lm_studio import LMStudioModelSettings, LMStudioServerSettings
+from comfyui_xtremetools.nodes import workflow_generator
+from comfyui_xtremetools.workflow_cache import WorkflowCache, build_request_cache_key
+
+
+def test_cache_key_normalizes_whitespace_and_case() -> None:
+    request = "TYPE: custom\nCOMPLEXITY: simple\n\nMake   a Workflow"
+    key = build_request_cache_key(request, model="phi", registry_hash="abc")
+
+    assert key == build_request_cache_key("type: CUSTOM\ncomplexity: Simple\nmake a workflow ", model="phi", registry_hash="abc")
+    assert key != build_request_cache_key(request, model="phi", registry_hash="def")
+    assert key != build_request_cache_key(request.replace("simple", "complex"), model="phi", registry_hash="abc")
+
+
+def test_cache_persists_evicts_lru_and_expires(tmp_path, monkeypatch) -> None:
+    cache = WorkflowCache(tmp_path, max_entries=2)
+    cache.put("a", '{"a": 1}')
+    cache.put("b", '{"b": 1}')
+    assert cache.get("a") == '{"a": 1}'
+    cache.put("c", '{"c": 1}')  # evicts "b", the least recently used entry
+
+    reloaded = WorkflowCache(tmp_path, max_entries=2)
+    assert reloaded.get("b") is None
+    assert reloaded.get("c") == '{"c": 1}'
+
+    monkeypatch.setattr("comfyui_xtremetools.workflow_cache.time.time", lambda: 10**12)
+    assert reloaded.get("c", ttl_seconds=60) is None
+    assert reloaded.stats()["hits"] == 1
+
+
+def test_generator_serves_cache_hits_without_lm_studio(tmp_path, monkeypatch) -> None:
+    cache = WorkflowCache(tmp_path)
+    monkeypatch.setattr(workflow_generator, "get_workflow_cache", lambda: cache)
+    chat_calls: list[bytes] = []
+    content = json.dumps({"nodes": [], "links": [], "last_node_id": 0, "last_link_id": 0})
+
+    class _Response:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):  # noqa: ANN002
+            return None
+
+        def read(self) -> bytes:
+            return json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is not None:
+            chat_calls.append(request.data)
+        return _Response()
+
+    monkeypatch.setattr("comfyui_xtremetools.base.lm_studio.urllib.request.urlopen", fake_urlopen)
+
+    node = workflow_generator.XtremetoolsWorkflowGenerator()
+    kwargs = {
+        "server_settings": LMStudioServerSettings(server_url="http://localhost:1234", timeout=5),
+        "model_settings": LMStudioModelSettings(model="phi-local"),
+        "auto_layout": False,
+        "synthesize_links": False,
+        "use_cache": True,
+    }
+    first, first_info = node.generate_workflow("TYPE: custom\nBuild it", **kwargs)
+    second, second_info = node.generate_workflow("type: custom\n  build   it ", **kwargs)
+    _, forced_info = node.generate_workflow("TYPE: custom\nBuild it", force_regenerate=True, **kwargs)
+
+    assert "Cache: miss" in first_info and "Cache: stored" in first_info
+    assert "Cache: hit" in second_info
+    assert second == first
+    assert "Cache: bypassed" in forced_info
+    assert len(chat_calls) == 2
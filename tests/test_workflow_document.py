@@ -0,0 +1,66 @@
+"""Tests for the shared in-memory workflow document."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from comfyui_xtremetools.base.workflow_postprocessor import post_process_document
+from comfyui_xtremetools.generator import clamp_workflow_links
+from comfyui_xtremetools.workflow_document import WorkflowDocument
+from comfyui_xtremetools.workflow_validator import validate_workflow_document
+
+
+def test_workflow_document_indexes_and_invalidate() -> None:
+    document = WorkflowDocument.from_json(
+        b'{"nodes": [{"id": 1, "type": "A"}, {"id": 4, "type": "B"}], "links": [[7, 1, 0, 4, 0, "STRING"]]}'
+    )
+
+    assert document.node(4)["type"] == "B"
+    assert document.link(7)[3] == 4
+    assert (document.max_node_id(), document.max_link_id()) == (4, 7)
+
+    document.data["nodes"].append({"id": 9, "type": "C"})
+    assert document.node(9) is None
+    document.invalidate()
+    assert document.node(9)["type"] == "C"
+
+
+def test_workflow_document_rejects_non_objects() -> None:
+    with pytest.raises(ValueError):
+        WorkflowDocument.from_json("[1, 2, 3]")
+
+
+def test_workflow_document_pipeline_preserves_node_fields() -> None:
+    document = WorkflowDocument(
+        {
+            "last_node_id": 2,
+            "nodes": [
+                {
+                    "id": 1,
+                    "type": "XtremetoolsLMStudioServerSettings",
+                    "widgets_values": ["http://localhost:1234", 30],
+                    "outputs": [{"name": "out", "type": "LM_STUDIO_SERVER", "links": []}],
+                },
+                {
+                    "id": 2,
+                    "type": "XtremetoolsLMStudioText",
+                    "inputs": [{"name": "server_settings", "type": "LM_STUDIO_SERVER", "link": None}],
+                },
+            ],
+            "links": [],
+        }
+    )
+
+    post_process_document(document, apply_layout=True, synthesize_links=True)
+    assert clamp_workflow_links(document) == 0
+    result = validate_workflow_document(document, auto_fix=True)
+
+    assert result.is_valid
+    assert result.document is document
+    assert result.workflow_json == ""
+    payload = json.loads(document.to_json())
+    assert payload["nodes"][0]["widgets_values"] == ["http://localhost:1234", 30]
+    assert payload["last_link_id"] == 1
+    assert payload["links"][0][1:5] == [1, 0, 2, 0]
+    assert "groups" in payload and "version" in payload
@@ -0,0 +1,37 @@
+"""Tests for parallel directory linting of workflow files."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from comfyui_xtremetools import node_discovery
+from comfyui_xtremetools.workflow_lint import iter_workflow_files, lint_workflows
+
+
+def _write_tree(root) -> None:  # noqa: ANN001
+    valid = {"last_node_id": 0, "last_link_id": 0, "nodes": [], "links": []}
+    (root / "nested").mkdir()
+    (root / "good.json").write_text(json.dumps(valid), encoding="utf-8")
+    (root / "nested" / "good2.json").write_text(json.dumps(valid), encoding="utf-8")
+    (root / "nested" / "broken.json").write_text("{not json", encoding="utf-8")
+    (root / "notes.txt").write_text("ignored", encoding="utf-8")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_lint_workflows_reports_each_file_in_order(tmp_path, monkeypatch, workers) -> None:  # noqa: ANN001
+    fetches: list[int] = []
+    monkeypatch.setattr(node_discovery, "fetch_object_info", lambda server_url=None: fetches.append(1) or {})
+    _write_tree(tmp_path)
+    files = list(iter_workflow_files([tmp_path]))
+    seen = []
+
+    summary = lint_workflows(files, workers=workers, on_result=seen.append)
+
+    assert [result.path for result in seen] == [str(path) for path in files]
+    assert [path.name for path in files] == ["good.json", "broken.json", "good2.json"]
+    assert {result.status for result in seen} == {"ok", "invalid"}
+    assert (summary.files, summary.ok, summary.invalid, summary.errored) == (3, 2, 1, 0)
+    assert "files/s" in summary.render() and "MB/s" in summary.render()
+    assert json.loads(seen[1].to_json())["errors"]
+    assert len(fetches) == 1  # once up front, even though the fetched registry is empty
@@ -1,9 +1,13 @@
 """Workflow-related node tests."""
 from __future__ import annotations
 
+import io
 import json
+import urllib.error
 
+from comfyui_xtremetools.generator import json_schema_capability
 from comfyui_xtremetools.nodes.lm_studio_settings import (
+    XtremetoolsLMStudioGenerationSettings,
     XtremetoolsLMStudioModelSettings,
     XtremetoolsLMStudioServerSettings,
 )
@@ -233,6 +237,32 @@ def test_workflow_exporter_compact_format(workflow_builder) -> None:
     assert "Compact" in info
 
 
+def test_workflow_exporter_streams_to_file_atomically(workflow_builder, tmp_path, monkeypatch) -> None:
+    import gzip
+
+    from comfyui_xtremetools import workflow_validator
+
+    workflow = workflow_builder(nodes=[], links=[])
+    workflow["extra"] = {"origin": "file-export-test"}  # distinct bytes, so no validation-cache hit
+    calls = []
+    original = workflow_validator._check_workflow
+    monkeypatch.setattr(workflow_validator, "_check_workflow", lambda *a, **k: calls.append(1) or original(*a, **k))
+    node = XtremetoolsWorkflowExporter()
+    target = tmp_path / "exports" / "wf.json"
+
+    path, info = node.export_workflow(json.dumps(workflow), output_path=str(target), gzip_output=True)
+
+    assert path == str(target) + ".gz"
+    assert len(calls) == 1  # validated once, metadata note included
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        parsed = json.load(handle)
+    assert parsed["nodes"][-1]["type"] == "Note"
+    assert parsed["last_node_id"] == parsed["nodes"][-1]["id"]
+    assert [entry.name for entry in target.parent.iterdir()] == ["wf.json.gz"]  # no temp file left behind
+    assert "Status: OK Written" in info
+    assert "gzip" in info
+
+
 # ---- Workflow generator tests ----
 
 
@@ -349,3 +379,488 @@ def test_workflow_generator_fallback_extraction(monkeypatch) -> None:
     assert parsed.get("nodes") == []
     assert parsed.get("links") == []
     assert "Extraction: fallback" in info
+
+
+def test_workflow_generator_parallel_candidates_returns_first_valid(monkeypatch) -> None:
+    valid = json.dumps({"nodes": [], "links": [], "last_node_id": 0, "last_link_id": 0})
+    seen_temperatures: list[float] = []
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:  # /object_info refresh
+            return _DummyGenResponse("")
+        body = json.loads(request.data.decode("utf-8"))
+        seen_temperatures.append(body["temperature"])
+        # The base-temperature candidate returns prose; the hotter one a valid workflow.
+        return _DummyGenResponse(valid if body["temperature"] > 0.2 else "no json here")
+
+    monkeypatch.setattr(
+        "comfyui_xtremetools.base.lm_studio.urllib.request.urlopen",
+        fake_urlopen,
+    )
+
+    server_settings, _ = XtremetoolsLMStudioServerSettings().build_server_settings(
+        "http://localhost:1234",
+        timeout_seconds=30,
+    )
+    model_settings, _ = XtremetoolsLMStudioModelSettings().build_model_settings("phi-local")
+
+    workflow_json, info = XtremetoolsWorkflowGenerator().generate_workflow(
+        "Test request",
+        server_settings=server_settings,
+        model_settings=model_settings,
+        temperature=0.1,
+        max_tokens=512,
+        auto_layout=False,
+        synthesize_links=False,
+        parallel_candidates=2,
+        candidate_temperature_spread=0.4,
+    )
+
+    assert json.loads(workflow_json)["last_node_id"] == 0
+    assert "Parallel candidates: 2" in info
+    assert "Winning candidate: 2/2" in info
+    assert sorted(seen_temperatures) == [0.1, 0.5]
+
+
+def test_workflow_generator_repair_loop_applies_json_patch(monkeypatch) -> None:
+    broken = json.dumps(
+        {
+            "last_node_id": 2,
+            "last_link_id": 1,
+            "nodes": [
+                {"id": 1, "type": "A", "inputs": [], "outputs": [{"name": "text", "type": "STRING", "links": [1]}]},
+                {"id": 2, "type": "B", "inputs": [{"name": "text", "type": "STRING", "link": 1}], "outputs": []},
+            ],
+            "links": [[1, 1, 0, 9, 0, "STRING"]],
+        }
+    )
+    patch = json.dumps([{"op": "replace", "path": "/links/0/3", "value": 2}])
+    replies = [broken, patch]
+    chat_requests: list[dict] = []
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:  # /object_info refresh
+            return _DummyGenResponse("")
+        chat_requests.append(json.loads(request.data.decode("utf-8")))
+        return _DummyGenResponse(replies.pop(0))
+
+    monkeypatch.setattr(
+        "comfyui_xtremetools.base.lm_studio.urllib.request.urlopen",
+        fake_urlopen,
+    )
+
+    server_settings, _ = XtremetoolsLMStudioServerSettings().build_server_settings(
+        "http://localhost:1234",
+        timeout_seconds=30,
+    )
+    model_settings, _ = XtremetoolsLMStudioModelSettings().build_model_settings("phi-local")
+
+    workflow_json, info = XtremetoolsWorkflowGenerator().generate_workflow(
+        "Test request",
+        server_settings=server_settings,
+        model_settings=model_settings,
+        auto_layout=False,
+        synthesize_links=False,
+        repair_iterations=2,
+    )
+
+    assert "Repair iterations: 1 (repaired)" in info
+    repair_prompt = chat_requests[1]["messages"][-1]["content"]
+    assert "unknown target node 9" in repair_prompt
+    assert "/links/0" in repair_prompt
+    assert len(repair_prompt) < len(chat_requests[0]["messages"][0]["content"])
+    assert chat_requests[1]["max_tokens"] == XtremetoolsWorkflowGenerator.REPAIR_MAX_TOKENS
+
+
+
+def test_workflow_generator_repair_loop_survives_malformed_patch(monkeypatch) -> None:
+    broken = json.dumps(
+        {
+            "last_node_id": 2,
+            "last_link_id": 1,
+            "nodes": [
+                {"id": 1, "type": "A", "inputs": [], "outputs": [{"name": "text", "type": "STRING", "links": [1]}]},
+                {"id": 2, "type": "B", "inputs": [{"name": "text", "type": "STRING", "link": 1}], "outputs": []},
+            ],
+            "links": [[1, 1, 0, 8, 0, "STRING"]],
+        }
+    )
+    # The first repair reply uses a number as the path; the round is skipped, not the generation.
+    replies = [
+        broken,
+        json.dumps([{"op": "add", "path": 5, "value": 1}]),
+        json.dumps([{"op": "replace", "path": "/links/0/3", "value": 2}]),
+    ]
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:  # /object_info refresh
+            return _DummyGenResponse("")
+        return _DummyGenResponse(replies.pop(0))
+
+    monkeypatch.setattr(
+        "comfyui_xtremetools.base.lm_studio.urllib.request.urlopen",
+        fake_urlopen,
+    )
+
+    server_settings, _ = XtremetoolsLMStudioServerSettings().build_server_settings(
+        "http://localhost:1234",
+        timeout_seconds=30,
+    )
+    model_settings, _ = XtremetoolsLMStudioModelSettings().build_model_settings("phi-local")
+
+    workflow_json, info = XtremetoolsWorkflowGenerator().generate_workflow(
+        "Test request",
+        server_settings=server_settings,
+        model_settings=model_settings,
+        auto_layout=False,
+        synthesize_links=False,
+        repair_iterations=2,
+    )
+
+    assert "Repair iterations: 2 (repaired)" in info
+    assert json.loads(workflow_json)["links"][0][3] == 2
+
+def test_workflow_generator_cascade_escalates_on_validation_failure(monkeypatch) -> None:
+    from comfyui_xtremetools.generator import get_cascade_stats
+
+    valid = json.dumps({"nodes": [], "links": [], "last_node_id": 0, "last_link_id": 0})
+    # The link points at nodes that do not exist, so the registry clamp prunes it.
+    invalid = json.dumps({"nodes": [], "links": [[1, 1, 0, 2, 0, "STRING"]], "last_node_id": 0, "last_link_id": 1})
+    replies = {"tiny-model": invalid, "big-model": valid}
+    models_called: list[str] = []
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:  # /object_info refresh
+            return _DummyGenResponse("")
+        model = json.loads(request.data.decode("utf-8"))["model"]
+        models_called.append(model)
+        return _DummyGenResponse(replies[model])
+
+    monkeypatch.setattr(
+        "comfyui_xtremetools.base.lm_studio.urllib.request.urlopen",
+        fake_urlopen,
+    )
+
+    server_settings, _ = XtremetoolsLMStudioServerSettings().build_server_settings(
+        "http://localhost:1234",
+        timeout_seconds=30,
+    )
+    model_settings, model_info = XtremetoolsLMStudioModelSettings().build_model_settings(
+        "big-model",
+        cascade_models="tiny-model",
+    )
+    before = get_cascade_stats().get("tiny-model", {}).get("attempts", 0)
+
+    workflow_json, info = XtremetoolsWorkflowGenerator().generate_workflow(
+        "Test request",
+        server_settings=server_settings,
+        model_settings=model_settings,
+        auto_layout=False,
+        synthesize_links=False,
+    )
+
+    assert "Cascade: tiny-model" in model_info
+    assert models_called == ["tiny-model", "big-model"]
+    assert "Model cascade: tiny-model -> big-model" in info
+    assert "Tier 1 result: escalate" in info
+    assert "Tier 2 result: pass" in info
+    assert json.loads(workflow_json)["last_link_id"] == 0
+    stats = get_cascade_stats()
+    assert stats["tiny-model"]["attempts"] == before + 1
+    assert stats["big-model"]["success_rate"] > 0
+
+
+
+def test_workflow_generator_cascade_returns_best_tier_when_last_tier_errors(monkeypatch) -> None:
+    import urllib.error
+
+    invalid = json.dumps({"nodes": [], "links": [[1, 1, 0, 2, 0, "STRING"]], "last_node_id": 0, "last_link_id": 1})
+    models_called: list[str] = []
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:  # /object_info refresh
+            return _DummyGenResponse("")
+        model = json.loads(request.data.decode("utf-8"))["model"]
+        models_called.append(model)
+        if model == "big-model":
+            raise urllib.error.URLError("connection refused")
+        return _DummyGenResponse(invalid)
+
+    monkeypatch.setattr(
+        "comfyui_xtremetools.base.lm_studio.urllib.request.urlopen",
+        fake_urlopen,
+    )
+
+    server_settings, _ = XtremetoolsLMStudioServerSettings().build_server_settings(
+        "http://localhost:1234",
+        timeout_seconds=30,
+    )
+    model_settings, _ = XtremetoolsLMStudioModelSettings().build_model_settings(
+        "big-model",
+        cascade_models="tiny-model",
+    )
+
+    workflow_json, info = XtremetoolsWorkflowGenerator().generate_workflow(
+        "Test request",
+        server_settings=server_settings,
+        model_settings=model_settings,
+        auto_layout=False,
+        synthesize_links=False,
+        retry_attempts=1,
+    )
+
+    assert models_called[0] == "tiny-model" and "big-model" in models_called
+    assert "Tier 2 result: fail" in info
+    assert "Cascade: returning best result so far (tiny-model)" in info
+    assert "Status: ERROR" not in info
+    assert json.loads(workflow_json)["nodes"] == []
+    assert workflow_json != "{}"
+
+
+def test_cascade_stats_survive_a_restart(isolated_cascade_stats, monkeypatch) -> None:  # noqa: ANN001
+    from comfyui_xtremetools import generator
+
+    generator.record_cascade_outcome("tiny-model", True, 100.0)
+    generator.record_cascade_outcome("tiny-model", False, 300.0)
+    # A fresh process starts with empty in-memory stats.
+    monkeypatch.setattr(generator, "_CASCADE_STATS", {})
+    monkeypatch.setattr(generator, "_CASCADE_STATE", {"loaded": False})
+
+    stats = generator.get_cascade_stats()["tiny-model"]
+
+    assert json.loads(isolated_cascade_stats.read_text(encoding="utf-8"))["models"]["tiny-model"]["attempts"] == 2
+    assert (stats["attempts"], stats["success_rate"], stats["avg_latency_ms"]) == (2, 0.5, 200.0)
+
+
+class _StreamingResponse:
+    def __init__(self, deltas: list[str]):
+        self.lines = [
+            ("data: " + json.dumps({"model": "phi-local", "choices": [{"delta": {"content": delta}}]}) + "\n").encode("utf-8")
+            for delta in deltas
+        ] + [b"data: [DONE]\n"]
+        self.consumed = 0
+
+    def __enter__(self):  # noqa: D401
+        return self
+
+    def __exit__(self, exc_type, exc, tb):  # noqa: ANN001
+        return None
+
+    def __iter__(self):
+        for line in self.lines:
+            self.consumed += 1
+            yield line
+
+
+def test_workflow_generator_streaming_stops_at_end_of_object(monkeypatch) -> None:
+    workflow = json.dumps({"nodes": [], "links": [], "last_node_id": 0, "last_link_id": 0})
+    stream = _StreamingResponse([workflow[:20], workflow[20:], " Hope this helps!", " More prose."])
+    bodies: list[dict] = []
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:  # /object_info refresh
+            return _DummyGenResponse("")
+        bodies.append(json.loads(request.data.decode("utf-8")))
+        return stream
+
+    monkeypatch.setattr(
+        "comfyui_xtremetools.base.lm_studio.urllib.request.urlopen",
+        fake_urlopen,
+    )
+
+    workflow_json, info = XtremetoolsWorkflowGenerator().generate_workflow(
+        "Test request",
+        server_settings=XtremetoolsLMStudioServerSettings().build_server_settings("http://localhost:1234")[0],
+        model_settings=XtremetoolsLMStudioModelSettings().build_model_settings("phi-local")[0],
+        auto_layout=False,
+        synthesize_links=False,
+        stream_early_stop=True,
+    )
+
+    assert bodies[0]["stream"] is True
+    assert stream.consumed == 2
+    assert "stopped at end of JSON object" in info
+    assert json.loads(workflow_json)["nodes"] == []
+
+
+def test_workflow_generator_streaming_aborts_on_prose(monkeypatch) -> None:
+    stream = _StreamingResponse(["I am sorry,", " I cannot", " do that."])
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:  # /object_info refresh
+            return _DummyGenResponse("")
+        return stream
+
+    monkeypatch.setattr(
+        "comfyui_xtremetools.base.lm_studio.urllib.request.urlopen",
+        fake_urlopen,
+    )
+
+    workflow_json, info = XtremetoolsWorkflowGenerator().generate_workflow(
+        "Test request",
+        server_settings=XtremetoolsLMStudioServerSettings().build_server_settings("http://localhost:1234")[0],
+        model_settings=XtremetoolsLMStudioModelSettings().build_model_settings("phi-local")[0],
+        stream_early_stop=True,
+    )
+
+    assert stream.consumed == 1
+    assert workflow_json == "{}"
+    assert "aborted early (prose before JSON" in info
+
+
+def test_workflow_generator_json_schema_falls_back_when_rejected(monkeypatch) -> None:
+    valid = json.dumps({"nodes": [], "links": [], "last_node_id": 0, "last_link_id": 0})
+    formats: list[str] = []
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:  # /object_info refresh
+            return _DummyGenResponse("")
+        body = json.loads(request.data.decode("utf-8"))
+        formats.append(body["response_format"]["type"])
+        if body["response_format"]["type"] == "json_schema":
+            raise urllib.error.HTTPError(
+                request.full_url, 400, "Bad Request", {}, io.BytesIO(b'{"error": "json_schema not supported"}')
+            )
+        return _DummyGenResponse(valid)
+
+    monkeypatch.setattr(
+        "comfyui_xtremetools.base.lm_studio.urllib.request.urlopen",
+        fake_urlopen,
+    )
+
+    server_settings, _ = XtremetoolsLMStudioServerSettings().build_server_settings(
+        "http://localhost:1234",
+        timeout_seconds=30,
+    )
+    model_settings, _ = XtremetoolsLMStudioModelSettings().build_model_settings("schema-probe-model")
+    generation_settings, _ = XtremetoolsLMStudioGenerationSettings().build_generation_settings(
+        0.1, 512, response_format="json_schema"
+    )
+    node = XtremetoolsWorkflowGenerator()
+
+    workflow_json, info = node.generate_workflow(
+        "Test request",
+        server_settings=server_settings,
+        model_settings=model_settings,
+        auto_layout=False,
+        synthesize_links=False,
+        generation_settings=generation_settings,
+    )
+
+    assert json.loads(workflow_json)["last_node_id"] == 0
+    assert "Structured JSON mode: enabled (json_schema)" in info
+    assert "json_schema rejected by LM Studio → falling back to text" in info
+    assert formats == ["json_schema", "text"]
+    assert json_schema_capability("schema-probe-model") is False
+
+    # The rejection is cached per model: the next run skips json_schema entirely.
+    formats.clear()
+    node.generate_workflow(
+        "Test request",
+        server_settings=server_settings,
+        model_settings=model_settings,
+        auto_layout=False,
+        synthesize_links=False,
+        generation_settings=generation_settings,
+    )
+    assert formats == ["text"]
+
+
+def test_workflow_generator_deadline_stops_retries(monkeypatch) -> None:
+    import time
+
+    timeouts: list[float] = []
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:  # /object_info refresh
+            return _DummyGenResponse("")
+        timeouts.append(timeout)
+        time.sleep(0.06)
+        return _DummyGenResponse("{still thinking, not json}")
+
+    monkeypatch.setattr(
+        "comfyui_xtremetools.base.lm_studio.urllib.request.urlopen",
+        fake_urlopen,
+    )
+
+    server_settings, _ = XtremetoolsLMStudioServerSettings().build_server_settings(
+        "http://localhost:1234",
+        timeout_seconds=30,
+    )
+    model_settings, _ = XtremetoolsLMStudioModelSettings().build_model_settings("phi-local")
+
+    workflow_json, info = XtremetoolsWorkflowGenerator().generate_workflow(
+        "Test request",
+        server_settings=server_settings,
+        model_settings=model_settings,
+        retry_attempts=3,
+        deadline_seconds=0.05,
+    )
+
+    assert workflow_json == "{}"
+    assert len(timeouts) == 1 and timeouts[0] <= 0.05
+    assert "Status: TIMEOUT" in info
+    assert "exceeded before attempt 2" in info
+
+
+def test_workflow_generator_deadline_returns_best_tier(monkeypatch) -> None:
+    import time
+
+    # Tier 1 needs escalation (its only link is pruned), but the deadline passes first.
+    escalate = json.dumps({"nodes": [], "links": [[1, 1, 0, 2, 0, "STRING"]], "last_node_id": 0, "last_link_id": 1})
+    models_called: list[str] = []
+
+    def fake_urlopen(request, timeout=None):  # noqa: ANN001
+        if request.data is None:  # /object_info refresh
+            return _DummyGenResponse("")
+        models_called.append(json.loads(request.data.decode("utf-8"))["model"])
+        time.sleep(0.06)
+        return _DummyGenResponse(escalate)
+
+    monkeypatch.setattr(
+        "comfyui_xtremetools.base.lm_studio.urllib.request.urlopen",
+        fake_urlopen,
+    )
+
+    server_settings, _ = XtremetoolsLMStudioServerSettings().build_server_settings(
+        "http://localhost:1234",
+        timeout_seconds=30,
+    )
+    model_settings, _ = XtremetoolsLMStudioModelSettings().build_model_settings(
+        "deadline-big",
+        cascade_models="deadline-tiny",
+    )
+
+    workflow_json, info = XtremetoolsWorkflowGenerator().generate_workflow(
+        "Test request",
+        server_settings=server_settings,
+        model_settings=model_settings,
+        deadline_seconds=0.05,
+    )
+
+    assert models_called == ["deadline-tiny"]
+    assert json.loads(workflow_json)["links"] == []
+    assert "Deadline: exceeded, skipped repair and post-processing" in info
+    assert "Deadline: exceeded after tier 1/2" in info
+
+
+def test_workflow_exporter_content_addressed_dedupes(workflow_builder, tmp_path, monkeypatch) -> None:
+    from pathlib import Path
+
+    from comfyui_xtremetools.nodes import workflow_generator
+    from comfyui_xtremetools.workflow_store import WorkflowStore
+
+    store = WorkflowStore(tmp_path / "store")
+    monkeypatch.setattr(workflow_generator, "get_workflow_store", lambda: store)
+    workflow = workflow_builder(nodes=[], links=[])
+    workflow["extra"] = {"origin": "content-addressed-test"}
+    node = XtremetoolsWorkflowExporter()
+
+    path, info = node.export_workflow(json.dumps(workflow), content_addressed=True)
+    again, again_info = node.export_workflow(json.dumps(workflow, indent=4), content_addressed=True)
+
+    assert path == again
+    assert "Status: OK Stored" in info
+    assert "Status: OK Deduplicated" in again_info
+    assert json.loads(store.get_text(Path(path).stem))["extra"]["generated_by"]
+    assert len(store) == 1
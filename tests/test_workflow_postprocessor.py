@@ -4,6 +4,7 @@ from __future__ import annotations
 import json
 
 from comfyui_xtremetools.base.workflow_postprocessor import post_process_workflow
+from comfyui_xtremetools.workflow_validator import validate_workflow_json
 
 
 def test_workflow_postprocessor_synthesize_links(workflow_builder) -> None:
@@ -91,3 +92,287 @@ def test_workflow_postprocessor_both(workflow_builder) -> None:
 
     assert len(parsed["links"]) >= 2
     assert all(node["pos"] != [0, 0] for node in parsed["nodes"])
+
+
+def test_workflow_postprocessor_links_first_upstream_provider(workflow_builder) -> None:
+    workflow = workflow_builder(
+        last_node_id=3,
+        nodes=[
+            {"id": 1, "type": "XtremetoolsLMStudioStylePreset", "outputs": [{"name": "style", "type": "STRING", "links": []}]},
+            {"id": 2, "type": "XtremetoolsLMStudioNegativePrompt", "outputs": [{"name": "neg", "type": "STRING", "links": []}]},
+            {"id": 3, "type": "ShowText|pysssss", "inputs": [{"name": "text", "type": "STRING", "link": None}]},
+        ],
+    )
+
+    parsed = json.loads(post_process_workflow(json.dumps(workflow), apply_layout=False, synthesize_links=True))
+
+    assert parsed["links"] == [[1, 1, 0, 3, 0, "STRING"]]  # same wiring as the original first-match scan
+
+
+def test_workflow_postprocessor_links_outputs_with_null_links(workflow_builder) -> None:
+    workflow = workflow_builder(
+        last_node_id=2,
+        nodes=[
+            {"id": 1, "type": "XtremetoolsLMStudioStylePreset", "outputs": [{"name": "style", "type": "STRING", "links": None}]},
+            {"id": 2, "type": "ShowText|pysssss", "inputs": [{"name": "text", "type": "STRING", "link": None}]},
+        ],
+    )
+
+    parsed = json.loads(post_process_workflow(json.dumps(workflow), apply_layout=False, synthesize_links=True))
+
+    assert parsed["links"] == [[1, 1, 0, 2, 0, "STRING"]]
+    assert parsed["nodes"][0]["outputs"][0]["links"] == [1]
+
+
+def test_workflow_postprocessor_link_synthesis_never_closes_a_cycle(workflow_builder) -> None:
+    joiner = {"type": "XtremetoolsLMStudioPromptJoiner"}
+    workflow = workflow_builder(
+        last_node_id=2,
+        nodes=[
+            {**joiner, "id": node_id, "inputs": [{"name": "text", "type": "STRING", "link": None}], "outputs": [{"name": "joined", "type": "STRING", "links": []}]}
+            for node_id in (1, 2)
+        ],
+    )
+
+    processed = post_process_workflow(json.dumps(workflow), apply_layout=False, synthesize_links=True)
+    parsed = json.loads(processed)
+
+    assert parsed["links"] == [[1, 1, 0, 2, 0, "STRING"]]
+    assert not any("Cycle" in error for error in validate_workflow_json(processed).errors)
+
+
+def test_workflow_postprocessor_link_synthesis_scales_linearly(workflow_builder) -> None:
+    import time
+
+    count = 3000
+    nodes = [
+        {
+            "id": node_id,
+            "type": "XtremetoolsLMStudioPromptJoiner",
+            "inputs": [{"name": "text", "type": "STRING", "link": None}],
+            "outputs": [{"name": "joined", "type": "STRING", "links": []}],
+        }
+        for node_id in range(1, count + 1)
+    ]
+    workflow = workflow_builder(last_node_id=count, nodes=nodes)
+
+    start = time.perf_counter()
+    parsed = json.loads(post_process_workflow(json.dumps(workflow), apply_layout=False, synthesize_links=True))
+    elapsed = time.perf_counter() - start
+
+    sources = {link[3]: link[1] for link in parsed["links"]}
+    assert len(parsed["links"]) == count - 1
+    assert all(source == 1 for source in sources.values())
+    assert 1 not in sources  # nothing upstream of the first node, and no back edge
+    assert elapsed < 2.0
+
+
+def _chain_link(link_id: int, source: int, target: int) -> list:
+    return [link_id, source, 0, target, 0, "STRING"]
+
+
+def test_workflow_postprocessor_topological_sort_follows_links() -> None:
+    from comfyui_xtremetools.base.workflow_postprocessor import WorkflowDAGLayout
+
+    nodes_map = {
+        1: {"id": 1, "type": "ShowText|pysssss"},
+        2: {"id": 2, "type": "XtremetoolsLMStudioText"},
+        3: {"id": 3, "type": "XtremetoolsLMStudioServerSettings"},
+        4: {"id": 4, "type": "XtremetoolsLMStudioPromptJoiner"},
+    }
+    links = [_chain_link(1, 3, 4), _chain_link(2, 4, 2), _chain_link(3, 2, 1)]
+
+    order, cyclic = WorkflowDAGLayout.topological_sort(nodes_map, links)
+
+    assert order == [3, 4, 2, 1]
+    assert cyclic == []
+
+
+def test_workflow_postprocessor_topological_sort_reports_cycles() -> None:
+    from comfyui_xtremetools.base.workflow_postprocessor import WorkflowDAGLayout
+
+    nodes_map = {node_id: {"id": node_id, "type": "XtremetoolsLMStudioPromptJoiner"} for node_id in (1, 2, 3)}
+    links = [_chain_link(1, 1, 2), _chain_link(2, 2, 3), _chain_link(3, 3, 2)]
+
+    order, cyclic = WorkflowDAGLayout.topological_sort(nodes_map, links)
+
+    assert order == [1, 2, 3]
+    assert cyclic == [2, 3]
+
+
+def test_workflow_postprocessor_layered_layout_columns_follow_longest_path(workflow_builder) -> None:
+    nodes = [
+        {"id": 1, "type": "XtremetoolsLMStudioServerSettings", "pos": [0, 0]},
+        {"id": 2, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0]},
+        {"id": 3, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0]},
+        {"id": 4, "type": "XtremetoolsLMStudioText", "pos": [0, 0]},
+    ]
+    links = [_chain_link(1, 1, 2), _chain_link(2, 2, 3), _chain_link(3, 3, 4), _chain_link(4, 1, 4)]
+    workflow = workflow_builder(last_node_id=4, last_link_id=4, nodes=nodes, links=links)
+
+    parsed = json.loads(post_process_workflow(json.dumps(workflow), apply_layout=True, synthesize_links=False))
+    x = {node["id"]: node["pos"][0] for node in parsed["nodes"]}
+
+    assert x[1] < x[2] < x[3] < x[4]
+
+
+def test_workflow_postprocessor_layered_layout_handles_large_graphs(workflow_builder) -> None:
+    import time
+
+    width, depth = 100, 100  # 10k nodes, each wired to two nodes of the previous layer
+    nodes = []
+    links = []
+    for layer in range(depth):
+        for index in range(width):
+            node_id = layer * width + index + 1
+            nodes.append({"id": node_id, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0]})
+            if layer:
+                for offset in (0, 1):
+                    source = (layer - 1) * width + (index + offset) % width + 1
+                    links.append(_chain_link(len(links) + 1, source, node_id))
+    workflow = workflow_builder(last_node_id=len(nodes), last_link_id=len(links), nodes=nodes, links=links)
+
+    start = time.perf_counter()
+    parsed = json.loads(post_process_workflow(json.dumps(workflow), apply_layout=True, synthesize_links=False))
+    elapsed = time.perf_counter() - start
+
+    xs = {node["pos"][0] for node in parsed["nodes"]}
+    ys = {node["pos"][1] for node in parsed["nodes"]}
+    assert len(xs) == depth
+    assert len(ys) == width
+    assert elapsed < 5.0
+
+
+def test_workflow_postprocessor_layout_respects_node_sizes(workflow_builder) -> None:
+    from comfyui_xtremetools.base.spatial_index import rects_overlap
+
+    nodes = [
+        {"id": 1, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0], "size": [900, 600]},
+        {"id": 2, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0], "size": [200, 80]},
+        {"id": 3, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0], "size": [400, 1200]},
+        {"id": 4, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0]},
+    ]
+    links = [_chain_link(1, 1, 4), _chain_link(2, 2, 4)]
+    workflow = workflow_builder(last_node_id=4, last_link_id=2, nodes=nodes, links=links)
+
+    parsed = json.loads(post_process_workflow(json.dumps(workflow), apply_layout=True, synthesize_links=False))
+
+    rects = [
+        (node["pos"][0], node["pos"][1] - 30, (node.get("size") or [320, 120])[0], (node.get("size") or [320, 120])[1] + 30)
+        for node in parsed["nodes"]
+    ]
+    for index, rect in enumerate(rects):
+        assert not any(rects_overlap(rect, other) for other in rects[index + 1 :])
+    by_id = {node["id"]: node["pos"] for node in parsed["nodes"]}
+    assert by_id[4][0] >= by_id[1][0] + 900
+
+
+def test_workflow_postprocessor_layout_avoids_group_title_strips(workflow_builder) -> None:
+    from comfyui_xtremetools.base.workflow_postprocessor import WorkflowDAGLayout
+
+    nodes_map = {1: {"id": 1, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [100, 60]}}
+    groups = [{"title": "Inputs", "bounding": [50, 20, 600, 400]}]
+
+    moved = WorkflowDAGLayout.resolve_overlaps(nodes_map, [1], groups)
+
+    assert moved == 1
+    assert nodes_map[1]["pos"][1] - WorkflowDAGLayout.NODE_TITLE_HEIGHT >= 20 + WorkflowDAGLayout.GROUP_TITLE_HEIGHT
+
+
+def test_workflow_postprocessor_resolve_overlaps_scales(workflow_builder) -> None:
+    import random
+    import time
+
+    from comfyui_xtremetools.base.spatial_index import SpatialGrid
+    from comfyui_xtremetools.base.workflow_postprocessor import WorkflowDAGLayout
+
+    rng = random.Random(7)
+    nodes_map = {
+        node_id: {"id": node_id, "pos": [rng.randrange(0, 20000), rng.randrange(0, 20000)], "size": [rng.randrange(150, 500), rng.randrange(60, 400)]}
+        for node_id in range(1, 5001)
+    }
+
+    start = time.perf_counter()
+    WorkflowDAGLayout.resolve_overlaps(nodes_map, list(nodes_map))
+    elapsed = time.perf_counter() - start
+
+    grid = SpatialGrid()
+    for node_id, node in nodes_map.items():
+        rect = (node["pos"][0], node["pos"][1] - 30, node["size"][0], node["size"][1] + 30)
+        assert not grid.query(rect)
+        grid.insert(node_id, rect)
+    assert elapsed < 5.0
+
+
+def test_workflow_postprocessor_incremental_layout_moves_only_dirty_nodes(workflow_builder) -> None:
+    from comfyui_xtremetools.base.spatial_index import rects_overlap
+    from comfyui_xtremetools.base.workflow_postprocessor import WorkflowDAGLayout
+
+    nodes = [{"id": node_id, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0]} for node_id in range(1, 201)]
+    links = [_chain_link(node_id, node_id, node_id + 1) for node_id in range(1, 200)]
+    workflow = workflow_builder(last_node_id=200, last_link_id=199, nodes=nodes, links=links)
+    laid_out = json.loads(post_process_workflow(json.dumps(workflow), synthesize_links=False, use_layout_cache=False))
+    previous = WorkflowDAGLayout.node_positions(laid_out)
+
+    laid_out["nodes"].append({"id": 201, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0]})
+    laid_out["links"].append(_chain_link(200, 100, 201))
+    parsed = json.loads(
+        post_process_workflow(json.dumps(laid_out), synthesize_links=False, previous_positions=previous)
+    )
+
+    positions = {node["id"]: node["pos"] for node in parsed["nodes"]}
+    assert all(positions[node_id] == previous[node_id] for node_id in range(1, 201))
+    assert positions[201][0] > previous[100][0]
+    rects = [(pos[0], pos[1] - 30, 320, 150) for pos in positions.values()]
+    new_rect = (positions[201][0], positions[201][1] - 30, 320, 150)
+    assert sum(rects_overlap(new_rect, rect) for rect in rects) == 1  # only itself
+
+
+def test_workflow_postprocessor_incremental_layout_keeps_clean_positions(workflow_builder) -> None:
+    from comfyui_xtremetools.base.workflow_postprocessor import WorkflowDAGLayout
+
+    nodes_map = {
+        1: {"id": 1, "pos": [100, 130]},
+        2: {"id": 2, "pos": [500, 130]},
+        3: {"id": 3, "pos": [0, 0]},
+    }
+    previous = {1: [100, 130], 2: [500, 130], 3: [900, 130]}
+
+    moved = WorkflowDAGLayout.relayout_incremental(nodes_map, [_chain_link(1, 1, 2)], previous, dirty_nodes={2})
+
+    assert moved == [2]
+    assert nodes_map[1]["pos"] == [100, 130]
+    assert nodes_map[3]["pos"] == [900, 130]
+    assert nodes_map[2]["pos"][0] == 100 + WorkflowDAGLayout.DEFAULT_NODE_SIZE[0] + WorkflowDAGLayout.COLUMN_GAP
+
+
+def test_workflow_postprocessor_assigns_cluster_groups_and_order(workflow_builder) -> None:
+    nodes = [
+        {"id": 1, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0]},
+        {"id": 2, "type": "XtremetoolsLMStudioServerSettings", "pos": [0, 0]},
+        {"id": 3, "type": "ShowText|pysssss", "pos": [0, 0]},
+        {"id": 4, "type": "XtremetoolsLMStudioPromptJoiner", "pos": [0, 0], "size": [500, 300]},
+    ]
+    links = [_chain_link(1, 2, 1), _chain_link(2, 1, 4), _chain_link(3, 4, 3)]
+    workflow = workflow_builder(
+        last_node_id=4,
+        last_link_id=3,
+        nodes=nodes,
+        links=links,
+        groups=[{"title": "Invented by the model", "bounding": [0, 0, 10, 10]}],
+    )
+
+    parsed = json.loads(post_process_workflow(json.dumps(workflow), synthesize_links=False, use_layout_cache=False))
+
+    order = {node["id"]: node["order"] for node in parsed["nodes"]}
+    assert order == {2: 0, 1: 1, 4: 2, 3: 3}
+    groups = {group["title"]: group["bounding"] for group in parsed["groups"]}
+    assert set(groups) == {"Config", "Processing", "Output"}
+    for node in parsed["nodes"]:
+        x, y = node["pos"]
+        width, height = node.get("size") or [320, 120]
+        gx, gy, gw, gh = groups[{2: "Config", 3: "Output"}.get(node["id"], "Processing")]
+        assert gx <= x and x + width <= gx + gw
+        assert gy + 40 <= y - 30 and y + height <= gy + gh
+    gx, gy, gw, gh = groups["Processing"]
+    assert gw == 320 + 80 + 500 + 2 * 10  # tight: two processing columns plus padding
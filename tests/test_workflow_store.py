@@ -0,0 +1,95 @@
+"""Tests for canonical workflow JSON and the content-addressed store."""
+from __future__ import annotations
+
+import json
+import math
+
+import pytest
+
+from comfyui_xtremetools.workflow_cache import WorkflowCache
+from comfyui_xtremetools.workflow_store import WorkflowStore, canonical_json, workflow_digest
+
+
+def _workflow() -> dict:
+    return {
+        "last_node_id": 2,
+        "last_link_id": 1,
+        "nodes": [
+            {"id": 1, "type": "A", "pos": [0.0, 10.0], "outputs": [{"name": "X", "type": "X", "links": [3, 1]}]},
+            {"id": 2, "type": "B", "pos": [1.5, 0], "inputs": [{"name": "x", "type": "X", "link": 1}]},
+        ],
+        "links": [[3, 1, 0, 2, 0, "X"], [1, 1, 0, 2, 0, "X"]],
+    }
+
+
+def test_canonical_json_ignores_cosmetic_differences() -> None:
+    workflow = _workflow()
+    shuffled = {key: workflow[key] for key in reversed(list(workflow))}
+    shuffled["nodes"] = list(reversed(workflow["nodes"]))
+    shuffled["links"] = list(reversed(workflow["links"]))
+    shuffled["nodes"][1]["pos"] = [0, 10]  # was [0.0, 10.0]
+
+    assert canonical_json(json.dumps(workflow, indent=4)) == canonical_json(shuffled)
+    assert workflow_digest(workflow) == workflow_digest(json.dumps(shuffled, separators=(",", ":")))
+    assert workflow["nodes"][0]["pos"] == [0.0, 10.0]  # input untouched
+
+    text = canonical_json(workflow)
+    assert text.index('"id": 1') < text.index('"id": 2')
+    assert '"links": [1, 3]' in text
+    assert '"pos": [1.5, 0]' in text
+    assert workflow_digest(workflow) != workflow_digest({**workflow, "last_link_id": 2})
+    with pytest.raises(ValueError):
+        canonical_json({"nodes": [], "extra": {"scale": math.nan}})
+
+
+def test_store_deduplicates_and_indexes(tmp_path) -> None:
+    store = WorkflowStore(tmp_path)
+    first = store.put(_workflow())
+    second = store.put(json.dumps(_workflow(), indent=2))
+
+    assert first.created and not second.created
+    assert first.digest == second.digest and first.path == second.path
+    assert first.path == tmp_path / first.digest[:2] / f"{first.digest}.json"
+    assert store.get_text(first.digest) == canonical_json(_workflow())
+    assert first.digest in store and "0" * 64 not in store
+
+    lines = (tmp_path / WorkflowStore.INDEX_NAME).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["digest"] for line in lines] == [first.digest]
+    assert len(WorkflowStore(tmp_path)) == 1
+    assert store.stats()["dedupe_hits"] == 1
+
+
+def test_cache_shares_blobs_and_migrates_v1_files(tmp_path) -> None:
+    (tmp_path / WorkflowCache.FILE_NAME).write_text(
+        json.dumps({"version": 1, "entries": {"old": {"workflow_json": '{"b":1,"a":2.0}', "created": 1e12, "last_used": 1e12}}}),
+        encoding="utf-8",
+    )
+    cache = WorkflowCache(tmp_path)
+    assert cache.get("old") == '{"a": 2, "b": 1}'
+    assert cache.put("new", '{"a":2,"b":1}') == '{"a": 2, "b": 1}'
+    assert len(cache.store) == 1
+
+    saved = json.loads((tmp_path / WorkflowCache.FILE_NAME).read_text(encoding="utf-8"))
+    assert saved["version"] == 2
+    assert saved["entries"]["old"]["digest"] == saved["entries"]["new"]["digest"]
+
+    cache.store.path_for(saved["entries"]["new"]["digest"]).unlink()
+    assert cache.get("new") is None
+    assert "new" not in json.loads((tmp_path / WorkflowCache.FILE_NAME).read_text(encoding="utf-8"))["entries"]
+
+
+def test_cache_deletes_blobs_once_no_entry_references_them(tmp_path) -> None:
+    cache = WorkflowCache(tmp_path, max_entries=2)
+    cache.put("a", '{"shared": 1}')
+    cache.put("b", '{"shared": 1.0}')  # same canonical workflow as "a"
+    cache.put("c", '{"only": "c"}')  # evicts "a"; "b" still needs the shared blob
+    assert cache.get("b") == '{"shared": 1}'
+    assert len(cache.store) == 2
+
+    cache.put("d", '{"only": "d"}')  # evicts "c"
+    cache.invalidate("b")
+    cache.put("d", '{"only": "d2"}')  # replacing "d" frees its old blob
+
+    blobs = sorted(path.name for path in (tmp_path / WorkflowCache.BLOB_DIR).glob("*/*.json"))
+    assert blobs == [f"{workflow_digest({'only': 'd2'})}.json"]
+    assert len(WorkflowStore(tmp_path / WorkflowCache.BLOB_DIR)) == 1
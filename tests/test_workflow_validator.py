@@ -0,0 +1,283 @@
+"""Tests for the workflow validator fast paths."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from comfyui_xtremetools.workflow_validator import validate_workflow_json
+
+
+def _workflow(**overrides) -> dict:
+    workflow = {
+        "last_node_id": 2,
+        "last_link_id": 1,
+        "nodes": [
+            {"id": 1, "type": "A", "pos": [0, 0], "inputs": [], "outputs": [{"name": "o", "type": "STRING", "links": [1]}]},
+            {"id": 2, "type": "B", "pos": [400, 0], "inputs": [{"name": "i", "type": "STRING", "link": 1}], "outputs": [], "widgets_values": [1]},
+        ],
+        "links": [[1, 1, 0, 2, 0, "STRING"]],
+        "groups": [],
+        "config": {},
+        "extra": {"ds": {"scale": 1}},
+        "version": 0.4,
+    }
+    workflow.update(overrides)
+    return workflow
+
+
+def test_validator_returns_input_unchanged_when_nothing_was_fixed() -> None:
+    text = json.dumps(_workflow(), indent=2)
+
+    result = validate_workflow_json(text)
+
+    assert result.is_valid
+    assert not result.modified
+    assert result.workflow_json is text
+
+
+def test_validator_accepts_bytes_and_reserialises_only_after_fixes() -> None:
+    raw = json.dumps(_workflow(last_node_id=0)).encode("utf-8")
+
+    result = validate_workflow_json(raw)
+
+    assert result.is_valid
+    assert result.modified
+    parsed = json.loads(result.workflow_json)
+    assert parsed["last_node_id"] == 2
+    assert parsed["extra"] == {"ds": {"scale": 1}}
+    assert parsed["nodes"][1]["widgets_values"] == [1]
+    assert parsed["nodes"][0]["pos"] == [0, 0]  # ints are not coerced to floats
+
+
+def test_validator_reports_parse_and_shape_errors_by_path() -> None:
+    broken = validate_workflow_json('{"nodes": [')
+    not_object = validate_workflow_json("[1, 2]")
+    bad_shape = validate_workflow_json(json.dumps(_workflow(nodes=[{"id": "one", "type": "A"}])))
+
+    assert broken.errors[0].startswith("JSON parse error")
+    assert not_object.report == "INVALID: parse error"
+    assert bad_shape.report == "INVALID: schema rejection"
+    assert any(error.startswith("Schema validation failed: /nodes/0/id:") for error in bad_shape.errors)
+
+
+def test_validator_coerces_numeric_strings_and_floats_like_the_lax_model(tmp_path) -> None:  # noqa: ANN001
+    from comfyui_xtremetools.workflow_validator import build_validation_state, validate_workflow_stream
+
+    payload = _workflow(last_node_id=2.0)
+    payload["nodes"][0].update(id="1", pos=["1", "2"])
+    path = tmp_path / "lax.json"
+    path.write_text(json.dumps(payload), encoding="utf-8")
+
+    result = validate_workflow_json(path.read_text(encoding="utf-8"), use_cache=False)
+    coerced = json.loads(result.workflow_json)
+
+    assert result.is_valid, result.errors
+    assert result.modified
+    assert coerced["last_node_id"] == 2 and isinstance(coerced["last_node_id"], int)
+    assert coerced["nodes"][0]["id"] == 1
+    assert coerced["nodes"][0]["pos"] == [1, 2]
+    assert validate_workflow_stream(path).is_valid
+    assert not build_validation_state(payload).issues
+
+
+def test_union_errors_are_reported_once_per_location() -> None:
+    payload = _workflow()
+    payload["nodes"][0]["pos"] = ["x", 0]
+
+    result = validate_workflow_json(json.dumps(payload), use_cache=False)
+
+    assert result.errors == ["Schema validation failed: /nodes/0/pos/0: Input should be int or float"]
+
+
+def test_validator_cache_serves_identical_bytes_without_revalidating(monkeypatch) -> None:
+    from comfyui_xtremetools import workflow_validator
+
+    cache = workflow_validator.get_validation_cache()
+    cache.clear()
+    calls: list[int] = []
+    original = workflow_validator._validate_workflow_text
+
+    def counting(workflow_json, auto_fix):  # noqa: ANN001
+        calls.append(1)
+        return original(workflow_json, auto_fix)
+
+    monkeypatch.setattr(workflow_validator, "_validate_workflow_text", counting)
+    text = json.dumps(_workflow(last_node_id=0))
+
+    first = validate_workflow_json(text)
+    first.errors.append("mutated by caller")
+    second = validate_workflow_json(text.encode("utf-8"))
+    strict = validate_workflow_json(text, auto_fix=False)
+
+    assert len(calls) == 2  # the bytes call hit the cache; auto_fix=False is a different key
+    assert second.errors == []
+    assert second.workflow_json == first.workflow_json
+    assert second.document is None
+    assert strict.workflow_json == text
+    assert cache.stats()["hits"] == 1
+
+
+def test_validator_never_fetches_object_info_with_an_empty_registry(monkeypatch) -> None:
+    from comfyui_xtremetools import node_discovery
+    from comfyui_xtremetools.type_registry import TypeRegistry
+
+    fetches: list[int] = []
+    monkeypatch.setattr(node_discovery._STATE, "registry", TypeRegistry())
+    monkeypatch.setattr(node_discovery, "fetch_object_info", lambda server_url=None: fetches.append(1) or {})
+    text = json.dumps(_workflow(extra={"origin": "offline-registry-test"}))
+
+    first = validate_workflow_json(text)
+    second = validate_workflow_json(text)
+
+    assert first.is_valid and second.is_valid
+    assert fetches == []  # neither the miss nor the cache hit touches the network
+
+
+def test_self_check_reports_validation_cache() -> None:
+    from comfyui_xtremetools.nodes.self_check import XtremetoolsSelfCheck
+
+    (report,) = XtremetoolsSelfCheck().run_check()
+
+    assert "Validation cache:" in report
+
+
+def _chain(length: int) -> dict:
+    nodes = [
+        {
+            "id": node_id,
+            "type": "A",
+            "inputs": [{"name": "i", "type": "STRING", "link": node_id - 1 if node_id > 1 else None}],
+            "outputs": [{"name": "o", "type": "STRING", "links": [node_id] if node_id < length else []}],
+        }
+        for node_id in range(1, length + 1)
+    ]
+    links = [[node_id, node_id, 0, node_id + 1, 0, "STRING"] for node_id in range(1, length)]
+    return {"last_node_id": length, "last_link_id": length - 1, "nodes": nodes, "links": links}
+
+
+def test_graph_integrity_flags_sockets_types_and_cycles() -> None:
+    from comfyui_xtremetools.type_registry import TypeRegistry
+    from comfyui_xtremetools.workflow_validator import check_graph_integrity
+
+    payload = _chain(3)
+    payload["nodes"][2]["inputs"][0]["type"] = "IMAGE"
+    payload["links"].append([3, 3, 4, 1, 0, "STRING"])  # slot 4 does not exist
+    payload["links"].append([4, 3, 0, 1, 0, "STRING"])  # closes 1 -> 2 -> 3 -> 1
+    payload["nodes"][2]["outputs"][0]["links"] = [4]
+    payload["nodes"][0]["inputs"][0]["link"] = 4
+    payload["nodes"][1]["outputs"][0]["links"] = [2, 99]
+
+    errors = check_graph_integrity(payload, TypeRegistry())
+
+    assert "Link 2 connects incompatible types STRING -> IMAGE" in errors
+    assert "Link 3 source slot 4 out of range for node 3 (1 outputs)" in errors
+    assert "Link 3 not listed in source node 3 output 4 links" not in errors  # out-of-range links stop there
+    assert "Node 2 output 0 references missing link 99" in errors
+    assert "Cycle detected: 1 -> 2 -> 3 -> 1" in errors
+
+
+def test_graph_integrity_is_linear_on_large_graphs() -> None:
+    import time
+
+    from comfyui_xtremetools.type_registry import TypeRegistry
+    from comfyui_xtremetools.workflow_validator import check_graph_integrity
+
+    payload = _chain(100_000)
+
+    start = time.perf_counter()
+    errors = check_graph_integrity(payload, TypeRegistry())
+    elapsed = time.perf_counter() - start
+
+    assert errors == []
+    assert elapsed < 3.0
+
+
+def test_stream_validation_matches_in_memory_validation(tmp_path) -> None:  # noqa: ANN001
+    import json
+
+    from comfyui_xtremetools.workflow_validator import validate_workflow_json, validate_workflow_stream
+
+    payload = _chain(50)
+    payload["links"][10][3] = 999  # unknown target node
+    payload["nodes"][5]["pos"] = [0, 0, 0]
+    path = tmp_path / "big.json"
+    path.write_text(json.dumps(payload), encoding="utf-8")
+
+    streamed = validate_workflow_stream(path, chunk_size=256)
+    in_memory = validate_workflow_json(path.read_bytes(), auto_fix=False, use_cache=False)
+
+    assert not streamed.is_valid
+    assert sorted(streamed.errors) == sorted(in_memory.errors)
+    assert "Link 11 references unknown target node 999" in streamed.errors
+    assert "Schema: /nodes/5/pos: expected at most 2 items, got 3" in streamed.errors
+
+    path.write_text('{"nodes": [', encoding="utf-8")
+    broken = validate_workflow_stream(path)
+    assert broken.report == "INVALID: parse error"
+    assert broken.errors[0].startswith("JSON parse error:")
+
+
+def test_incremental_validation_tracks_edits_like_a_full_run() -> None:
+    import json
+    import time
+
+    from comfyui_xtremetools.type_registry import TypeRegistry
+    from comfyui_xtremetools.workflow_validator import (
+        WorkflowDiff,
+        build_validation_state,
+        check_graph_integrity,
+        validate_workflow_diff,
+    )
+
+    registry = TypeRegistry()
+    payload = _chain(20_000)
+    state = build_validation_state(json.loads(json.dumps(payload)), registry)
+    assert state.result().is_valid
+
+    # Close a cycle 20000 -> 1 by adding a link and wiring its sockets.
+    closing = [20_000, 20_000, 0, 1, 0, "STRING"]
+    payload["links"].append(closing)
+    payload["nodes"][0]["inputs"][0]["link"] = 20_000
+    payload["nodes"][-1]["outputs"][0]["links"] = [20_000]
+    start = time.perf_counter()
+    result = validate_workflow_diff(
+        state,
+        WorkflowDiff(
+            nodes={1: payload["nodes"][0], 20_000: payload["nodes"][-1]},
+            links={20_000: closing},
+            top_level={"last_link_id": 20_000},
+        ),
+    )
+    assert time.perf_counter() - start < 0.5  # bounded by the rank search, not a full re-check
+    assert [error for error in result.errors if error.startswith("Cycle detected: 20000 -> 1 -> 2")]
+    assert check_graph_integrity(payload, registry)[-1].startswith("Cycle detected")
+
+    # Re-targeting the closing link onto a missing node clears the cycle and flags the stale sockets.
+    result = validate_workflow_diff(state, WorkflowDiff(links={20_000: [20_000, 20_000, 0, 99_999, 0, "STRING"]}))
+    assert sorted(result.errors) == [
+        "Link 20000 references unknown target node 99999",
+        "Node 1 input 0 references link 20000, which targets node 99999 input 0",
+    ]
+    assert result.warnings == []
+
+    payload["nodes"][0]["inputs"][0]["link"] = None
+    result = validate_workflow_diff(state, WorkflowDiff(links={20_000: None}, nodes={1: payload["nodes"][0]}))
+    assert result.errors == ["Node 20000 output 0 references missing link 20000"]
+
+
+@pytest.mark.parametrize("slot", [None, "0", 0.0])
+def test_non_integer_link_slots_are_reported_not_raised(tmp_path, slot) -> None:  # noqa: ANN001
+    from comfyui_xtremetools.workflow_validator import validate_workflow_stream
+
+    payload = _workflow(links=[[1, 1, slot, 2, 0, "STRING"]])
+    path = tmp_path / "slot.json"
+    path.write_text(json.dumps(payload), encoding="utf-8")
+
+    in_memory = validate_workflow_json(path.read_text(encoding="utf-8"), use_cache=False)
+    streamed = validate_workflow_stream(path)
+
+    for result in (in_memory, streamed):
+        assert not result.is_valid
+        assert "Link 1: source slot must be an integer" in result.errors
+    assert sorted(streamed.errors) == sorted(in_memory.errors)